@@ -0,0 +1,152 @@
+# benchmarks/bench_render.py
+"""
+Микробенчмарк рендера карточек и резолва лейблов.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_render
+    python -m benchmarks.bench_render --iterations 50000
+
+Меряем пропускную способность (операций в секунду):
+- format_stack_value без кэша (чистый разбор строки) и с мемоизацией;
+- format_profile_public / format_project_card (полный рендер);
+- render_profile_card / render_project_card: холодный рендер (текст + клавиатура)
+  и повторные обращения к прогретому кэшу карточек.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable
+
+# config требует BOT_TOKEN даже для импорта вьюх — для бенчмарка хватит заглушки
+os.environ.setdefault("BOT_TOKEN", "0:bench")
+
+from constants import format_stack_value  # noqa: E402
+from views import (  # noqa: E402
+    format_profile_public,
+    format_project_card,
+    render_profile_card,
+    render_project_card,
+)
+
+STACK_VALUES = [
+    "python",
+    "python, nodejs",
+    "python, react; FastAPI",
+    "py_react; docker",
+    "Python, React, Vue; свой стек",
+    None,
+]
+
+
+def _make_profiles(n: int) -> list[SimpleNamespace]:
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            telegram_id=1_000 + i,
+            updated_at=now,
+            first_name=f"Dev <{i}>",
+            role=("backend", "frontend", "qa")[i % 3],
+            stack=STACK_VALUES[i % len(STACK_VALUES)],
+            framework="FastAPI",
+            skills="Git, SQL, Docker",
+            goals="find_teammate",
+            about="Пишу бэкенд & люблю тесты",
+            avatar_file_id=None if i % 2 else "file-id",
+        )
+        for i in range(n)
+    ]
+
+
+def _make_projects(n: int) -> list[SimpleNamespace]:
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=i + 1,
+            updated_at=now,
+            title=f"Проект <{i}>",
+            stack=STACK_VALUES[i % len(STACK_VALUES)],
+            idea="Платформа для IT-нетворкинга",
+            looking_for_role="Backend, QA",
+            level="Middle",
+            status="💡 Идея",
+            needs_now="Нужен backend",
+            team_limit=5,
+            current_members=2,
+            extra="Вечера и выходные",
+            image_file_id=None,
+        )
+        for i in range(n)
+    ]
+
+
+def _bench(name: str, fn: Callable[[int], object], iterations: int) -> None:
+    started = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    elapsed = time.perf_counter() - started
+    rate = iterations / elapsed if elapsed else float("inf")
+    print(f"{name:<40} {rate:>14,.0f} ops/s  ({elapsed * 1000:.1f} ms)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--entities", type=int, default=200)
+    args = parser.parse_args()
+
+    profiles = _make_profiles(args.entities)
+    projects = _make_projects(args.entities)
+    raw_format_stack = format_stack_value.__wrapped__
+
+    print(f"iterations={args.iterations} entities={args.entities}\n")
+
+    _bench(
+        "format_stack_value (no memo)",
+        lambda i: raw_format_stack(STACK_VALUES[i % len(STACK_VALUES)]),
+        args.iterations,
+    )
+    _bench(
+        "format_stack_value (memoized)",
+        lambda i: format_stack_value(STACK_VALUES[i % len(STACK_VALUES)]),
+        args.iterations,
+    )
+    _bench(
+        "format_profile_public",
+        lambda i: format_profile_public(profiles[i % len(profiles)]),
+        args.iterations,
+    )
+    _bench(
+        "render_profile_card (cold, +keyboard)",
+        lambda i: render_profile_card(profiles[i]),
+        len(profiles),
+    )
+    _bench(
+        "render_profile_card (warm cache)",
+        lambda i: render_profile_card(profiles[i % len(profiles)]),
+        args.iterations,
+    )
+    _bench(
+        "format_project_card",
+        lambda i: format_project_card(projects[i % len(projects)]),
+        args.iterations,
+    )
+    _bench(
+        "render_project_card (cold, +keyboard)",
+        lambda i: render_project_card(projects[i]),
+        len(projects),
+    )
+    _bench(
+        "render_project_card (warm cache)",
+        lambda i: render_project_card(projects[i % len(projects)]),
+        args.iterations,
+    )
+
+    print(f"\nformat_stack_value cache: {format_stack_value.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# benchmarks/bench_webhook.py
+"""
+Задержка доставки апдейта до хендлера: webhook против long polling.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_webhook
+    python -m benchmarks.bench_webhook --rounds 500 --rtt-ms 40
+
+Берём записанные Update из benchmarks/data/updates.json и прогоняем их:
+- webhook: настоящий aiohttp-сервер из webhook.build_webhook_app на
+  localhost, апдейты приходят POST-ом с секретом (как от Telegram);
+- polling: dp.start_polling с фейковой сессией, getUpdates отдаёт
+  апдейты из очереди (long poll), --rtt-ms добавляет сетевую задержку
+  ответа getUpdates.
+
+Меряем время от "Telegram отдал апдейт" до входа в хендлер (p50/p95/max).
+Хендлеры пустые — сравниваем именно транспорт.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+# config требует BOT_TOKEN даже для импорта — для бенчмарка хватит заглушки
+os.environ.setdefault("BOT_TOKEN", "42:bench")
+os.environ.setdefault("WEBHOOK_SECRET", "bench-secret")
+os.environ.setdefault("WEBHOOK_PATH", "/telegram/webhook")
+
+from aiogram import Bot, Dispatcher, Router  # noqa: E402
+from aiogram.client.session.base import BaseSession  # noqa: E402
+from aiogram.methods import GetMe, GetUpdates, TelegramMethod  # noqa: E402
+from aiogram.types import CallbackQuery, Message, Update, User  # noqa: E402
+from aiohttp import ClientSession, web  # noqa: E402
+
+from config import settings  # noqa: E402
+from webhook import build_webhook_app  # noqa: E402
+
+DATA_FILE = Path(__file__).resolve().parent / "data" / "updates.json"
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.sent_at: dict[int, float] = {}
+        self.latencies: list[float] = []
+        self.done = asyncio.Event()
+        self.expected = 0
+
+    def mark(self, update_id: int) -> None:
+        started = self.sent_at.pop(update_id, None)
+        if started is not None:
+            self.latencies.append(time.perf_counter() - started)
+        if len(self.latencies) >= self.expected:
+            self.done.set()
+
+
+def _build_dispatcher(recorder: _Recorder) -> Dispatcher:
+    router = Router()
+
+    @router.message()
+    async def _on_message(message: Message, event_update: Update) -> None:
+        recorder.mark(event_update.update_id)
+
+    @router.callback_query()
+    async def _on_callback(callback: CallbackQuery, event_update: Update) -> None:
+        recorder.mark(event_update.update_id)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+def _load_updates(rounds: int) -> list[dict[str, Any]]:
+    samples = json.loads(DATA_FILE.read_text(encoding="utf-8"))
+    updates = []
+    for i in range(rounds):
+        update = json.loads(json.dumps(samples[i % len(samples)]))
+        update["update_id"] = i + 1
+        updates.append(update)
+    return updates
+
+
+class _FakeSession(BaseSession):
+    """getUpdates — из очереди (как long poll), остальные методы — заглушки."""
+
+    def __init__(self, queue: asyncio.Queue, rtt: float) -> None:
+        super().__init__()
+        self.queue = queue
+        self.rtt = rtt
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: int | None = None):
+        if isinstance(method, GetMe):
+            return User(id=42, is_bot=True, first_name="bench")
+        if isinstance(method, GetUpdates):
+            batch = [await self.queue.get()]
+            while not self.queue.empty() and len(batch) < 100:
+                batch.append(self.queue.get_nowait())
+            if self.rtt:
+                await asyncio.sleep(self.rtt / 2)
+            return [Update.model_validate(item) for item in batch]
+        return True
+
+    async def stream_content(self, *args: Any, **kwargs: Any):  # pragma: no cover
+        raise NotImplementedError
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+async def _bench_webhook(updates: list[dict[str, Any]], rtt: float, port: int) -> _Recorder:
+    recorder = _Recorder()
+    recorder.expected = len(updates)
+    dp = _build_dispatcher(recorder)
+    bot = Bot(token=settings.bot_token, session=_FakeSession(asyncio.Queue(), 0))
+
+    app = build_webhook_app(dp, bot)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host="127.0.0.1", port=port)
+    await site.start()
+
+    url = f"http://127.0.0.1:{port}{settings.webhook_path}"
+    headers = {"X-Telegram-Bot-Api-Secret-Token": settings.webhook_secret}
+    try:
+        async with ClientSession() as http:
+            for update in updates:
+                recorder.sent_at[update["update_id"]] = time.perf_counter()
+                if rtt:
+                    await asyncio.sleep(rtt / 2)
+                async with http.post(url, json=update, headers=headers) as response:
+                    assert response.status == 200, response.status
+            await asyncio.wait_for(recorder.done.wait(), timeout=30)
+    finally:
+        await runner.cleanup()
+    return recorder
+
+
+async def _bench_polling(updates: list[dict[str, Any]], rtt: float) -> _Recorder:
+    recorder = _Recorder()
+    recorder.expected = len(updates)
+    dp = _build_dispatcher(recorder)
+    queue: asyncio.Queue = asyncio.Queue()
+    bot = Bot(token=settings.bot_token, session=_FakeSession(queue, rtt))
+
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False))
+    try:
+        for update in updates:
+            recorder.sent_at[update["update_id"]] = time.perf_counter()
+            await queue.put(update)
+            # апдейты от пользователей приходят не пачкой
+            await asyncio.sleep(0)
+        await asyncio.wait_for(recorder.done.wait(), timeout=30)
+    finally:
+        await dp.stop_polling()
+        await polling
+    return recorder
+
+
+def _report(name: str, recorder: _Recorder) -> None:
+    values = sorted(recorder.latencies)
+    p95 = values[max(0, int(len(values) * 0.95) - 1)]
+    print(
+        f"{name:<10} n={len(values):<6} "
+        f"p50={statistics.median(values) * 1000:7.2f} ms  "
+        f"p95={p95 * 1000:7.2f} ms  "
+        f"max={values[-1] * 1000:7.2f} ms"
+    )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    updates = _load_updates(args.rounds)
+    rtt = args.rtt_ms / 1000
+    print(f"rounds={args.rounds} rtt_ms={args.rtt_ms}\n")
+    _report("webhook", await _bench_webhook(updates, rtt, args.port))
+    _report("polling", await _bench_polling(updates, rtt))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=18080)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# bot_session.py
+"""
+HTTP-сессия к Bot API.
+
+AiohttpSession по умолчанию: до 100 соединений, одинаковый таймаут на
+все методы, без метрик. Здесь:
+- пул keep-alive соединений настраивается (BOT_API_POOL_SIZE,
+  BOT_API_KEEPALIVE_SECONDS), DNS кэшируется на BOT_API_DNS_TTL_SECONDS;
+- таймаут по методу (BOT_API_METHOD_TIMEOUTS), остальным —
+  BOT_API_TIMEOUT_SECONDS; явный timeout от вызывающего (getUpdates
+  в polling) не трогаем;
+- задержка и ошибки по каждому методу Bot API — в метриках "bot_api".
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter, defaultdict, deque
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import TelegramMethod
+
+from config import settings
+from metrics import percentile_ms, register_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def parse_method_timeouts(raw: str) -> dict[str, float]:
+    """"sendPhoto=30,getFile=60" -> {"sendPhoto": 30.0, "getFile": 60.0}"""
+    result: dict[str, float] = {}
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        method, _, value = item.partition("=")
+        try:
+            result[method.strip()] = float(value)
+        except ValueError:
+            logger.warning("bot_api_bad_method_timeout item=%s", item)
+    return result
+
+
+class _MethodStats:
+    __slots__ = ("calls", "errors", "latencies", "total_time")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors: Counter[str] = Counter()
+        self.latencies: deque[float] = deque(maxlen=500)
+        self.total_time = 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "calls": self.calls,
+            "errors": sum(self.errors.values()),
+            "errors_by_type": dict(self.errors),
+            "avg_ms": round(self.total_time / self.calls * 1000, 1) if self.calls else 0.0,
+            "p50_ms": percentile_ms(latencies, 0.5),
+            "p95_ms": percentile_ms(latencies, 0.95),
+            "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        }
+
+
+class TunedAiohttpSession(AiohttpSession):
+    """
+    Меряем именно HTTP-запрос: то, что отбросили request-middleware
+    (например, повторный answerCallbackQuery), в метрики не попадает.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_size: int,
+        keepalive_timeout: float,
+        dns_ttl: int,
+        timeout: float,
+        method_timeouts: dict[str, float] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(limit=pool_size, timeout=timeout, **kwargs)
+        self._connector_init.update(
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=dns_ttl,
+        )
+        self.method_timeouts = method_timeouts or {}
+        self._methods: defaultdict[str, _MethodStats] = defaultdict(_MethodStats)
+        register_metrics("bot_api", self.stats)
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod,
+        timeout: int | None = None,
+    ):
+        name = method.__api_method__
+        if timeout is None:
+            timeout = self.method_timeouts.get(name)
+
+        stats = self._methods[name]
+        started = time.perf_counter()
+        try:
+            return await super().make_request(bot, method, timeout=timeout)
+        except Exception as exc:
+            stats.errors[type(exc).__name__] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.latencies.append(elapsed)
+
+    def stats(self) -> dict[str, Any]:
+        return {name: stats.snapshot() for name, stats in sorted(self._methods.items())}
+
+
+def create_bot_session() -> TunedAiohttpSession:
+    session = TunedAiohttpSession(
+        pool_size=settings.bot_api_pool_size,
+        keepalive_timeout=settings.bot_api_keepalive_seconds,
+        dns_ttl=settings.bot_api_dns_ttl_seconds,
+        timeout=settings.bot_api_timeout_seconds,
+        method_timeouts=parse_method_timeouts(settings.bot_api_method_timeouts),
+    )
+    logger.info(
+        "bot_session_configured pool_size=%s keepalive=%s dns_ttl=%s timeout=%s",
+        settings.bot_api_pool_size,
+        settings.bot_api_keepalive_seconds,
+        settings.bot_api_dns_ttl_seconds,
+        settings.bot_api_timeout_seconds,
+    )
+    return session
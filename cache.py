@@ -0,0 +1,196 @@
+# cache.py
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, Hashable, Iterator, TypeVar
+
+from metrics import register_metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Простой in-process LRU-кэш с опциональным TTL.
+
+    - maxsize — сколько ключей держим максимум (самые старые по доступу вытесняются);
+    - ttl — время жизни записи в секундах (None — без протухания).
+
+    Если передан name — кэш регистрирует свои счётчики в metrics.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        *,
+        ttl: float | None = None,
+        name: str | None = None,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize должен быть > 0")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+
+        # key -> (expires_at | None, value)
+        self._data: OrderedDict[K, tuple[float | None, V]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        if name:
+            register_metrics(name, self.stats)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self._peek(key) is not _MISSING
+
+    def _peek(self, key: K) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return _MISSING
+
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            # протухло — выкидываем сразу
+            del self._data[key]
+            return _MISSING
+        return value
+
+    def get(self, key: K, default: Any = None) -> V | Any:
+        value = self._peek(key)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: K, default: Any = None) -> V | Any:
+        """Как get, но без учёта в hit/miss и без сдвига в LRU-порядке."""
+        value = self._peek(key)
+        return default if value is _MISSING else value
+
+    def values(self) -> Iterator[V]:
+        """
+        Живые значения (для метрик): без учёта в hit/miss, без сдвига
+        в LRU-порядке; протухшие пропускаем, но не удаляем.
+        """
+        now = time.monotonic()
+        for expires_at, value in list(self._data.values()):
+            if expires_at is None or expires_at > now:
+                yield value
+
+    def set(self, key: K, value: V) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: K) -> None:
+        if self._data.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.invalidations += len(self._data)
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class AsyncLRUCache(LRUCache[K, V]):
+    """
+    LRU + TTL кэш для async-загрузчиков (read-through).
+
+    get_or_load(key, loader):
+    - если значение есть в кэше — отдаём его без обращения к loader;
+    - если нет — вызываем loader ОДИН раз, даже если одновременно пришло
+      несколько промахов по одному ключу (single-flight): остальные ждут
+      тот же результат.
+
+    None в кэш не кладём — "не найдено" должно перепроверяться.
+    Если ключ инвалидировали, пока loader работал, результат загрузки
+    в кэш не попадает (чтобы не записать устаревшие данные поверх свежих).
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        *,
+        ttl: float | None = None,
+        name: str | None = None,
+    ) -> None:
+        self._inflight: dict[K, asyncio.Future] = {}
+        self.coalesced = 0
+        super().__init__(maxsize, ttl=ttl, name=name)
+
+    async def get_or_load(
+        self,
+        key: K,
+        loader: Callable[[], Awaitable[V | None]],
+    ) -> V | None:
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            value = await loader()
+        except BaseException as exc:
+            fut.set_exception(exc)
+            # помечаем исключение "прочитанным", если ждущих не было
+            fut.exception()
+            raise
+        else:
+            if value is not None and self._inflight.get(key) is fut:
+                self.set(key, value)
+            fut.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+
+    def invalidate(self, key: K) -> None:
+        # "отвязываем" идущую загрузку — её результат не будет сохранён
+        self._inflight.pop(key, None)
+        super().invalidate(key)
+
+    def clear(self) -> None:
+        self._inflight.clear()
+        super().clear()
+
+    def stats(self) -> dict[str, Any]:
+        data = super().stats()
+        data["coalesced"] = self.coalesced
+        data["inflight"] = len(self._inflight)
+        return data
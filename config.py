@@ -22,6 +22,16 @@ class Settings(BaseSettings):
     env: Literal["dev", "stage", "prod"] = Field("dev", alias="ENV")
     log_level: str = Field("INFO", alias="LOG_LEVEL")
 
+    # Polling / webhook
+    bot_mode: Literal["polling", "webhook"] = Field("polling", alias="BOT_MODE")
+    webhook_base_url: str | None = Field(None, alias="WEBHOOK_BASE_URL")
+    webhook_path: str = Field("/telegram/webhook", alias="WEBHOOK_PATH")
+    webhook_secret: str | None = Field(None, alias="WEBHOOK_SECRET")
+    webhook_max_connections: int = Field(40, alias="WEBHOOK_MAX_CONNECTIONS")
+    webhook_shutdown_timeout: float = Field(10, alias="WEBHOOK_SHUTDOWN_TIMEOUT")
+    webapp_host: str = Field("0.0.0.0", alias="WEBAPP_HOST")
+    webapp_port: int = Field(8080, alias="WEBAPP_PORT")
+
     # Limits & reminders
     max_connection_requests_per_day: int = Field(
         10,
@@ -35,6 +45,209 @@ class Settings(BaseSettings):
         6,
         alias="REMINDERS_INTERVAL_HOURS",
     )
+    reminders_batch_size: int = Field(
+        200,
+        alias="REMINDERS_BATCH_SIZE",
+    )
+    reminders_concurrency: int = Field(
+        20,
+        alias="REMINDERS_CONCURRENCY",
+    )
+
+    # Caches
+    profile_cache_size: int = Field(
+        10_000,
+        alias="PROFILE_CACHE_SIZE",
+    )
+    profile_cache_ttl_seconds: int = Field(
+        300,
+        alias="PROFILE_CACHE_TTL_SECONDS",
+    )
+    card_cache_size: int = Field(
+        5_000,
+        alias="CARD_CACHE_SIZE",
+    )
+    project_feed_cache_ttl_seconds: int = Field(
+        30,
+        alias="PROJECT_FEED_CACHE_TTL_SECONDS",
+    )
+    project_feed_base_size: int = Field(
+        200,
+        alias="PROJECT_FEED_BASE_SIZE",
+    )
+    warmup_pool_connections: int = Field(
+        5,
+        alias="WARMUP_POOL_CONNECTIONS",
+    )
+    warmup_feed_cards: int = Field(
+        20,
+        alias="WARMUP_FEED_CARDS",
+    )
+    warmup_strict_schema: bool = Field(
+        True,
+        alias="WARMUP_STRICT_SCHEMA",
+    )
+    cache_backend: str = Field(
+        "memory",
+        alias="CACHE_BACKEND",
+    )
+    cache_sqlite_path: str = Field(
+        "./cache.db",
+        alias="CACHE_SQLITE_PATH",
+    )
+    redis_url: str | None = Field(
+        None,
+        alias="REDIS_URL",
+    )
+    cache_channel: str = Field(
+        "linkit:cache",
+        alias="CACHE_CHANNEL",
+    )
+    cache_bus_poll_interval: float = Field(
+        0.5,
+        alias="CACHE_BUS_POLL_INTERVAL",
+    )
+    fsm_storage: str = Field(
+        "memory",
+        alias="FSM_STORAGE",
+    )
+    fsm_redis_url: str | None = Field(
+        None,
+        alias="FSM_REDIS_URL",
+    )
+    fsm_state_ttl_seconds: int = Field(
+        7 * 24 * 3600,
+        alias="FSM_STATE_TTL_SECONDS",
+    )
+    fsm_memory_max_bytes: int = Field(
+        64 * 1024 * 1024,
+        alias="FSM_MEMORY_MAX_BYTES",
+    )
+    sender_global_rate: float = Field(
+        25,
+        alias="SENDER_GLOBAL_RATE",
+    )
+    sender_per_chat_rate: float = Field(
+        1,
+        alias="SENDER_PER_CHAT_RATE",
+    )
+    bot_api_pool_size: int = Field(
+        64,
+        alias="BOT_API_POOL_SIZE",
+    )
+    bot_api_keepalive_seconds: float = Field(
+        30,
+        alias="BOT_API_KEEPALIVE_SECONDS",
+    )
+    bot_api_dns_ttl_seconds: int = Field(
+        600,
+        alias="BOT_API_DNS_TTL_SECONDS",
+    )
+    bot_api_timeout_seconds: float = Field(
+        15,
+        alias="BOT_API_TIMEOUT_SECONDS",
+    )
+    bot_api_method_timeouts: str = Field(
+        "answerCallbackQuery=5,deleteMessage=5,editMessageText=10,"
+        "sendMessage=10,sendPhoto=30,editMessageMedia=30",
+        alias="BOT_API_METHOD_TIMEOUTS",
+    )
+    inline_debounce_ms: int = Field(
+        300,
+        alias="INLINE_DEBOUNCE_MS",
+    )
+    inline_deadline_ms: int = Field(
+        2000,
+        alias="INLINE_DEADLINE_MS",
+    )
+    inline_cache_time: int = Field(
+        60,
+        alias="INLINE_CACHE_TIME",
+    )
+    inline_search_cache_size: int = Field(
+        2000,
+        alias="INLINE_SEARCH_CACHE_SIZE",
+    )
+    inline_search_cache_ttl_seconds: float = Field(
+        30,
+        alias="INLINE_SEARCH_CACHE_TTL_SECONDS",
+    )
+    inline_search_max_results: int = Field(
+        100,
+        alias="INLINE_SEARCH_MAX_RESULTS",
+    )
+    search_index_ttl_seconds: float = Field(
+        300,
+        alias="SEARCH_INDEX_TTL_SECONDS",
+    )
+    callback_ack_deadline_ms: int = Field(
+        100,
+        alias="CALLBACK_ACK_DEADLINE_MS",
+    )
+    updates_max_concurrency: int = Field(
+        64,
+        alias="UPDATES_MAX_CONCURRENCY",
+    )
+    fanout_concurrency: int = Field(
+        4,
+        alias="FANOUT_CONCURRENCY",
+    )
+    feed_prefetch_depth: int = Field(
+        2,
+        alias="FEED_PREFETCH_DEPTH",
+    )
+    feed_prefetch_ttl_seconds: float = Field(
+        30,
+        alias="FEED_PREFETCH_TTL_SECONDS",
+    )
+    feed_prefetch_slots: int = Field(
+        10_000,
+        alias="FEED_PREFETCH_SLOTS",
+    )
+    link_opens_flush_seconds: float = Field(
+        30,
+        alias="LINK_OPENS_FLUSH_SECONDS",
+    )
+    broadcast_batch_size: int = Field(
+        100,
+        alias="BROADCAST_BATCH_SIZE",
+    )
+    broadcast_progress_seconds: float = Field(
+        5,
+        alias="BROADCAST_PROGRESS_SECONDS",
+    )
+    broadcast_claim_lease_seconds: float = Field(
+        900,
+        alias="BROADCAST_CLAIM_LEASE_SECONDS",
+    )
+    digest_period: Literal["day", "week"] = Field(
+        "week",
+        alias="DIGEST_PERIOD",
+    )
+    digest_max_projects: int = Field(
+        5,
+        alias="DIGEST_MAX_PROJECTS",
+    )
+    digest_batch_size: int = Field(
+        500,
+        alias="DIGEST_BATCH_SIZE",
+    )
+    digest_concurrency: int = Field(
+        20,
+        alias="DIGEST_CONCURRENCY",
+    )
+    negative_cache_size: int = Field(
+        50_000,
+        alias="NEGATIVE_CACHE_SIZE",
+    )
+    negative_cache_ttl_seconds: float = Field(
+        60,
+        alias="NEGATIVE_CACHE_TTL_SECONDS",
+    )
+    user_request_sets_cache_size: int = Field(
+        20_000,
+        alias="USER_REQUEST_SETS_CACHE_SIZE",
+    )
 
     # Admin / alerts
     admin_chat_id: Optional[int] = Field(
@@ -1,4 +1,8 @@
 # constants.py
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
 
 # Роли в IT
 ROLE_OPTIONS = [
@@ -85,9 +89,11 @@ def build_stack_labels() -> dict[str, str]:
     return labels
 
 
-STACK_LABELS = build_stack_labels()
+# Замороженный словарь: строится один раз при импорте, менять его нельзя
+STACK_LABELS: Mapping[str, str] = MappingProxyType(build_stack_labels())
 
 
+@lru_cache(maxsize=4096)
 def format_stack_value(stack_raw: str | None) -> str:
     """
     Делает стек человеко-читаемым.
@@ -99,6 +105,8 @@ def format_stack_value(stack_raw: str | None) -> str:
     Правила:
       - разделитель групп: ';'
       - разделитель элементов внутри группы: ','
+
+    Результат мемоизирован (значений стека в базе немного, а рендер карточек частый).
     """
     if not stack_raw:
         return "—"
@@ -219,3 +227,84 @@ PROJECT_STATUS_LABELS = {
     "frozen": "🧊 Заморожен",
     "launched": "🚀 Запущен",
 }
+
+
+# ---------------------------------------------------------------------
+# Реестр лейблов (код <-> человеко-читаемое название)
+# ---------------------------------------------------------------------
+# Один общий реестр вместо словарей, которые раньше собирались
+# в каждом модуле views/handlers отдельно.
+
+
+def _build_reverse(labels: Mapping[str, str]) -> Mapping[str, str]:
+    # Лейбл -> код, без учёта регистра. Коды тоже считаем "лейблами самих себя",
+    # чтобы label_to_code работал и для уже нормализованных значений.
+    reverse: dict[str, str] = {}
+    for code, label in labels.items():
+        reverse.setdefault(label.casefold(), code)
+        reverse.setdefault(code.casefold(), code)
+    return MappingProxyType(reverse)
+
+
+@dataclass(frozen=True)
+class LabelRegistry:
+    roles: Mapping[str, str]
+    stacks: Mapping[str, str]
+    goals: Mapping[str, str]
+    project_statuses: Mapping[str, str]
+    _reverse: Mapping[str, Mapping[str, str]]
+
+    @classmethod
+    def build(cls) -> "LabelRegistry":
+        kinds: dict[str, Mapping[str, str]] = {
+            "roles": MappingProxyType({code: label for (label, code) in ROLE_OPTIONS}),
+            "stacks": STACK_LABELS,
+            "goals": MappingProxyType({code: label for (label, code) in GOAL_OPTIONS}),
+            "project_statuses": MappingProxyType(dict(PROJECT_STATUS_LABELS)),
+        }
+        reverse = MappingProxyType(
+            {kind: _build_reverse(labels) for kind, labels in kinds.items()}
+        )
+        return cls(_reverse=reverse, **kinds)
+
+    def label(
+        self,
+        kind: str,
+        code: str | None,
+        default: str | None = None,
+    ) -> str | None:
+        """Код -> лейбл. Неизвестный код возвращаем как есть (или default, если кода нет)."""
+        if not code:
+            return default
+        labels: Mapping[str, str] = getattr(self, kind)
+        return labels.get(code, code)
+
+    def code(self, kind: str, label: str | None) -> str | None:
+        """Лейбл (или код) -> код. Для неизвестных значений — None."""
+        if not label:
+            return None
+        return self._reverse[kind].get(label.strip().casefold())
+
+
+LABELS = LabelRegistry.build()
+
+ROLE_LABELS = LABELS.roles
+GOAL_LABELS = LABELS.goals
+
+
+@lru_cache(maxsize=4096)
+def stack_codes_from_value(stack_raw: str | None) -> frozenset[str]:
+    """
+    Разбирает сохранённый стек (коды или лейблы, через ',' и ';') в множество кодов.
+    Неизвестные токены (свои варианты пользователя) пропускаем.
+    """
+    if not stack_raw:
+        return frozenset()
+
+    codes: set[str] = set()
+    for group in stack_raw.split(";"):
+        for token in group.split(","):
+            code = LABELS.code("stacks", token)
+            if code:
+                codes.add(code)
+    return frozenset(codes)
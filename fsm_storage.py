@@ -0,0 +1,513 @@
+# fsm_storage.py
+"""
+Хранилища FSM (шаги мастеров, позиции в лентах, фильтры).
+
+settings.fsm_storage:
+- "memory" — в памяти процесса (теряется при рестарте), с TTL по последнему
+  обращению и общим лимитом памяти (BoundedMemoryStorage);
+- "sql"    — таблица fsm_state на том же движке SQLAlchemy, что и бот;
+- "redis"  — aiogram RedisStorage (нужен пакет redis).
+
+"sql" и "redis" заворачиваются в BatchingStorage: все записи за апдейт
+копятся в памяти и уходят в хранилище одним заходом после обработки
+(см. FSMBatchMiddleware). Простаивающие записи протухают по
+settings.fsm_state_ttl_seconds.
+"""
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Mapping
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.types import TelegramObject
+from sqlalchemy import case, delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from cache import LRUCache
+from config import settings
+from db import async_session_maker
+from metrics import register_metrics
+from models import FsmState
+
+logger = logging.getLogger(__name__)
+
+# "не менять" — в отличие от None, который означает "сбросить"
+_KEEP: Any = object()
+
+
+def _state_name(state: StateType) -> str | None:
+    return state.state if isinstance(state, State) else state
+
+
+def _key_str(key: StorageKey) -> str:
+    return ":".join(
+        str(part) if part is not None else ""
+        for part in (
+            key.bot_id,
+            key.chat_id,
+            key.user_id,
+            key.thread_id,
+            key.business_connection_id,
+            key.destiny,
+        )
+    )
+
+
+@dataclass(slots=True)
+class _MemoryEntry:
+    state: str | None = None
+    data: dict[str, Any] = field(default_factory=dict)
+    nbytes: int = 0
+    last_access: float = 0.0
+
+
+# грубая оценка накладных расходов на ключ (StorageKey, dict, запись)
+_ENTRY_OVERHEAD_BYTES = 400
+
+
+class BoundedMemoryStorage(BaseStorage):
+    """
+    FSM в памяти процесса, но с ограничениями:
+    - ttl — запись, к которой не обращались дольше ttl секунд, удаляется;
+    - max_bytes — общий (приблизительный) объём; при превышении вытесняем
+      записи, к которым дольше всего не обращались (LRU).
+
+    Для вытесненных ключей с незаконченным шагом мастера помним, какой это
+    был шаг (pop_evicted_state) — чтобы мастер мог начаться заново, а не
+    молча игнорировать ввод.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float | None,
+        max_bytes: int,
+        tombstones: int = 10_000,
+    ) -> None:
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[StorageKey, _MemoryEntry] = OrderedDict()
+        self._bytes = 0
+        # key -> state на момент вытеснения
+        self._evicted: LRUCache[StorageKey, str] = LRUCache(
+            tombstones,
+            ttl=24 * 3600,
+        )
+
+        self.evicted_ttl = 0
+        self.evicted_cap = 0
+        register_metrics("fsm_memory", self.stats)
+
+    @staticmethod
+    def _estimate(entry: _MemoryEntry) -> int:
+        size = _ENTRY_OVERHEAD_BYTES + len(entry.state or "")
+        if entry.data:
+            size += len(json.dumps(entry.data, ensure_ascii=False, default=str))
+        return size
+
+    def _is_expired(self, entry: _MemoryEntry, now: float) -> bool:
+        return self.ttl is not None and now - entry.last_access > self.ttl
+
+    def _evict(self, key: StorageKey, *, reason: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
+        if reason == "ttl":
+            self.evicted_ttl += 1
+        else:
+            self.evicted_cap += 1
+        if entry.state is not None:
+            self._evicted.set(key, entry.state)
+        logger.debug(
+            "fsm_memory_evicted reason=%s user_id=%s state=%s bytes=%s",
+            reason,
+            key.user_id,
+            entry.state,
+            entry.nbytes,
+        )
+
+    def _sweep(self, now: float) -> None:
+        # порядок в _entries — по последнему обращению, самые старые в начале
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if not self._is_expired(entry, now):
+                break
+            self._evict(key, reason="ttl")
+
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            self._evict(key, reason="cap")
+
+    def _touch(self, key: StorageKey) -> _MemoryEntry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if self._is_expired(entry, now):
+            self._evict(key, reason="ttl")
+            return None
+        entry.last_access = now
+        self._entries.move_to_end(key)
+        return entry
+
+    def _write(self, key: StorageKey, *, state: Any = _KEEP, data: Any = _KEEP) -> None:
+        entry = self._touch(key) or _MemoryEntry(last_access=time.monotonic())
+        if state is not _KEEP:
+            entry.state = _state_name(state)
+            # пользователь начал что-то новое — старый вытесненный шаг неактуален
+            self._evicted.invalidate(key)
+        if data is not _KEEP:
+            entry.data = dict(data)
+
+        self._bytes -= entry.nbytes
+        if entry.state is None and not entry.data:
+            self._entries.pop(key, None)
+        else:
+            entry.nbytes = self._estimate(entry)
+            self._bytes += entry.nbytes
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+        self._sweep(time.monotonic())
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        self._write(key, state=state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        entry = self._touch(key)
+        return entry.state if entry else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        self._write(key, data=data)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        entry = self._touch(key)
+        return dict(entry.data) if entry else {}
+
+    def pop_evicted_state(self, key: StorageKey) -> str | None:
+        """Шаг, на котором стоял ключ до вытеснения (и забываем о нём)."""
+        state = self._evicted.peek(key)
+        if state is not None:
+            self._evicted.invalidate(key)
+        return state
+
+    async def close(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "keys": len(self._entries),
+            "approx_bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evicted_ttl": self.evicted_ttl,
+            "evicted_cap": self.evicted_cap,
+            "tombstones": len(self._evicted),
+        }
+
+
+class SQLAlchemyStorage(BaseStorage):
+    """
+    FSM в таблице fsm_state: одна строка на ключ, запись — upsert
+    (PostgreSQL / SQLite).
+    Пустое состояние с пустыми данными строку удаляет, чтобы таблица
+    не копила "отработавших" пользователей.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        *,
+        ttl: float | None = None,
+        cleanup_interval: float = 600,
+    ) -> None:
+        self.session_maker = session_maker
+        self.ttl = ttl
+        self.cleanup_interval = cleanup_interval
+        self._last_cleanup = time.monotonic()
+
+    def _is_expired(self, row: FsmState) -> bool:
+        return (
+            self.ttl is not None
+            and row.updated_at is not None
+            and row.updated_at < datetime.utcnow() - timedelta(seconds=self.ttl)
+        )
+
+    async def _read(self, key: StorageKey) -> tuple[str | None, dict[str, Any]]:
+        async with self.session_maker() as session:
+            row = await session.get(FsmState, _key_str(key))
+        if row is None or self._is_expired(row):
+            return None, {}
+        return row.state, json.loads(row.data) if row.data else {}
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        state, _ = await self._read(key)
+        return state
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        _, data = await self._read(key)
+        return data
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self.write_many({key: (_state_name(state), _KEEP)})
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await self.write_many({key: (_KEEP, dict(data))})
+
+    def _insert(self, dialect: str):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise RuntimeError(f"SQLAlchemyStorage: upsert не поддержан для {dialect}")
+        return insert(FsmState)
+
+    async def write_many(
+        self,
+        items: Mapping[StorageKey, tuple[Any, Any]],
+    ) -> None:
+        """
+        Записать несколько ключей одной транзакцией (INSERT ... ON CONFLICT).
+        items: key -> (state | _KEEP, data | _KEEP)
+        """
+        if not items:
+            return
+
+        now = datetime.utcnow()
+        border = (
+            now - timedelta(seconds=self.ttl) if self.ttl is not None else None
+        )
+        keys: list[str] = []
+
+        async with self.session_maker() as session:
+            dialect = session.bind.dialect.name
+            for key, (state, data) in items.items():
+                key_str = _key_str(key)
+                keys.append(key_str)
+
+                values: dict[str, Any] = {"key": key_str, "updated_at": now}
+                if state is not _KEEP:
+                    values["state"] = state
+                if data is not _KEEP:
+                    values["data"] = (
+                        json.dumps(data, ensure_ascii=False) if data else None
+                    )
+
+                stmt = self._insert(dialect).values(**values)
+                update: dict[str, Any] = {"updated_at": stmt.excluded.updated_at}
+                for column in ("state", "data"):
+                    if column in values:
+                        update[column] = stmt.excluded[column]
+                    elif border is not None:
+                        # непереписанная часть протухшей записи не должна "воскреснуть"
+                        current = getattr(FsmState, column)
+                        update[column] = case(
+                            (FsmState.updated_at < border, None),
+                            else_=current,
+                        )
+                await session.execute(
+                    stmt.on_conflict_do_update(index_elements=["key"], set_=update)
+                )
+
+            # пустое состояние + пустые данные — строка больше не нужна
+            await session.execute(
+                delete(FsmState).where(
+                    FsmState.key.in_(keys),
+                    FsmState.state.is_(None),
+                    FsmState.data.is_(None),
+                )
+            )
+            await session.commit()
+
+        if time.monotonic() - self._last_cleanup > self.cleanup_interval:
+            await self.expire_idle()
+
+    async def expire_idle(self) -> int:
+        """Удаляем записи, к которым не писали дольше ttl."""
+        self._last_cleanup = time.monotonic()
+        if self.ttl is None:
+            return 0
+        border = datetime.utcnow() - timedelta(seconds=self.ttl)
+        async with self.session_maker() as session:
+            result = await session.execute(
+                delete(FsmState).where(FsmState.updated_at < border)
+            )
+            await session.commit()
+        removed = result.rowcount or 0
+        logger.info("fsm_state_expired removed=%s", removed)
+        return removed
+
+    async def close(self) -> None:
+        pass
+
+
+@dataclass
+class _PendingWrite:
+    state: Any = _KEEP
+    data: Any = _KEEP
+
+
+@dataclass
+class _Batch:
+    pending: dict[StorageKey, _PendingWrite] = field(default_factory=dict)
+
+
+_current_batch: contextvars.ContextVar[_Batch | None] = contextvars.ContextVar(
+    "fsm_batch",
+    default=None,
+)
+
+
+class BatchingStorage(BaseStorage):
+    """
+    Обёртка над "удалённым" хранилищем: внутри batch() записи копятся
+    в памяти (чтения видят их сразу), а в хранилище уходят при выходе.
+    Вне batch() — пишем напрямую.
+    """
+
+    def __init__(self, inner: BaseStorage) -> None:
+        self.inner = inner
+        self.flushes = 0
+        self.buffered_writes = 0
+        self.flushed_keys = 0
+        register_metrics("fsm_storage", self.stats)
+
+    def _pending(self, key: StorageKey) -> _PendingWrite | None:
+        batch = _current_batch.get()
+        if batch is None:
+            return None
+        return batch.pending.setdefault(key, _PendingWrite())
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        batch = _current_batch.get()
+        pending = batch.pending.get(key) if batch else None
+        if pending is not None and pending.state is not _KEEP:
+            return pending.state
+        return await self.inner.get_state(key)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        batch = _current_batch.get()
+        pending = batch.pending.get(key) if batch else None
+        if pending is not None and pending.data is not _KEEP:
+            return dict(pending.data)
+        return await self.inner.get_data(key)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        pending = self._pending(key)
+        if pending is None:
+            await self.inner.set_state(key, state)
+            return
+        pending.state = _state_name(state)
+        self.buffered_writes += 1
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        pending = self._pending(key)
+        if pending is None:
+            await self.inner.set_data(key, data)
+            return
+        pending.data = dict(data)
+        self.buffered_writes += 1
+
+    async def _flush(self, batch: _Batch) -> None:
+        items = {
+            key: (write.state, write.data)
+            for key, write in batch.pending.items()
+            if write.state is not _KEEP or write.data is not _KEEP
+        }
+        if not items:
+            return
+
+        write_many = getattr(self.inner, "write_many", None)
+        if write_many is not None:
+            await write_many(items)
+        else:
+            for key, (state, data) in items.items():
+                if state is not _KEEP:
+                    await self.inner.set_state(key, state)
+                if data is not _KEEP:
+                    await self.inner.set_data(key, data)
+
+        self.flushes += 1
+        self.flushed_keys += len(items)
+
+    @asynccontextmanager
+    async def batch(self) -> AsyncIterator[None]:
+        if _current_batch.get() is not None:
+            # вложенный batch — пишем во внешний
+            yield
+            return
+
+        batch = _Batch()
+        token = _current_batch.set(batch)
+        try:
+            yield
+        finally:
+            _current_batch.reset(token)
+            await self._flush(batch)
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": type(self.inner).__name__,
+            "flushes": self.flushes,
+            "buffered_writes": self.buffered_writes,
+            "flushed_keys": self.flushed_keys,
+        }
+
+
+class FSMBatchMiddleware(BaseMiddleware):
+    """Один батч записей FSM на апдейт; сброс в хранилище — после хендлера."""
+
+    def __init__(self, storage: BatchingStorage) -> None:
+        self.storage = storage
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        async with self.storage.batch():
+            return await handler(event, data)
+
+
+def create_fsm_storage() -> BaseStorage:
+    kind = settings.fsm_storage.lower()
+    ttl = settings.fsm_state_ttl_seconds
+
+    if kind == "memory":
+        return BoundedMemoryStorage(
+            ttl=ttl,
+            max_bytes=settings.fsm_memory_max_bytes,
+        )
+
+    if kind == "sql":
+        return BatchingStorage(SQLAlchemyStorage(async_session_maker, ttl=ttl))
+
+    if kind == "redis":
+        url = settings.fsm_redis_url or settings.redis_url
+        if not url:
+            raise RuntimeError("FSM_STORAGE=redis, но не задан FSM_REDIS_URL/REDIS_URL")
+        try:
+            from aiogram.fsm.storage.redis import RedisStorage
+        except ImportError as exc:  # pragma: no cover - опциональная зависимость
+            raise RuntimeError(
+                "FSM_STORAGE=redis требует пакет redis (pip install redis)"
+            ) from exc
+        ttl_delta = timedelta(seconds=ttl) if ttl else None
+        return BatchingStorage(
+            RedisStorage.from_url(url, state_ttl=ttl_delta, data_ttl=ttl_delta)
+        )
+
+    raise RuntimeError(f"Неизвестный FSM_STORAGE={settings.fsm_storage!r}")
@@ -7,6 +7,9 @@ from .connection_requests import router as connection_requests_router
 
 from .devfeed_filters import router as devfeed_filters_router
 from .devfeed import router as devfeed_router
+from .admin import router as admin_router
+from .fsm_recovery import router as fsm_recovery_router
+from .inline import router as inline_router
 
 __all__ = [
     "start_router",
@@ -15,4 +18,7 @@ __all__ = [
     "devfeed_filters_router",
     "devfeed_router",
     "connection_requests_router",
+    "admin_router",
+    "fsm_recovery_router",
+    "inline_router",
 ]
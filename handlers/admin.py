@@ -0,0 +1,141 @@
+# handlers/admin.py
+import html
+import json
+import logging
+
+from aiogram import Bot, Router, F
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+
+from config import settings
+from metrics import collect_metrics
+from services.broadcast import (
+    format_broadcast_progress,
+    get_broadcast,
+    get_latest_broadcast,
+    pause_broadcast,
+    resume_broadcast,
+    start_broadcast,
+)
+
+router = Router()
+logger = logging.getLogger(__name__)
+
+# запас под <pre></pre> до лимита Telegram в 4096 символов
+_CHUNK_SIZE = 3500
+
+
+def _is_admin_chat(message: Message) -> bool:
+    return (
+        settings.admin_chat_id is not None
+        and message.chat is not None
+        and message.chat.id == settings.admin_chat_id
+    )
+
+
+# ===== /metrics =====
+
+
+@router.message(Command("metrics"), F.func(_is_admin_chat))
+async def cmd_metrics(message: Message):
+    """Снимок всех зарегистрированных метрик (кэши, FSM, шина) — только в админ-чате."""
+    snapshot = collect_metrics()
+    logger.info(
+        "cmd_metrics_called user_id=%s providers=%s",
+        message.from_user.id if message.from_user else None,
+        len(snapshot),
+    )
+
+    body = json.dumps(snapshot, ensure_ascii=False, indent=1, sort_keys=True, default=str)
+    for start in range(0, len(body), _CHUNK_SIZE):
+        chunk = body[start : start + _CHUNK_SIZE]
+        await message.answer(f"<pre>{html.escape(chunk)}</pre>")
+
+
+# ===== /broadcast =====
+
+
+def _parse_job_id(command: CommandObject) -> int | None:
+    try:
+        return int((command.args or "").strip())
+    except ValueError:
+        return None
+
+
+@router.message(Command("broadcast"), F.func(_is_admin_chat))
+async def cmd_broadcast(message: Message, command: CommandObject, bot: Bot):
+    """
+    /broadcast <текст> — рассылка всем активным пользователям.
+    Текст — HTML, как и все сообщения бота.
+    """
+    text = (command.args or "").strip()
+    if not text:
+        await message.answer(
+            "Использование: /broadcast <текст сообщения>\n"
+            "Текст уйдёт всем активным пользователям (HTML-разметка работает)."
+        )
+        return
+
+    # предпросмотр заодно проверяет разметку: с битым HTML не упадёт вся рассылка
+    try:
+        await message.answer(text)
+    except TelegramBadRequest as exc:
+        await message.answer(
+            f"Telegram не принял текст, рассылка не запущена:\n{html.escape(str(exc))}"
+        )
+        return
+
+    progress = await message.answer("📣 Рассылка запускается…")
+    job = await start_broadcast(
+        bot,
+        created_by=message.from_user.id,
+        text=text,
+        progress_chat_id=progress.chat.id,
+        progress_message_id=progress.message_id,
+    )
+    logger.info(
+        "cmd_broadcast_called user_id=%s job_id=%s recipients=%s",
+        message.from_user.id,
+        job.id,
+        job.total,
+    )
+    await progress.edit_text(format_broadcast_progress(job))
+
+
+@router.message(Command("broadcast_pause"), F.func(_is_admin_chat))
+async def cmd_broadcast_pause(message: Message, command: CommandObject):
+    job_id = _parse_job_id(command)
+    if job_id is None:
+        await message.answer("Использование: /broadcast_pause <id>")
+        return
+    if await pause_broadcast(job_id):
+        await message.answer(
+            f"Рассылка #{job_id} остановится после текущей пачки.\n"
+            f"Продолжить: /broadcast_resume {job_id}"
+        )
+    else:
+        await message.answer(f"Рассылка #{job_id} не идёт — ставить на паузу нечего.")
+
+
+@router.message(Command("broadcast_resume"), F.func(_is_admin_chat))
+async def cmd_broadcast_resume(message: Message, command: CommandObject, bot: Bot):
+    job_id = _parse_job_id(command)
+    if job_id is None:
+        await message.answer("Использование: /broadcast_resume <id>")
+        return
+    if await resume_broadcast(bot, job_id):
+        await message.answer(f"Рассылка #{job_id} продолжается.")
+    else:
+        await message.answer(f"Рассылка #{job_id} не на паузе.")
+
+
+@router.message(Command("broadcast_status"), F.func(_is_admin_chat))
+async def cmd_broadcast_status(message: Message, command: CommandObject):
+    """/broadcast_status [id] — без id показывает последнюю рассылку."""
+    job_id = _parse_job_id(command)
+    job = await get_broadcast(job_id) if job_id is not None else await get_latest_broadcast()
+    if job is None:
+        await message.answer("Рассылок пока не было." if job_id is None else f"Рассылки #{job_id} нет.")
+        return
+    await message.answer(format_broadcast_progress(job))
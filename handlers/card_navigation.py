@@ -0,0 +1,123 @@
+# handlers/card_navigation.py
+"""
+Листание карточек в лентах "на месте".
+
+Раньше next/prev отправляли новую карточку и удаляли старую — два вызова
+Bot API на клик и мигание у клиента. Теперь редактируем то же сообщение:
+- фото → фото: edit_message_media;
+- текст → текст: edit_message_text;
+- фото ↔ текст (Telegram так не умеет) или сообщение уже нельзя
+  редактировать: отправляем новую карточку и удаляем старую.
+"""
+import logging
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, InputMediaPhoto, Message
+
+from metrics import register_metrics
+from views import RenderedCard
+
+logger = logging.getLogger(__name__)
+
+
+class _NavigationStats:
+    def __init__(self) -> None:
+        self.clicks = 0
+        self.api_calls = 0
+        self.edits = 0
+        self.fallbacks = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "clicks": self.clicks,
+            "api_calls": self.api_calls,
+            "edits": self.edits,
+            "fallbacks": self.fallbacks,
+            "api_calls_per_click": round(self.api_calls / self.clicks, 3)
+            if self.clicks
+            else 0.0,
+        }
+
+
+_stats = _NavigationStats()
+register_metrics("card_navigation", _stats.stats)
+
+
+def _is_not_modified(exc: TelegramBadRequest) -> bool:
+    return "message is not modified" in str(exc).lower()
+
+
+async def _send_card(chat_id: int, card: RenderedCard, bot: Bot) -> None:
+    if card.photo:
+        await bot.send_photo(
+            chat_id=chat_id,
+            photo=card.photo,
+            caption=card.text,
+            reply_markup=card.reply_markup,
+        )
+    else:
+        await bot.send_message(
+            chat_id=chat_id,
+            text=card.text,
+            reply_markup=card.reply_markup,
+        )
+
+
+async def _replace_card(message: Message, card: RenderedCard, bot: Bot, feed: str) -> None:
+    _stats.fallbacks += 1
+    await _send_card(message.chat.id, card, bot)
+    _stats.api_calls += 1
+    try:
+        await message.delete()
+    except Exception:
+        logger.debug("%s_card_delete_old_failed chat_id=%s", feed, message.chat.id, exc_info=True)
+    finally:
+        _stats.api_calls += 1
+
+
+async def show_card_in_place(
+    callback: CallbackQuery,
+    card: RenderedCard,
+    *,
+    bot: Bot,
+    feed: str,
+) -> None:
+    """Показать card вместо карточки, на которой нажали кнопку."""
+    message = callback.message
+    _stats.clicks += 1
+
+    if not isinstance(message, Message):
+        # сообщение недоступно (слишком старое) — просто шлём новое
+        _stats.fallbacks += 1
+        _stats.api_calls += 1
+        await _send_card(callback.from_user.id, card, bot)
+        return
+
+    has_photo = bool(message.photo)
+    if has_photo != bool(card.photo):
+        await _replace_card(message, card, bot, feed)
+        return
+
+    _stats.api_calls += 1
+    try:
+        if card.photo:
+            await message.edit_media(
+                media=InputMediaPhoto(media=card.photo, caption=card.text),
+                reply_markup=card.reply_markup,
+            )
+        else:
+            await message.edit_text(card.text, reply_markup=card.reply_markup)
+        _stats.edits += 1
+    except TelegramBadRequest as exc:
+        if _is_not_modified(exc):
+            _stats.edits += 1
+            return
+        logger.debug(
+            "%s_card_edit_failed chat_id=%s error=%s",
+            feed,
+            message.chat.id,
+            exc,
+        )
+        await _replace_card(message, card, bot, feed)
@@ -9,12 +9,30 @@ from services import (
     get_profile,
     get_project,
     get_connection_request,
+    reject_connection_request,
 )
-from views import format_profile_public, html_safe
+from services.fanout import fan_out
+from services.sender import send_message
+from views import render_profile_card, html_safe
 
 router = Router()
 
 
+def _mark_processed(callback: CallbackQuery, suffix: str):
+    """Корутина-фабрика: убрать кнопки и дописать статус к сообщению с заявкой."""
+    message = callback.message
+    base_text = message.text or message.caption or ""
+    new_text = (base_text + suffix) if base_text else suffix
+
+    async def _edit():
+        if message.text is not None:
+            await message.edit_text(new_text, reply_markup=None)
+        else:
+            await message.edit_caption(caption=new_text, reply_markup=None)
+
+    return _edit
+
+
 @router.callback_query(F.data.startswith("conn_accept:"))
 async def conn_accept_callback(
     callback: CallbackQuery,
@@ -81,46 +99,37 @@ async def conn_accept_callback(
             html_safe(project.title, default="Проект") if project else "Проект"
         )
 
-        # Убираем кнопки + помечаем как принято
-        base_text = callback.message.text or callback.message.caption or ""
-        suffix = "\n\n✅ Заявка принята.\n"
-        new_text = (base_text + suffix) if base_text else suffix
-
-        try:
-            if callback.message.text is not None:
-                await callback.message.edit_text(new_text, reply_markup=None)
-            else:
-                await callback.message.edit_caption(new_text, reply_markup=None)
-        except Exception:
-            pass
-
         # Сообщение владельцу (дубль подтверждения)
-        try:
-            cand_contact = (
-                f"@{from_username}" if from_username else f"id: {req.from_telegram_id}"
-            )
-            owner_text = (
-                f"Ты принял(а) заявку в проект «{project_title}» 🤝\n\n"
-                f"Кандидат: {cand_contact}"
-            )
-            await bot.send_message(chat_id=req.to_telegram_id, text=owner_text)
-        except Exception:
-            pass
+        cand_contact = (
+            f"@{from_username}" if from_username else f"id: {req.from_telegram_id}"
+        )
+        owner_text = (
+            f"Ты принял(а) заявку в проект «{project_title}» 🤝\n\n"
+            f"Кандидат: {cand_contact}"
+        )
 
         # Сообщение кандидату
-        try:
-            contact = (
-                f"@{owner_username}" if owner_username else f"id: {req.to_telegram_id}"
-            )
-            applicant_text = (
-                f"Тебя приняли в проект «{project_title}» 🎉\n\n"
-                f"Можешь писать создателю проекта: {contact}"
-            )
-            await bot.send_message(chat_id=req.from_telegram_id, text=applicant_text)
-        except Exception:
-            pass
-
-        await callback.answer("Заявка принята ✅", show_alert=False)
+        contact = (
+            f"@{owner_username}" if owner_username else f"id: {req.to_telegram_id}"
+        )
+        applicant_text = (
+            f"Тебя приняли в проект «{project_title}» 🎉\n\n"
+            f"Можешь писать создателю проекта: {contact}"
+        )
+
+        await fan_out(
+            "project_request_accepted",
+            {
+                # убираем кнопки + помечаем как принято
+                "request_message": _mark_processed(callback, "\n\n✅ Заявка принята.\n"),
+                "owner": lambda: send_message(bot, req.to_telegram_id, owner_text),
+                "applicant": lambda: send_message(
+                    bot, req.from_telegram_id, applicant_text
+                ),
+            },
+            callback=callback,
+            answer_text="Заявка принята ✅",
+        )
         return
 
     # ====== ОБЫЧНЫЙ КОННЕКТ ======
@@ -138,57 +147,49 @@ async def conn_accept_callback(
 
     to_username = to_profile.username if to_profile else None
 
-    # Убираем кнопки + помечаем как принято
-    base_text = callback.message.text or callback.message.caption or ""
-    suffix = "\n\n✅ Заявка принята.\n"
-    new_text = (base_text + suffix) if base_text else suffix
-
-    try:
-        if callback.message.text is not None:
-            await callback.message.edit_text(new_text, reply_markup=None)
-        else:
-            await callback.message.edit_caption(new_text, reply_markup=None)
-    except Exception:
-        pass
-
     # Сообщение принявшему
-    try:
-        sender_contact = (
-            f"@{from_profile.username}"
-            if (from_profile and from_profile.username)
-            else f"id: {req.from_telegram_id}"
-        )
-        await bot.send_message(
-            chat_id=req.to_telegram_id,
-            text=f"Контакт отправителя: {sender_contact}",
-        )
-    except Exception:
-        pass
+    sender_contact = (
+        f"@{from_profile.username}"
+        if (from_profile and from_profile.username)
+        else f"id: {req.from_telegram_id}"
+    )
 
     # Сообщение отправителю
-    try:
-        header = "Твою заявку приняли 🎉\n\n"
-        public_text = (
-            format_profile_public(to_profile) if to_profile else "Профиль не найден"
-        )
+    header = "Твою заявку приняли 🎉\n\n"
+    public_text = (
+        render_profile_card(to_profile).text
+        if to_profile
+        else "Профиль не найден"
+    )
 
-        if to_username:
-            contact_line = f"Можешь писать: @{to_username}"
-        else:
-            contact_line = (
-                "Пользователь принял заявку, но у него нет публичного @username.\n"
-                f"Его внутренний ID: {req.to_telegram_id}\n"
-                "Если он напишет первым, просто отвечай."
-            )
-
-        notify_text = (
-            f"{header}Тот, кто принял заявку:\n\n{public_text}\n\n{contact_line}"
+    if to_username:
+        contact_line = f"Можешь писать: @{to_username}"
+    else:
+        contact_line = (
+            "Пользователь принял заявку, но у него нет публичного @username.\n"
+            f"Его внутренний ID: {req.to_telegram_id}\n"
+            "Если он напишет первым, просто отвечай."
         )
-        await bot.send_message(chat_id=req.from_telegram_id, text=notify_text)
-    except Exception:
-        pass
 
-    await callback.answer("Заявка принята ✅", show_alert=False)
+    notify_text = (
+        f"{header}Тот, кто принял заявку:\n\n{public_text}\n\n{contact_line}"
+    )
+
+    await fan_out(
+        "connection_request_accepted",
+        {
+            # убираем кнопки + помечаем как принято
+            "request_message": _mark_processed(callback, "\n\n✅ Заявка принята.\n"),
+            "receiver": lambda: send_message(
+                bot,
+                req.to_telegram_id,
+                text=f"Контакт отправителя: {sender_contact}",
+            ),
+            "sender": lambda: send_message(bot, req.from_telegram_id, notify_text),
+        },
+        callback=callback,
+        answer_text="Заявка принята ✅",
+    )
 
 
 @router.callback_query(F.data.startswith("conn_reject:"))
@@ -218,35 +219,23 @@ async def conn_reject_callback(
         await callback.answer("Эта заявка уже обработана", show_alert=True)
         return
 
-    req = await set_connection_request_status(
-        session,
-        request_id=request_id,
-        status="rejected",
-    )
+    req = await reject_connection_request(session, request_id=request_id)
     if not req:
         await callback.answer("Заявка не найдена", show_alert=True)
         return
 
-    # Убираем кнопки + помечаем как отклонено
-    base_text = callback.message.text or callback.message.caption or ""
-    suffix = "\n\n❌ Заявка отклонена.\n"
-    new_text = (base_text + suffix) if base_text else suffix
-
-    try:
-        if callback.message.text is not None:
-            await callback.message.edit_text(new_text, reply_markup=None)
-        else:
-            await callback.message.edit_caption(new_text, reply_markup=None)
-    except Exception:
-        pass
-
-    # Уведомляем отправителя
-    try:
-        await bot.send_message(
-            chat_id=req.from_telegram_id,
-            text="Твою заявку отклонили. Не принимай это близко к сердцу, это просто люди.",
-        )
-    except Exception:
-        pass
-
-    await callback.answer("Отклонено ❌", show_alert=False)
+    await fan_out(
+        "connection_request_rejected",
+        {
+            # убираем кнопки + помечаем как отклонено
+            "request_message": _mark_processed(callback, "\n\n❌ Заявка отклонена.\n"),
+            # уведомляем отправителя
+            "sender": lambda: send_message(
+                bot,
+                req.from_telegram_id,
+                text="Твою заявку отклонили. Не принимай это близко к сердцу, это просто люди.",
+            ),
+        },
+        callback=callback,
+        answer_text="Отклонено ❌",
+    )
@@ -12,7 +12,11 @@ from services import (
     get_profile,
     send_connect_request,
 )
-from views import format_profile_public, html_safe
+from services.fanout import fan_out
+from services.sender import send_message, send_photo
+from views import render_profile_card, html_safe
+from .card_navigation import show_card_in_place
+from .feed_prefetch import schedule_prefetch, take_prefetched
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -40,37 +44,37 @@ async def _send_dev_profile_card(
         2) Откликнуться
         3) Предыдущий / Следующий
     """
-    text = format_profile_public(profile)
+    card = render_profile_card(profile)
 
     logger.info(
         "devfeed_profile_card_sent user_id=%s target_id=%s has_avatar=%s",
         source_message.from_user.id if source_message.from_user else None,
         getattr(profile, "telegram_id", None),
-        bool(getattr(profile, "avatar_file_id", None)),
+        bool(card.photo),
     )
 
-    kb = InlineKeyboardBuilder()
-    kb.button(
-        text="🏆 Награды пользователя",
-        callback_data=f"devfeed_rewards:{profile.telegram_id}",
-    )
-    kb.button(
-        text="🤝 Откликнуться",
-        callback_data=f"devfeed_request:{profile.telegram_id}",
-    )
-    kb.button(text="⬅️ Предыдущий", callback_data="devfeed_prev")
-    kb.button(text="➡️ Следующий", callback_data="devfeed_next")
-    kb.adjust(1, 1, 2)
-
-    if getattr(profile, "avatar_file_id", None):
+    if card.photo:
         await bot.send_photo(
             chat_id=source_message.chat.id,
-            photo=profile.avatar_file_id,
-            caption=text,
-            reply_markup=kb.as_markup(),
+            photo=card.photo,
+            caption=card.text,
+            reply_markup=card.reply_markup,
         )
     else:
-        await source_message.answer(text, reply_markup=kb.as_markup())
+        await source_message.answer(card.text, reply_markup=card.reply_markup)
+
+
+def devfeed_card_loader(requester_id: int):
+    """Загрузчик карточек для feed_prefetch: те же правила, что у ленты."""
+
+    async def _load(session: AsyncSession, target_tg_id: int):
+        profile = await get_profile(session, target_tg_id)
+        # себя лента пропускает — такую карточку заранее не готовим
+        if not profile or profile.telegram_id == requester_id:
+            return None
+        return render_profile_card(profile)
+
+    return _load
 
 
 async def _get_devfeed_profile_at_index(
@@ -147,38 +151,38 @@ async def devfeed_next_callback(
         new_index,
     )
 
-    profile, _ = await _get_devfeed_profile_at_index(
-        state=state,
-        session=session,
-        requester_id=callback.from_user.id,
-        new_index=new_index,
-    )
-
-    if not profile:
-        await callback.answer("Это была последняя карточка", show_alert=False)
-        await callback.message.answer(
-            "Ты посмотрел всех доступных разработчиков в ленте.\n"
-            "Загляни позже — появятся новые."
+    ids: list[int] = data.get("devfeed_profile_ids") or []
+    card = take_prefetched("devfeed", callback.from_user.id, new_index, ids)
+    if card is not None:
+        await state.update_data(devfeed_index=new_index)
+    else:
+        profile, new_index = await _get_devfeed_profile_at_index(
+            state=state,
+            session=session,
+            requester_id=callback.from_user.id,
+            new_index=new_index,
         )
-        return
+
+        if not profile:
+            await callback.answer("Это была последняя карточка", show_alert=False)
+            await callback.message.answer(
+                "Ты посмотрел всех доступных разработчиков в ленте.\n"
+                "Загляни позже — появятся новые."
+            )
+            return
+        card = render_profile_card(profile)
 
     await callback.answer()
 
-    await _send_dev_profile_card(
-        source_message=callback.message,
-        profile=profile,
-        bot=bot,
+    await show_card_in_place(callback, card, bot=bot, feed="devfeed")
+    schedule_prefetch(
+        "devfeed",
+        callback.from_user.id,
+        ids,
+        new_index,
+        devfeed_card_loader(callback.from_user.id),
     )
 
-    try:
-        await callback.message.delete()
-    except Exception:
-        logger.debug(
-            "devfeed_next_message_delete_failed user_id=%s",
-            callback.from_user.id,
-            exc_info=True,
-        )
-
 
 @router.callback_query(F.data == "devfeed_prev")
 async def devfeed_prev_callback(
@@ -203,7 +207,7 @@ async def devfeed_prev_callback(
         await callback.answer("Это первая карточка", show_alert=False)
         return
 
-    profile, _ = await _get_devfeed_profile_at_index(
+    profile, new_index = await _get_devfeed_profile_at_index(
         state=state,
         session=session,
         requester_id=callback.from_user.id,
@@ -216,20 +220,19 @@ async def devfeed_prev_callback(
 
     await callback.answer()
 
-    await _send_dev_profile_card(
-        source_message=callback.message,
-        profile=profile,
+    await show_card_in_place(
+        callback,
+        render_profile_card(profile),
         bot=bot,
+        feed="devfeed",
+    )
+    schedule_prefetch(
+        "devfeed",
+        callback.from_user.id,
+        data.get("devfeed_profile_ids"),
+        new_index,
+        devfeed_card_loader(callback.from_user.id),
     )
-
-    try:
-        await callback.message.delete()
-    except Exception:
-        logger.debug(
-            "devfeed_prev_message_delete_failed user_id=%s",
-            callback.from_user.id,
-            exc_info=True,
-        )
 
 
 # ===== кнопка "🏆 Награды пользователя" =====
@@ -292,7 +295,7 @@ async def _process_connection_request(
 
     # ok
     sender_profile = await get_profile(session, from_id)
-    sender_text = format_profile_public(sender_profile)  # без username
+    sender_text = render_profile_card(sender_profile).text  # без username
 
     kb = InlineKeyboardBuilder()
     kb.button(text="✅ Принять", callback_data=f"conn_accept:{req.id}")
@@ -318,40 +321,41 @@ async def _process_connection_request(
             "Контакты откроются, если ты примешь заявку."
         )
 
-    try:
+    async def _notify_receiver():
         if sender_profile and getattr(sender_profile, "avatar_file_id", None):
-            await bot.send_photo(
-                chat_id=target_tg_id,
+            await send_photo(
+                bot,
+                target_tg_id,
                 photo=sender_profile.avatar_file_id,
                 caption=notify_text,
                 reply_markup=kb.as_markup(),
             )
         else:
-            await bot.send_message(
-                chat_id=target_tg_id,
+            await send_message(
+                bot,
+                target_tg_id,
                 text=notify_text + "\n\n(У отправителя пока нет аватарки в профиле)",
                 reply_markup=kb.as_markup(),
             )
+
+    result = await fan_out(
+        "connection_request_created",
+        {
+            "receiver": _notify_receiver,
+            "sender": lambda: source_message.answer(
+                "Заявка отправлена.\n\n"
+                "Когда пользователь ответит, я пришлю тебе уведомление: "
+                "либо контакты, либо отказ."
+            ),
+        },
+    )
+    if "receiver" in result.sent:
         logger.info(
             "connection_request_notification_sent from_id=%s to_id=%s request_id=%s",
             from_id,
             target_tg_id,
             getattr(req, "id", None),
         )
-    except Exception:
-        logger.debug(
-            "connection_request_notification_failed from_id=%s to_id=%s request_id=%s",
-            from_id,
-            target_tg_id,
-            getattr(req, "id", None),
-            exc_info=True,
-        )
-
-    await source_message.answer(
-        "Заявка отправлена.\n\n"
-        "Когда пользователь ответит, я пришлю тебе уведомление: "
-        "либо контакты, либо отказ."
-    )
 
     logger.info(
         "connection_request_created from_id=%s to_id=%s request_id=%s",
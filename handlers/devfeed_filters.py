@@ -6,9 +6,17 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services import search_profiles_for_user
-from views import format_profile_public
+from views import render_profile_card
+from .devfeed import devfeed_card_loader
+from .feed_prefetch import schedule_prefetch
 from models import Profile
-from constants import ROLE_OPTIONS, STACK_OPTIONS, STACK_LABELS, GOAL_OPTIONS
+from constants import (
+    ROLE_OPTIONS,
+    STACK_OPTIONS,
+    GOAL_OPTIONS,
+    LABELS,
+    stack_codes_from_value,
+)
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -32,57 +40,29 @@ async def send_dev_profile_card(
         2) Откликнуться
         3) Предыдущий / Следующий
     """
-    text = format_profile_public(profile)
+    card = render_profile_card(profile)
 
     logger.info(
         "devfeed_filters_profile_card_sent user_id=%s target_id=%s has_avatar=%s",
         source_message.from_user.id if source_message.from_user else None,
         profile.telegram_id,
-        bool(getattr(profile, "avatar_file_id", None)),
+        bool(card.photo),
     )
 
-    kb = InlineKeyboardBuilder()
-    kb.button(
-        text="🏆 Награды пользователя",
-        callback_data=f"devfeed_rewards:{profile.telegram_id}",
-    )
-    kb.button(
-        text="🤝 Откликнуться",
-        callback_data=f"devfeed_request:{profile.telegram_id}",
-    )
-    kb.button(
-        text="⬅️ Предыдущий",
-        callback_data="devfeed_prev",
-    )
-    kb.button(
-        text="➡️ Следующий",
-        callback_data="devfeed_next",
-    )
-    kb.adjust(1, 1, 2)
-
-    if getattr(profile, "avatar_file_id", None):
+    if card.photo:
         await bot.send_photo(
             chat_id=source_message.chat.id,
-            photo=profile.avatar_file_id,
-            caption=text,
-            reply_markup=kb.as_markup(),
+            photo=card.photo,
+            caption=card.text,
+            reply_markup=card.reply_markup,
         )
     else:
         await source_message.answer(
-            text,
-            reply_markup=kb.as_markup(),
+            card.text,
+            reply_markup=card.reply_markup,
         )
 
 
-def _code_to_label(code: str | None, options: list[tuple[str, str]]) -> str | None:
-    if not code:
-        return None
-    for label, c in options:
-        if c == code:
-            return label
-    return code
-
-
 def build_filters_summary(filters: dict | None) -> str:
     if not filters:
         return "Фильтры: не выбраны — показываю всех подходящих разработчиков."
@@ -94,15 +74,15 @@ def build_filters_summary(filters: dict | None) -> str:
     parts: list[str] = []
 
     if role_code:
-        role_label = _code_to_label(role_code, ROLE_OPTIONS)
+        role_label = LABELS.label("roles", role_code)
         parts.append(f"Роль: {role_label}")
 
     if stack_code:
-        stack_label = STACK_LABELS.get(stack_code, stack_code)
+        stack_label = LABELS.label("stacks", stack_code)
         parts.append(f"Стек: {stack_label}")
 
     if goal_code:
-        goal_label = _code_to_label(goal_code, GOAL_OPTIONS)
+        goal_label = LABELS.label("goals", goal_code)
         parts.append(f"Цель: {goal_label}")
 
     if not parts:
@@ -204,11 +184,10 @@ def _filter_profile_by_stack_and_nonempty(
     ):
         return False
 
-    # фильтр по стеку (строго по коду)
+    # фильтр по стеку: стек профиля (коды или лейблы, в т.ч. составной)
+    # раскладываем в коды через обратный индекс реестра
     if stack_code:
-        if not profile.stack:
-            return False
-        if profile.stack != stack_code:
+        if stack_code not in stack_codes_from_value(profile.stack):
             return False
 
     return True
@@ -568,3 +547,10 @@ async def devf_filter_show(
         profile=profiles[0],
         bot=bot,
     )
+    schedule_prefetch(
+        "devfeed",
+        callback.from_user.id,
+        [p.telegram_id for p in profiles],
+        0,
+        devfeed_card_loader(callback.from_user.id),
+    )
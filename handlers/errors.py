@@ -8,6 +8,7 @@ from aiogram import Dispatcher, Bot
 from aiogram.types import ErrorEvent, Update
 
 from config import settings
+from services.sender import Priority, send_message
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +70,13 @@ def setup_error_handlers(dp: Dispatcher, bot: Bot) -> None:
         text = "\n".join(text_lines)
 
         try:
-            await bot.send_message(chat_id=settings.admin_chat_id, text=text)
+            # через планировщик: поток ошибок не должен упираться в лимиты
+            # Telegram мимо очереди и отнимать их у ответов пользователям
+            await send_message(
+                bot,
+                settings.admin_chat_id,
+                text,
+                priority=Priority.NOTIFICATION,
+            )
         except Exception:
             logger.debug("Failed to send error notification to admin", exc_info=True)
@@ -0,0 +1,169 @@
+# handlers/feed_prefetch.py
+"""
+Упреждающая загрузка следующих карточек ленты.
+
+После показа карточки N фоновая задача (со своей сессией БД) загружает
+и рендерит карточки N+1..N+depth и кладёт их в слот пользователя с
+коротким TTL. Следующий клик "Вперёд" берёт готовую карточку из слота,
+без похода в БД и рендера на критическом пути.
+
+Слот привязан к id сущности: если список в ленте поменялся (новые
+фильтры), карточка не совпадёт по id и будет загружена обычным путём.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import LRUCache
+from config import settings
+from db import async_session_maker
+from metrics import register_metrics
+from views import RenderedCard
+
+logger = logging.getLogger(__name__)
+
+# (session, entity_id) -> карточка или None, если показывать нечего
+CardLoader = Callable[[AsyncSession, int], Awaitable[RenderedCard | None]]
+
+# (feed, user_id) -> {index: (entity_id, card)}
+_slots: LRUCache[tuple[str, int], dict[int, tuple[int, RenderedCard]]] = LRUCache(
+    maxsize=settings.feed_prefetch_slots,
+    ttl=settings.feed_prefetch_ttl_seconds,
+)
+# (feed, user_id) -> идущая фоновая загрузка
+_tasks: dict[tuple[str, int], asyncio.Task] = {}
+
+
+class _PrefetchStats:
+    def __init__(self) -> None:
+        self.scheduled = 0
+        self.loaded = 0
+        self.failed = 0
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+
+    def stats(self) -> dict[str, Any]:
+        feeds = sorted(set(self.hits) | set(self.misses))
+        by_feed = {}
+        for feed in feeds:
+            lookups = self.hits[feed] + self.misses[feed]
+            by_feed[feed] = {
+                "hits": self.hits[feed],
+                "misses": self.misses[feed],
+                "hit_rate": round(self.hits[feed] / lookups, 4) if lookups else 0.0,
+            }
+        return {
+            "scheduled": self.scheduled,
+            "loaded": self.loaded,
+            "failed": self.failed,
+            "inflight": len(_tasks),
+            "slots": len(_slots),
+            "feeds": by_feed,
+        }
+
+
+_stats = _PrefetchStats()
+register_metrics("feed_prefetch", _stats.stats)
+
+
+def take_prefetched(
+    feed: str,
+    user_id: int,
+    index: int,
+    ids: list[int],
+) -> RenderedCard | None:
+    """Готовая карточка для ids[index], если её успели загрузить."""
+    slot = _slots.peek((feed, user_id))
+    entry = slot.get(index) if slot else None
+    if entry is None or index >= len(ids) or entry[0] != ids[index]:
+        _stats.misses[feed] += 1
+        return None
+    _stats.hits[feed] += 1
+    return entry[1]
+
+
+async def _prefetch(
+    feed: str,
+    user_id: int,
+    ids: list[int],
+    indexes: list[int],
+    loader: CardLoader,
+) -> None:
+    cards: dict[int, tuple[int, RenderedCard]] = {}
+    async with async_session_maker() as session:
+        for index in indexes:
+            entity_id = ids[index]
+            card = await loader(session, entity_id)
+            if card is None:
+                # дальше лента пойдёт обычным путём (с пропусками и т.п.)
+                break
+            cards[index] = (entity_id, card)
+
+    _slots.set((feed, user_id), cards)
+    _stats.loaded += len(cards)
+    logger.debug(
+        "feed_prefetch_loaded feed=%s user_id=%s indexes=%s",
+        feed,
+        user_id,
+        list(cards),
+    )
+
+
+def schedule_prefetch(
+    feed: str,
+    user_id: int,
+    ids: list[int] | None,
+    index: int,
+    loader: CardLoader,
+) -> None:
+    """
+    Запустить фоновую загрузку карточек после index.
+    Предыдущая загрузка этого пользователя отменяется — она уже не нужна.
+    """
+    if not ids or settings.feed_prefetch_depth <= 0:
+        return
+
+    indexes = [
+        i
+        for i in range(index + 1, index + 1 + settings.feed_prefetch_depth)
+        if i < len(ids)
+    ]
+    if not indexes:
+        return
+
+    key = (feed, user_id)
+    previous = _tasks.pop(key, None)
+    if previous is not None and not previous.done():
+        previous.cancel()
+
+    # чистый контекст: не тащим в фон identity map и FSM-батч апдейта
+    task = asyncio.get_running_loop().create_task(
+        _prefetch(feed, user_id, list(ids), indexes, loader),
+        name=f"feed_prefetch:{feed}:{user_id}",
+        context=contextvars.Context(),
+    )
+    _tasks[key] = task
+    _stats.scheduled += 1
+
+    def _done(t: asyncio.Task) -> None:
+        if _tasks.get(key) is t:
+            del _tasks[key]
+        if t.cancelled():
+            return
+        exc = t.exception()
+        if exc is not None:
+            _stats.failed += 1
+            logger.warning(
+                "feed_prefetch_failed feed=%s user_id=%s error=%r",
+                feed,
+                user_id,
+                exc,
+            )
+
+    task.add_done_callback(_done)
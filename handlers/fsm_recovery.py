@@ -0,0 +1,85 @@
+# handlers/fsm_recovery.py
+"""
+Восстановление после вытеснения состояния FSM.
+
+BoundedMemoryStorage может выкинуть брошенный (или просто очень долгий)
+черновик мастера. Тогда следующий ввод пользователя не попадает ни в один
+хендлер шага. Этот роутер подключается последним и, если у ключа был
+вытесненный шаг мастера профиля или проекта, начинает мастер заново.
+"""
+import logging
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.filters import StateFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services import get_profile
+from .profile import RegistrationStates, start_profile_edit, start_profile_registration
+from .projects import start_project_registration
+from .projects.create import ProjectStates
+
+router = Router()
+logger = logging.getLogger(__name__)
+
+_RESTART_TEXT = "Черновик долго не трогали, и он устарел. Начнём заново 🙂"
+
+
+def _pop_evicted_state(state: FSMContext) -> str | None:
+    pop = getattr(state.storage, "pop_evicted_state", None)
+    return pop(state.key) if pop is not None else None
+
+
+async def _restart_wizard(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+    evicted: str,
+) -> bool:
+    group = evicted.split(":", 1)[0]
+
+    if group == RegistrationStates.__full_group_name__:
+        # тот же мастер и для первой регистрации, и для редактирования:
+        # у заполненного профиля перезапускаем редактирование (с отменой)
+        profile = await get_profile(session, state.key.user_id)
+        await message.answer(_RESTART_TEXT)
+        if profile is not None and profile.role is not None:
+            await start_profile_edit(message, state)
+        else:
+            await start_profile_registration(message, state)
+    elif group == ProjectStates.__full_group_name__:
+        await message.answer(_RESTART_TEXT)
+        await start_project_registration(message, state)
+    else:
+        return False
+
+    logger.info(
+        "fsm_wizard_restarted_after_eviction user_id=%s evicted_state=%s",
+        state.key.user_id,
+        evicted,
+    )
+    return True
+
+
+@router.message(StateFilter(None))
+async def evicted_state_message(message: Message, state: FSMContext, session: AsyncSession):
+    evicted = _pop_evicted_state(state)
+    if evicted is None or not await _restart_wizard(message, state, session, evicted):
+        raise SkipHandler()
+
+
+@router.callback_query(StateFilter(None))
+async def evicted_state_callback(
+    callback: CallbackQuery,
+    state: FSMContext,
+    session: AsyncSession,
+):
+    evicted = _pop_evicted_state(state)
+    if evicted is None or callback.message is None:
+        raise SkipHandler()
+
+    if not await _restart_wizard(callback.message, state, session, evicted):
+        raise SkipHandler()
+    await callback.answer()
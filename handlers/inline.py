@@ -0,0 +1,196 @@
+# handlers/inline.py
+"""
+Inline-режим: @бот python backend -> карточки проектов и разработчиков.
+
+- Выдача из services.search (индекс + кэш по нормализованному запросу),
+  Telegram тоже кэширует ответ на settings.inline_cache_time секунд.
+- Дебаунс: пока пользователь печатает, на каждую букву приходит новый
+  inline_query. Промах по кэшу ждём INLINE_DEBOUNCE_MS и, если за это
+  время пришёл более свежий запрос того же пользователя, не отвечаем —
+  клиент Telegram всё равно покажет ответ на последний.
+- Пагинация через offset / next_offset.
+- Дедлайн: если не успели собрать выдачу за INLINE_DEADLINE_MS,
+  отвечаем пустым списком без кэша, чтобы Telegram не показал ошибку.
+
+Inline-режим нужно включить у @BotFather (/setinline).
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any
+
+from aiogram import Bot, Router
+from aiogram.types import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQuery,
+    InlineQueryResultArticle,
+    InlineQueryResultCachedPhoto,
+    InputTextMessageContent,
+)
+
+from config import settings
+from metrics import percentile_ms, register_metrics
+from services.deep_links import project_deep_link
+from services.search import SearchDoc, search_service
+
+router = Router()
+logger = logging.getLogger(__name__)
+
+# Telegram: не больше 50 результатов в одном ответе
+_PAGE_SIZE = 20
+# подпись к фото — не длиннее 1024 символов, иначе шлём статьёй
+_CAPTION_LIMIT = 1024
+
+# user_id -> id последнего inline_query (для дебаунса)
+_latest_query: dict[int, str] = {}
+
+
+class _InlineStats:
+    def __init__(self) -> None:
+        self.queries = 0
+        self.answered = 0
+        self.debounced = 0
+        self.deadline_exceeded = 0
+        self._latencies: deque[float] = deque(maxlen=1000)
+
+    def record_answer(self, latency: float) -> None:
+        self.answered += 1
+        self._latencies.append(latency)
+
+    def stats(self) -> dict[str, Any]:
+        latencies = sorted(self._latencies)
+        return {
+            "queries": self.queries,
+            "answered": self.answered,
+            "debounced": self.debounced,
+            "deadline_exceeded": self.deadline_exceeded,
+            "answer_p50_ms": percentile_ms(latencies, 0.5),
+            "answer_p95_ms": percentile_ms(latencies, 0.95),
+        }
+
+
+_stats = _InlineStats()
+register_metrics("inline_search", _stats.stats)
+
+
+def _open_bot_markup(
+    doc: SearchDoc, bot_username: str | None
+) -> InlineKeyboardMarkup | None:
+    if not bot_username:
+        return None
+    # проект открываем сразу карточкой (start=p_<id>), профиль — просто бот
+    if doc.kind == "project":
+        url = project_deep_link(bot_username, doc.entity_id)
+    else:
+        url = f"https://t.me/{bot_username}"
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text="Открыть в Link IT", url=url)]]
+    )
+
+
+def _build_result(doc: SearchDoc, bot_username: str | None):
+    result_id = f"{doc.kind}:{doc.entity_id}"
+    markup = _open_bot_markup(doc, bot_username)
+    if doc.photo and len(doc.text) <= _CAPTION_LIMIT:
+        return InlineQueryResultCachedPhoto(
+            id=result_id,
+            photo_file_id=doc.photo,
+            title=doc.title,
+            description=doc.description,
+            caption=doc.text,
+            parse_mode="HTML",
+            reply_markup=markup,
+        )
+    return InlineQueryResultArticle(
+        id=result_id,
+        title=doc.title,
+        description=doc.description,
+        input_message_content=InputTextMessageContent(
+            message_text=doc.text,
+            parse_mode="HTML",
+        ),
+        reply_markup=markup,
+    )
+
+
+def _parse_offset(raw: str) -> int:
+    try:
+        return max(int(raw), 0)
+    except ValueError:
+        return 0
+
+
+async def _collect(inline_query: InlineQuery, bot: Bot):
+    """(results, next_offset) или None, если запрос устарел (дебаунс)."""
+    offset = _parse_offset(inline_query.offset)
+    keys = search_service.cached(inline_query.query)
+
+    if keys is None and offset == 0:
+        # промах и первая страница — пользователь, скорее всего, ещё печатает
+        await asyncio.sleep(settings.inline_debounce_ms / 1000)
+        if _latest_query.get(inline_query.from_user.id) != inline_query.id:
+            return None
+
+    if keys is None:
+        keys = await search_service.search(inline_query.query)
+
+    me = await bot.me()
+
+    page = keys[offset : offset + _PAGE_SIZE]
+    results = []
+    for key in page:
+        doc = search_service.get_doc(key)
+        if doc is not None:
+            results.append(_build_result(doc, me.username))
+
+    next_offset = str(offset + _PAGE_SIZE) if offset + _PAGE_SIZE < len(keys) else ""
+    return results, next_offset
+
+
+@router.inline_query()
+async def inline_search(inline_query: InlineQuery, bot: Bot):
+    started = time.monotonic()
+    user_id = inline_query.from_user.id
+    _latest_query[user_id] = inline_query.id
+    _stats.queries += 1
+
+    try:
+        collected = await asyncio.wait_for(
+            _collect(inline_query, bot),
+            timeout=settings.inline_deadline_ms / 1000,
+        )
+    except asyncio.TimeoutError:
+        _stats.deadline_exceeded += 1
+        logger.warning(
+            "inline_search_deadline_exceeded user_id=%s query=%r",
+            user_id,
+            inline_query.query,
+        )
+        await inline_query.answer([], cache_time=0, is_personal=True)
+        return
+    finally:
+        if _latest_query.get(user_id) == inline_query.id:
+            del _latest_query[user_id]
+
+    if collected is None:
+        _stats.debounced += 1
+        return
+
+    results, next_offset = collected
+    await inline_query.answer(
+        results,
+        cache_time=settings.inline_cache_time,
+        is_personal=False,
+        next_offset=next_offset,
+    )
+    _stats.record_answer(time.monotonic() - started)
+
+    logger.info(
+        "inline_search_answered user_id=%s query=%r offset=%r results=%s",
+        user_id,
+        inline_query.query,
+        inline_query.offset,
+        len(results),
+    )
@@ -116,6 +116,11 @@ async def start_profile_registration(message: Message, state: FSMContext):
     await _start_profile_flow(message, state, allow_cancel=False)
 
 
+# Редактирование уже заполненного профиля (с кнопкой отмены)
+async def start_profile_edit(message: Message, state: FSMContext):
+    await _start_profile_flow(message, state, allow_cancel=True)
+
+
 # Это /edit_profile и кнопка ✏️ Редактировать в профиле
 @router.message(Command("edit_profile"))
 async def cmd_edit_profile(message: Message, state: FSMContext):
@@ -15,6 +15,7 @@ from constants import (
     STACK_LABELS,
     PROJECT_STATUS_OPTIONS,
     PROJECT_STATUS_LABELS,
+    LABELS,
 )
 from views import format_project_card, format_profile_public, html_safe
 from services import (
@@ -28,13 +29,9 @@ from services import (
 router = Router()
 logger = logging.getLogger(__name__)
 
-# Вспомогательные мапы код -> лейбл
-STACK_CODE_TO_LABEL: dict[str, str] = {}
-for group in STACK_OPTIONS.values():
-    for label, code in group:
-        STACK_CODE_TO_LABEL[code] = label
-
-ROLE_CODE_TO_LABEL: dict[str, str] = {code: label for (label, code) in ROLE_OPTIONS}
+# Вспомогательные мапы код -> лейбл (общий замороженный реестр)
+STACK_CODE_TO_LABEL = LABELS.stacks
+ROLE_CODE_TO_LABEL = LABELS.roles
 
 
 class ProjectStates(StatesGroup):
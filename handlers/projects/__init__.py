@@ -3,7 +3,11 @@
 from aiogram import Router
 
 from .create import router as create_router, start_project_registration
-from .feed import router as feed_router
+from .feed import (
+    router as feed_router,
+    seed_projects_feed_at,
+    show_project_from_link,
+)
 from .apply import router as apply_router
 
 
@@ -15,4 +19,6 @@ projects_router.include_router(apply_router)
 __all__ = [
     "projects_router",
     "start_project_registration",
+    "show_project_from_link",
+    "seed_projects_feed_at",
 ]
@@ -9,7 +9,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
 from services import get_profile, get_project, send_project_request
-from views import format_project_card, format_profile_public, html_safe
+from services.fanout import fan_out
+from services.sender import send_message, send_photo
+from views import render_project_card, render_profile_card, html_safe
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -63,10 +65,10 @@ async def _process_project_connection_request(
         return
 
     project = await get_project(session, project_id)
-    project_text = format_project_card(project) if project else "Проект не найден"
+    project_text = render_project_card(project).text if project else "Проект не найден"
 
     sender_profile = await get_profile(session, from_id)
-    sender_text = format_profile_public(sender_profile)
+    sender_text = render_profile_card(sender_profile).text
 
     kb = InlineKeyboardBuilder()
     kb.button(text="✅ Принять", callback_data=f"conn_accept:{req.id}")
@@ -85,21 +87,34 @@ async def _process_project_connection_request(
     if greeting:
         notify_text += f"\nСообщение от кандидата:\n{html_safe(greeting)}\n"
 
-    try:
+    async def _notify_owner():
         if sender_profile and getattr(sender_profile, "avatar_file_id", None):
-            await bot.send_photo(
-                chat_id=project_owner_id,
+            await send_photo(
+                bot,
+                project_owner_id,
                 photo=sender_profile.avatar_file_id,
                 caption=notify_text,
                 reply_markup=kb.as_markup(),
             )
         else:
-            await bot.send_message(
-                chat_id=project_owner_id,
+            await send_message(
+                bot,
+                project_owner_id,
                 text=notify_text + "\n\n(У кандидата пока нет аватарки в профиле)",
                 reply_markup=kb.as_markup(),
             )
 
+    result = await fan_out(
+        "project_request_created",
+        {
+            "owner": _notify_owner,
+            "applicant": lambda: source_message.answer(
+                "Заявка в проект отправлена.\n\n"
+                "Когда владелец проекта ответит, я пришлю тебе уведомление."
+            ),
+        },
+    )
+    if "owner" in result.sent:
         logger.info(
             "project_request_notification_sent from_id=%s owner_id=%s req_id=%s project_id=%s",
             from_id,
@@ -107,20 +122,6 @@ async def _process_project_connection_request(
             getattr(req, "id", None),
             project_id,
         )
-    except Exception:
-        logger.debug(
-            "project_request_notification_failed from_id=%s owner_id=%s req_id=%s project_id=%s",
-            from_id,
-            project_owner_id,
-            getattr(req, "id", None),
-            project_id,
-            exc_info=True,
-        )
-
-    await source_message.answer(
-        "Заявка в проект отправлена.\n\n"
-        "Когда владелец проекта ответит, я пришлю тебе уведомление."
-    )
 
 
 @router.callback_query(F.data.startswith("project_apply:"))
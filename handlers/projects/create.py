@@ -3,7 +3,7 @@
 from types import SimpleNamespace
 import logging
 
-from aiogram import Router, F
+from aiogram import Bot, Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import Message, CallbackQuery
@@ -15,20 +15,18 @@ from constants import (
     ROLE_OPTIONS,
     PROJECT_STATUS_OPTIONS,
     PROJECT_STATUS_LABELS,
+    LABELS,
 )
 from views import format_project_card, html_safe
 from services import create_user_project
+from services.deep_links import project_deep_link
 
 router = Router()
 logger = logging.getLogger(__name__)
 
-# Вспомогательные мапы код -> лейбл
-STACK_CODE_TO_LABEL: dict[str, str] = {}
-for group in STACK_OPTIONS.values():
-    for label, code in group:
-        STACK_CODE_TO_LABEL[code] = label
-
-ROLE_CODE_TO_LABEL: dict[str, str] = {code: label for (label, code) in ROLE_OPTIONS}
+# Вспомогательные мапы код -> лейбл (общий замороженный реестр)
+STACK_CODE_TO_LABEL = LABELS.stacks
+ROLE_CODE_TO_LABEL = LABELS.roles
 
 
 class ProjectStates(StatesGroup):
@@ -796,6 +794,7 @@ async def project_confirm_publish(
     callback: CallbackQuery,
     state: FSMContext,
     session: AsyncSession,
+    bot: Bot,
 ):
     data = await state.get_data()
     await state.clear()
@@ -845,6 +844,12 @@ async def project_confirm_publish(
         "Его смогут увидеть другие пользователи в разделе «🚀 Лента проектов».\n\n"
         f"{format_project_card(project)}"
     )
+    me = await bot.me()
+    if me.username:
+        final_text += (
+            "\n\nСсылка, чтобы поделиться проектом:\n"
+            f"{project_deep_link(me.username, project.id)}"
+        )
 
     await callback.message.answer(final_text)
 
@@ -9,21 +9,16 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from constants import ROLE_OPTIONS, STACK_OPTIONS
-from views import format_project_card
-from services import get_projects_feed, get_project
+from constants import ROLE_OPTIONS, STACK_OPTIONS, LABELS
+from views import get_cached_card, render_project_card
+from services import get_projects_feed_ids, get_project
+from services.deep_links import note_project_link_open
+from ..card_navigation import show_card_in_place
+from ..feed_prefetch import schedule_prefetch, take_prefetched
 
 router = Router()
 logger = logging.getLogger(__name__)
 
-# Мапы код -> лейбл
-ROLE_CODE_TO_LABEL = {code: label for (label, code) in ROLE_OPTIONS}
-
-STACK_CODE_TO_LABEL: dict[str, str] = {}
-for group in STACK_OPTIONS.values():
-    for label, code in group:
-        STACK_CODE_TO_LABEL[code] = label
-
 
 class ProjectsFeedFilterStates(StatesGroup):
     choosing_filters = State()
@@ -41,24 +36,9 @@ async def _send_project_card(
     project,
     bot: Bot,
 ):
-    text = format_project_card(project)
+    card = render_project_card(project)
 
-    kb = InlineKeyboardBuilder()
-    kb.button(
-        text="🤝 Откликнуться на проект",
-        callback_data=f"proj_apply:{project.id}",
-    )
-    kb.button(
-        text="⬅️ Предыдущий",
-        callback_data="proj_prev",
-    )
-    kb.button(
-        text="➡️ Следующий",
-        callback_data="proj_next",
-    )
-    kb.adjust(1, 2)
-
-    has_photo = bool(getattr(project, "image_file_id", None))
+    has_photo = bool(card.photo)
     logger.info(
         "projects_feed_send_card project_id=%s owner_id=%s has_photo=%s chat_id=%s",
         project.id,
@@ -70,17 +50,30 @@ async def _send_project_card(
     if has_photo:
         await bot.send_photo(
             chat_id=source_message.chat.id,
-            photo=project.image_file_id,
-            caption=text,
-            reply_markup=kb.as_markup(),
+            photo=card.photo,
+            caption=card.text,
+            reply_markup=card.reply_markup,
         )
     else:
         await source_message.answer(
-            text,
-            reply_markup=kb.as_markup(),
+            card.text,
+            reply_markup=card.reply_markup,
         )
 
 
+def _projfeed_card_loader(requester_id: int):
+    """Загрузчик карточек для feed_prefetch: те же правила, что у ленты."""
+
+    async def _load(session: AsyncSession, project_id: int):
+        project = await get_project(session, project_id)
+        # свои проекты лента пропускает — такую карточку заранее не готовим
+        if not project or project.owner_telegram_id == requester_id:
+            return None
+        return render_project_card(project)
+
+    return _load
+
+
 async def _get_projfeed_project_at_index(
     *,
     state: FSMContext,
@@ -156,7 +149,7 @@ def _format_filters_summary(data: dict) -> str:
     parts: list[str] = []
 
     if role_code:
-        parts.append(ROLE_CODE_TO_LABEL.get(role_code, role_code))
+        parts.append(LABELS.label("roles", role_code))
     if stack_label:
         parts.append(stack_label)
     if level_label:
@@ -313,7 +306,7 @@ async def proj_filt_stack_choose(callback: CallbackQuery, state: FSMContext):
             callback.from_user.id,
         )
     else:
-        label = STACK_CODE_TO_LABEL.get(code, code)
+        label = LABELS.label("stacks", code)
         await state.update_data(proj_filter_stack_label=label)
         logger.info(
             "projects_feed_filter_stack_set user_id=%s stack_code=%s label=%s",
@@ -449,7 +442,7 @@ async def proj_filt_show(
     # Переводим код роли в человекочитаемый лейбл
     role_label: str | None = None
     if role_code:
-        role_label = ROLE_CODE_TO_LABEL.get(role_code, role_code)
+        role_label = LABELS.label("roles", role_code)
 
     # Для уровня, если выбрано "Любой", то вообще не фильтруем
     level_filter = level_label if level_label and level_label != "Любой" else None
@@ -462,7 +455,7 @@ async def proj_filt_show(
         level_filter,
     )
 
-    projects = await get_projects_feed(
+    project_ids = await get_projects_feed_ids(
         session,
         limit=50,
         requester_id=callback.from_user.id,
@@ -470,8 +463,9 @@ async def proj_filt_show(
         stack=stack_label,
         level=level_filter,
     )
+    first_project = await get_project(session, project_ids[0]) if project_ids else None
 
-    if not projects:
+    if not first_project:
         logger.info(
             "projects_feed_show_no_results user_id=%s",
             callback.from_user.id,
@@ -484,14 +478,14 @@ async def proj_filt_show(
         return
 
     await state.update_data(
-        projfeed_ids=[p.id for p in projects],
+        projfeed_ids=project_ids,
         projfeed_index=0,
     )
 
     logger.info(
         "projects_feed_show_results user_id=%s count=%s",
         callback.from_user.id,
-        len(projects),
+        len(project_ids),
     )
 
     await callback.answer()
@@ -506,9 +500,16 @@ async def proj_filt_show(
 
     await _send_project_card(
         source_message=callback.message,
-        project=projects[0],
+        project=first_project,
         bot=bot,
     )
+    schedule_prefetch(
+        "projects_feed",
+        callback.from_user.id,
+        project_ids,
+        0,
+        _projfeed_card_loader(callback.from_user.id),
+    )
 
 
 # ===== ЛЕНТА: NEXT / PREV =====
@@ -535,42 +536,42 @@ async def proj_next_callback(
         new_index,
     )
 
-    project, _ = await _get_projfeed_project_at_index(
-        state=state,
-        session=session,
-        requester_id=callback.from_user.id,
-        new_index=new_index,
-    )
-
-    if not project:
-        logger.info(
-            "projects_feed_next_end user_id=%s from_index=%s",
-            callback.from_user.id,
-            index,
-        )
-        await callback.answer("Это был последний проект", show_alert=False)
-        await callback.message.answer(
-            "Ты посмотрел все проекты в ленте.\nЗагляни позже — появятся новые."
+    ids: list[int] = data.get("projfeed_ids") or []
+    card = take_prefetched("projects_feed", callback.from_user.id, new_index, ids)
+    if card is not None:
+        await state.update_data(projfeed_index=new_index)
+    else:
+        project, new_index = await _get_projfeed_project_at_index(
+            state=state,
+            session=session,
+            requester_id=callback.from_user.id,
+            new_index=new_index,
         )
-        return
+
+        if not project:
+            logger.info(
+                "projects_feed_next_end user_id=%s from_index=%s",
+                callback.from_user.id,
+                index,
+            )
+            await callback.answer("Это был последний проект", show_alert=False)
+            await callback.message.answer(
+                "Ты посмотрел все проекты в ленте.\nЗагляни позже — появятся новые."
+            )
+            return
+        card = render_project_card(project)
 
     await callback.answer()
 
-    await _send_project_card(
-        source_message=callback.message,
-        project=project,
-        bot=bot,
+    await show_card_in_place(callback, card, bot=bot, feed="projects_feed")
+    schedule_prefetch(
+        "projects_feed",
+        callback.from_user.id,
+        ids,
+        new_index,
+        _projfeed_card_loader(callback.from_user.id),
     )
 
-    try:
-        await callback.message.delete()
-    except Exception:
-        logger.debug(
-            "projects_feed_next_delete_old_failed user_id=%s",
-            callback.from_user.id,
-            exc_info=True,
-        )
-
 
 @router.callback_query(F.data == "proj_prev")
 async def proj_prev_callback(
@@ -597,7 +598,7 @@ async def proj_prev_callback(
         await callback.answer("Это первый проект", show_alert=False)
         return
 
-    project, _ = await _get_projfeed_project_at_index(
+    project, new_index = await _get_projfeed_project_at_index(
         state=state,
         session=session,
         requester_id=callback.from_user.id,
@@ -610,17 +611,94 @@ async def proj_prev_callback(
 
     await callback.answer()
 
-    await _send_project_card(
-        source_message=callback.message,
-        project=project,
+    await show_card_in_place(
+        callback,
+        render_project_card(project),
         bot=bot,
+        feed="projects_feed",
+    )
+    schedule_prefetch(
+        "projects_feed",
+        callback.from_user.id,
+        data.get("projfeed_ids"),
+        new_index,
+        _projfeed_card_loader(callback.from_user.id),
     )
 
-    try:
-        await callback.message.delete()
-    except Exception:
-        logger.debug(
-            "projects_feed_prev_delete_old_failed user_id=%s",
-            callback.from_user.id,
-            exc_info=True,
+
+# ===== ССЫЛКА НА ПРОЕКТ (t.me/<бот>?start=p_<id>) =====
+
+
+async def show_project_from_link(
+    message: Message,
+    *,
+    session: AsyncSession,
+    bot: Bot,
+    project_id: int,
+) -> bool:
+    """
+    Карточка проекта по ссылке. Сначала ищем уже отрендеренную карточку
+    в кэше (без БД), при промахе — обычная загрузка проекта.
+    False — проекта нет (удалён или ссылка битая).
+    """
+    card = get_cached_card("project", project_id)
+    from_cache = card is not None
+    if card is None:
+        project = await get_project(session, project_id)
+        if not project or not project.is_active:
+            logger.info(
+                "project_link_not_found user_id=%s project_id=%s",
+                message.from_user.id,
+                project_id,
+            )
+            await message.answer(
+                "Проект по этой ссылке не найден — возможно, его уже закрыли."
+            )
+            return False
+        card = render_project_card(project)
+
+    if card.photo:
+        await bot.send_photo(
+            chat_id=message.chat.id,
+            photo=card.photo,
+            caption=card.text,
+            reply_markup=card.reply_markup,
         )
+    else:
+        await message.answer(card.text, reply_markup=card.reply_markup)
+
+    note_project_link_open(project_id)
+    logger.info(
+        "project_link_opened user_id=%s project_id=%s from_cache=%s",
+        message.from_user.id,
+        project_id,
+        from_cache,
+    )
+    return True
+
+
+async def seed_projects_feed_at(
+    *,
+    state: FSMContext,
+    session: AsyncSession,
+    user_id: int,
+    project_id: int,
+) -> None:
+    """
+    Лента проектов, начинающаяся с project_id: "➡️ Следующий" под карточкой
+    из ссылки сразу листает дальше по обычной ленте (без фильтров).
+    """
+    feed_ids = await get_projects_feed_ids(
+        session,
+        limit=50,
+        requester_id=user_id,
+    )
+    ids = [project_id] + [i for i in feed_ids if i != project_id]
+    await state.update_data(projfeed_ids=ids, projfeed_index=0)
+    schedule_prefetch(
+        "projects_feed",
+        user_id,
+        ids,
+        0,
+        _projfeed_card_loader(user_id),
+    )
@@ -3,18 +3,23 @@
 import logging
 
 from aiogram import Router, F, Bot
-from aiogram.filters import CommandStart, Command
+from aiogram.filters import CommandObject, CommandStart, Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
 from aiogram.utils.keyboard import ReplyKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services import ensure_profile, get_profile
+from services.deep_links import parse_project_payload
 from .profile import (
     cmd_profile,
     start_profile_registration,
 )  # <-- используем регистрацию БЕЗ отмены
-from .projects import start_project_registration  # запуск мастера проекта
+from .projects import (
+    seed_projects_feed_at,
+    show_project_from_link,
+    start_project_registration,  # запуск мастера проекта
+)
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -38,20 +43,47 @@ async def cmd_start(
     message: Message,
     state: FSMContext,
     session: AsyncSession,
+    bot: Bot,
+    command: CommandObject,
 ):
     user = message.from_user
     user_id = user.id if user else None
     username = user.username if user else None
 
     logger.info(
-        "cmd_start_called user_id=%s username=%s",
+        "cmd_start_called user_id=%s username=%s args=%r",
         user_id,
         username,
+        command.args,
     )
 
+    # Ссылка на проект: карточка — первым ответом, ещё до проверки профиля
+    project_id = parse_project_payload(command.args)
+    if project_id is not None:
+        found = await show_project_from_link(
+            message,
+            session=session,
+            bot=bot,
+            project_id=project_id,
+        )
+    else:
+        found = False
+
     profile = await get_profile(session, message.from_user.id)
     is_registered = profile is not None and profile.role is not None
 
+    if is_registered and found:
+        # Зарегистрированному не показываем приветствие: карточка уже
+        # на экране, "➡️ Следующий" под ней листает ленту дальше
+        await state.clear()
+        await seed_projects_feed_at(
+            state=state,
+            session=session,
+            user_id=message.from_user.id,
+            project_id=project_id,
+        )
+        return
+
     if is_registered:
         kb = build_main_menu_keyboard()
 
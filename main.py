@@ -16,13 +16,29 @@ from handlers import (
     connection_requests_router,
     devfeed_filters_router,
     devfeed_router,
+    admin_router,
+    fsm_recovery_router,
+    inline_router,
 )
 
 from handlers.errors import setup_error_handlers
 from logging_config import setup_logging
 from middlewares.db import DbSessionMiddleware
+from middlewares.identity_map import IdentityMapMiddleware
+from middlewares.fsm_buffer import FSMBufferMiddleware
 from middlewares.logging_context import LoggingContextMiddleware
+from middlewares.scheduling import UpdateIsolation, UpdateSchedulingMiddleware
+from middlewares.callback_ack import CallbackFastAckMiddleware
+from services.broadcast import resume_broadcasts, stop_broadcasts
+from services.deep_links import link_opens_worker
+from services.digest import digest_worker
 from services.reminders import reminders_worker
+from services.sender import scheduler as send_scheduler
+from shared_cache import setup_shared_cache, shutdown_shared_cache
+from warmup import warmup
+from webhook import run_webhook
+from bot_session import create_bot_session
+from fsm_storage import BatchingStorage, FSMBatchMiddleware, create_fsm_storage
 
 
 async def main() -> None:
@@ -39,18 +55,64 @@ async def main() -> None:
 
     logger.info("Database is initialized")
 
+    # 2.1. Общий кэш между воркерами + шина инвалидаций
+    try:
+        await setup_shared_cache()
+    except Exception:
+        logger.exception("Shared cache initialization failed")
+        return
+
+    # 2.2. Прогрев: пул, проверка схемы, запросы, кэши — до первого апдейта
+    try:
+        await warmup()
+    except Exception:
+        logger.exception("Warm-up failed")
+        await shutdown_shared_cache()
+        return
+
     # 3. Бот и диспетчер
     bot = Bot(
         token=settings.bot_token,
+        session=create_bot_session(),
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
-    dp = Dispatcher()
+    storage = create_fsm_storage()
+    # Очередь апдейтов: один пользователь — строго по порядку, разные —
+    # параллельно (до UPDATES_MAX_CONCURRENCY). Lock берёт FSM-middleware
+    # aiogram, и состояние читается уже под ним.
+    isolation = UpdateIsolation(settings.updates_max_concurrency)
+    dp = Dispatcher(storage=storage, events_isolation=isolation)
+    logger.info("FSM storage: %s", type(storage).__name__)
 
     # 3.1. Middleware
-    # Сначала — контекст логов (user/chat/update),
-    # потом — сессия БД (чтобы в логах уже были user_id/chat_id).
+    # FSM-middleware aiogram регистрирует в конструкторе Dispatcher;
+    # снимаем её и возвращаем после своих, которым нужно стоять раньше lock.
+    dp.update.outer_middleware.unregister(dp.fsm)
+    # Кнопки подтверждаем не позже CALLBACK_ACK_DEADLINE_MS с прихода апдейта,
+    # в том числе пока апдейт ждёт очереди (ответы хендлеров видим через
+    # middleware сессии бота).
+    fast_ack = CallbackFastAckMiddleware(settings.callback_ack_deadline_ms / 1000)
+    bot.session.middleware(fast_ack.request_middleware())
+    # ответы хендлеров идут мимо очереди отправки, но тратят её лимит
+    bot.session.middleware(send_scheduler.request_middleware())
+    dp.update.outer_middleware(fast_ack)
+    dp.update.outer_middleware(UpdateSchedulingMiddleware(isolation))
+    # Очередь пользователя + чтение состояния FSM. Стоит до сессии БД,
+    # чтобы ожидающие апдейты не занимали соединения.
+    dp.update.outer_middleware(dp.fsm)
+    # Дальше — контекст логов (user/chat/update),
+    # потом — сессия БД (чтобы в логах уже были user_id/chat_id),
+    # и память апдейта для сервисных геттеров (живёт не дольше сессии).
     dp.update.outer_middleware(LoggingContextMiddleware())
     dp.update.outer_middleware(DbSessionMiddleware())
+    dp.update.outer_middleware(IdentityMapMiddleware())
+    if isinstance(storage, BatchingStorage):
+        # записи FSM за апдейт уходят в хранилище одним заходом
+        dp.update.outer_middleware(FSMBatchMiddleware(storage))
+
+    # FSM внутри хендлера: одно чтение и одна запись на апдейт
+    dp.message.middleware(FSMBufferMiddleware())
+    dp.callback_query.middleware(FSMBufferMiddleware())
 
     # 4. Роутеры
     dp.include_router(start_router)
@@ -60,6 +122,9 @@ async def main() -> None:
     dp.include_router(connection_requests_router)
     dp.include_router(devfeed_filters_router)  # сначала фильтры
     dp.include_router(devfeed_router)  # потом сама лента
+    dp.include_router(inline_router)
+    dp.include_router(admin_router)
+    dp.include_router(fsm_recovery_router)  # последним: ловит ввод после вытеснения FSM
 
     logger.info("Routers and middlewares are configured")
 
@@ -74,13 +139,35 @@ async def main() -> None:
     )
     logger.info("Reminders worker started")
 
-    # 7. Стартуем поллинг
+    # 6.1. Счётчики переходов по ссылкам на проекты — в БД пачками
+    link_opens_task = asyncio.create_task(
+        link_opens_worker(),
+        name="link_opens_worker",
+    )
+
+    # 6.2. Дайджест новых проектов (раз в DIGEST_PERIOD)
+    digest_task = asyncio.create_task(
+        digest_worker(bot),
+        name="digest_worker",
+    )
+
+    # 6.3. Рассылки, прерванные прошлой остановкой, продолжаем с того же места
+    try:
+        await resume_broadcasts(bot)
+    except Exception:
+        logger.exception("Broadcast resume failed")
+
+    # 7. Стартуем поллинг или webhook-сервер
     try:
-        logger.info("Starting polling")
-        await dp.start_polling(bot)
+        if settings.bot_mode == "webhook":
+            logger.info("Starting webhook server")
+            await run_webhook(dp, bot)
+        else:
+            logger.info("Starting polling")
+            await dp.start_polling(bot)
     except asyncio.CancelledError:
         # Нормальное завершение (Ctrl+C и т.п.)
-        logger.info("Bot polling cancelled, shutting down...")
+        logger.info("Bot %s cancelled, shutting down...", settings.bot_mode)
     except Exception:
         logger.exception("Bot stopped by unexpected error")
     finally:
@@ -89,6 +176,29 @@ async def main() -> None:
         with suppress(asyncio.CancelledError):
             await reminders_task
 
+        digest_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await digest_task
+
+        # Рассылки останутся running и продолжатся после рестарта
+        with suppress(Exception):
+            await stop_broadcasts()
+
+        # Воркер счётчиков при отмене дописывает накопленное
+        link_opens_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await link_opens_task
+
+        with suppress(Exception):
+            await shutdown_shared_cache()
+
+        with suppress(Exception):
+            await storage.close()
+
+        # Останавливаем планировщик исходящих сообщений
+        with suppress(Exception):
+            await send_scheduler.stop()
+
         # Закрываем HTTP-сессию бота
         with suppress(Exception):
             await bot.session.close()
@@ -0,0 +1,54 @@
+# metrics.py
+from __future__ import annotations
+
+import logging
+import math
+from typing import Any, Callable, Dict, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Провайдер метрик — функция без аргументов, которая отдаёт "снимок" счётчиков
+MetricsProvider = Callable[[], Dict[str, Any]]
+
+_providers: dict[str, MetricsProvider] = {}
+
+
+def register_metrics(name: str, provider: MetricsProvider) -> None:
+    """
+    Регистрируем источник метрик под именем (например, "profile_cache").
+    Повторная регистрация с тем же именем просто перезаписывает провайдер.
+    """
+    _providers[name] = provider
+
+
+def percentile_ms(sorted_values: Sequence[float], q: float) -> float:
+    """
+    Перцентиль q (0.5, 0.95, ...) по отсортированным длительностям в секундах —
+    в миллисекундах, с округлением до 0.1. Пустой список -> 0.0.
+
+    Метод ближайшего ранга: p50 из трёх значений — среднее, p95 из десяти —
+    максимум (а не занижение на одну позицию).
+    """
+    if not sorted_values:
+        return 0.0
+    size = len(sorted_values)
+    index = min(size - 1, max(0, math.ceil(size * q) - 1))
+    return round(sorted_values[index] * 1000, 1)
+
+
+def unregister_metrics(name: str) -> None:
+    _providers.pop(name, None)
+
+
+def collect_metrics() -> dict[str, dict[str, Any]]:
+    """
+    Собираем снимок всех зарегистрированных метрик.
+    Упавший провайдер не ломает весь сбор — просто логируем.
+    """
+    result: dict[str, dict[str, Any]] = {}
+    for name, provider in list(_providers.items()):
+        try:
+            result[name] = dict(provider())
+        except Exception:
+            logger.debug("metrics_provider_failed name=%s", name, exc_info=True)
+    return result
@@ -0,0 +1,190 @@
+# middlewares/callback_ack.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import AnswerCallbackQuery, Response, TelegramMethod
+from aiogram.types import TelegramObject, Update
+
+from metrics import percentile_ms, register_metrics
+from services.sender import Priority, send_message
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingAck:
+    __slots__ = ("callback_id", "user_id", "started_at", "answered", "auto")
+
+    def __init__(self, callback_id: str, user_id: int) -> None:
+        self.callback_id = callback_id
+        self.user_id = user_id
+        self.started_at = time.monotonic()
+        self.answered = False
+        # ответ отправили мы (по таймеру или после хендлера), а не хендлер
+        self.auto = False
+
+
+class _AckRequestMiddleware(BaseRequestMiddleware):
+    """Смотрит на answerCallbackQuery, которые уходят из бота."""
+
+    def __init__(self, owner: CallbackFastAckMiddleware) -> None:
+        self.owner = owner
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ) -> Response:
+        if not isinstance(method, AnswerCallbackQuery):
+            return await make_request(bot, method)
+
+        pending = self.owner._pending.get(method.callback_query_id)
+        if pending is None:
+            return await make_request(bot, method)
+
+        if pending.answered:
+            # callback уже подтверждён — второй answer Telegram не примет
+            await self.owner._deliver_late_answer(bot, pending, method)
+            return Response[bool](ok=True, result=True)
+
+        pending.answered = True
+        self.owner._record_ack(pending)
+        return await make_request(bot, method)
+
+
+class CallbackFastAckMiddleware(BaseMiddleware):
+    """
+    Быстрое подтверждение callback-кнопок.
+
+    Многие хендлеры ходят в БД до callback.answer(), и всё это время у
+    пользователя крутится "часики" на кнопке. Этот middleware:
+    - если за deadline хендлер не ответил сам — отвечает пустым answer();
+    - если хендлер закончил, так и не ответив, — отвечает сразу;
+    - alert хендлера после авто-подтверждения не теряется: callback.answer(
+      text, show_alert=True) превращается в обычное сообщение пользователю
+      (отложенный alert); короткие всплывашки без show_alert отбрасываем;
+    - считает время до подтверждения (p50/p95/p99).
+
+    Вешается первым outer-middleware на dp.update (таймер идёт с момента
+    прихода апдейта, в том числе пока он ждёт очереди), а
+    request_middleware() — на bot.session.
+    """
+
+    def __init__(self, deadline: float) -> None:
+        self.deadline = deadline
+        self._pending: dict[str, _PendingAck] = {}
+
+        self.callbacks = 0
+        self.by_handler = 0
+        self.auto_acked = 0
+        self.late_alerts = 0
+        self.dropped_toasts = 0
+        self._ack_times: deque[float] = deque(maxlen=1000)
+
+        register_metrics("callback_ack", self.stats)
+
+    def request_middleware(self) -> BaseRequestMiddleware:
+        return _AckRequestMiddleware(self)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        callback = event.callback_query if isinstance(event, Update) else None
+        if callback is None:
+            return await handler(event, data)
+
+        bot: Bot = data["bot"]
+        pending = _PendingAck(callback.id, callback.from_user.id)
+        self._pending[callback.id] = pending
+        self.callbacks += 1
+
+        timer = asyncio.create_task(self._ack_after_deadline(bot, pending))
+        try:
+            return await handler(event, data)
+        finally:
+            timer.cancel()
+            if not pending.answered:
+                await self._auto_ack(bot, pending)
+            self._pending.pop(callback.id, None)
+
+    async def _ack_after_deadline(self, bot: Bot, pending: _PendingAck) -> None:
+        await asyncio.sleep(self.deadline)
+        if not pending.answered:
+            await self._auto_ack(bot, pending)
+
+    async def _auto_ack(self, bot: Bot, pending: _PendingAck) -> None:
+        pending.auto = True
+        try:
+            await bot.answer_callback_query(callback_query_id=pending.callback_id)
+        except Exception:
+            # протухший callback и т.п. — пользователю это уже не важно
+            logger.debug(
+                "callback_auto_ack_failed callback_id=%s",
+                pending.callback_id,
+                exc_info=True,
+            )
+
+    def _record_ack(self, pending: _PendingAck) -> None:
+        self._ack_times.append(time.monotonic() - pending.started_at)
+        if pending.auto:
+            self.auto_acked += 1
+        else:
+            self.by_handler += 1
+
+    async def _deliver_late_answer(
+        self,
+        bot: Bot,
+        pending: _PendingAck,
+        method: AnswerCallbackQuery,
+    ) -> None:
+        if not method.text or not method.show_alert:
+            self.dropped_toasts += 1
+            return
+
+        self.late_alerts += 1
+        logger.info(
+            "callback_alert_deferred user_id=%s callback_id=%s",
+            pending.user_id,
+            pending.callback_id,
+        )
+        try:
+            await send_message(
+                bot,
+                pending.user_id,
+                method.text,
+                priority=Priority.INTERACTIVE,
+            )
+        except Exception:
+            logger.warning(
+                "callback_alert_deferred_failed user_id=%s",
+                pending.user_id,
+                exc_info=True,
+            )
+
+    def stats(self) -> dict[str, Any]:
+        times = sorted(self._ack_times)
+        return {
+            "deadline_ms": round(self.deadline * 1000),
+            "callbacks": self.callbacks,
+            "pending": len(self._pending),
+            "answered_by_handler": self.by_handler,
+            "auto_acked": self.auto_acked,
+            "late_alerts": self.late_alerts,
+            "dropped_toasts": self.dropped_toasts,
+            "ack_p50_ms": percentile_ms(times, 0.5),
+            "ack_p95_ms": percentile_ms(times, 0.95),
+            "ack_p99_ms": percentile_ms(times, 0.99),
+        }
@@ -0,0 +1,180 @@
+# middlewares/fsm_buffer.py
+from __future__ import annotations
+
+import logging
+from typing import Any, Awaitable, Callable, Dict, Mapping
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.types import TelegramObject
+
+from metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+_NOT_LOADED: Any = object()
+
+
+class _BufferStats:
+    def __init__(self) -> None:
+        self.updates = 0
+        # сколько раз хендлеры обращались к FSM
+        self.calls = 0
+        # сколько реальных операций ушло в хранилище
+        self.storage_ops = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "updates": self.updates,
+            "calls": self.calls,
+            "storage_ops": self.storage_ops,
+            "saved_ops": self.calls - self.storage_ops,
+        }
+
+
+_stats = _BufferStats()
+register_metrics("fsm_buffer", _stats.stats)
+
+
+class BufferedFSMContext(FSMContext):
+    """
+    FSMContext на время одного апдейта:
+    - состояние и данные читаются из хранилища не больше одного раза;
+    - set_state / set_data / update_data / clear только меняют локальную копию;
+    - flush() пишет итог одной-двумя операциями (state и/или data).
+
+    После flush() контекст работает как обычный FSMContext — на случай,
+    если кто-то сохранил его в фоновую задачу.
+    """
+
+    def __init__(
+        self,
+        storage: BaseStorage,
+        key: StorageKey,
+        *,
+        raw_state: Any = _NOT_LOADED,
+    ) -> None:
+        super().__init__(storage=storage, key=key)
+        # raw_state уже прочитал FSMContextMiddleware — второй раз не ходим
+        self._state: Any = raw_state
+        self._data: Any = _NOT_LOADED
+        self._state_dirty = False
+        self._data_dirty = False
+        self._flushed = False
+
+    async def _load_state(self) -> str | None:
+        if self._state is _NOT_LOADED:
+            self._state = await self.storage.get_state(key=self.key)
+            _stats.storage_ops += 1
+        return self._state
+
+    async def _load_data(self) -> dict[str, Any]:
+        if self._data is _NOT_LOADED:
+            self._data = dict(await self.storage.get_data(key=self.key))
+            _stats.storage_ops += 1
+        return self._data
+
+    async def set_state(self, state: StateType = None) -> None:
+        _stats.calls += 1
+        if self._flushed:
+            _stats.storage_ops += 1
+            await super().set_state(state)
+            return
+        self._state = state.state if isinstance(state, State) else state
+        self._state_dirty = True
+
+    async def get_state(self) -> str | None:
+        _stats.calls += 1
+        if self._flushed:
+            _stats.storage_ops += 1
+            return await super().get_state()
+        return await self._load_state()
+
+    async def set_data(self, data: Mapping[str, Any]) -> None:
+        _stats.calls += 1
+        if self._flushed:
+            _stats.storage_ops += 1
+            await super().set_data(data)
+            return
+        self._data = dict(data)
+        self._data_dirty = True
+
+    async def get_data(self) -> dict[str, Any]:
+        _stats.calls += 1
+        if self._flushed:
+            _stats.storage_ops += 1
+            return await super().get_data()
+        return dict(await self._load_data())
+
+    async def get_value(self, key: str, default: Any | None = None) -> Any | None:
+        data = await self.get_data()
+        return data.get(key, default)
+
+    async def update_data(
+        self,
+        data: Mapping[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        if data:
+            kwargs.update(data)
+        if self._flushed:
+            _stats.calls += 1
+            _stats.storage_ops += 1
+            return await super().update_data(kwargs)
+
+        _stats.calls += 1
+        current = await self._load_data()
+        current.update(kwargs)
+        self._data_dirty = True
+        return dict(current)
+
+    async def clear(self) -> None:
+        await self.set_state(None)
+        await self.set_data({})
+
+    async def flush(self) -> None:
+        if self._flushed:
+            return
+        self._flushed = True
+
+        if self._state_dirty:
+            await self.storage.set_state(key=self.key, state=self._state)
+            _stats.storage_ops += 1
+        if self._data_dirty:
+            await self.storage.set_data(key=self.key, data=self._data)
+            _stats.storage_ops += 1
+
+
+class FSMBufferMiddleware(BaseMiddleware):
+    """
+    Подменяет data["state"] на BufferedFSMContext и сбрасывает его
+    в хранилище после хендлера (в том числе если хендлер упал).
+    Вешается как inner-middleware на message / callback_query.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        state: FSMContext | None = data.get("state")
+        if state is None or isinstance(state, BufferedFSMContext):
+            return await handler(event, data)
+
+        buffered = BufferedFSMContext(
+            storage=state.storage,
+            key=state.key,
+            raw_state=data.get("raw_state", _NOT_LOADED),
+        )
+        data["state"] = buffered
+        _stats.updates += 1
+        try:
+            return await handler(event, data)
+        finally:
+            try:
+                await buffered.flush()
+            except Exception:
+                logger.exception("fsm_buffer_flush_failed key=%s", state.key)
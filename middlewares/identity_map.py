@@ -0,0 +1,45 @@
+# middlewares/identity_map.py
+from __future__ import annotations
+
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from services.memo import RequestMemo, activate_memo, deactivate_memo
+
+logger = logging.getLogger(__name__)
+
+
+class IdentityMapMiddleware(BaseMiddleware):
+    """
+    Заводит RequestMemo на каждый апдейт:
+    - кладёт её в data["memo"] (доступна хендлерам);
+    - делает текущей для сервисов (через contextvar).
+
+    В debug-логах по завершении — сколько повторных запросов сущностей
+    внутри апдейта удалось не делать.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        memo = RequestMemo()
+        data["memo"] = memo
+        token = activate_memo(memo)
+        try:
+            return await handler(event, data)
+        finally:
+            deactivate_memo(token)
+            if logger.isEnabledFor(logging.DEBUG):
+                duplicates = memo.duplicates()
+                logger.debug(
+                    "request_memo_summary lookups=%s duplicates=%s by_kind=%s",
+                    memo.lookups,
+                    sum(duplicates.values()),
+                    duplicates,
+                )
@@ -0,0 +1,169 @@
+# middlewares/scheduling.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+from aiogram.types import TelegramObject, Update
+
+from metrics import percentile_ms, register_metrics
+
+logger = logging.getLogger(__name__)
+
+
+# апдейт не ждёт очереди своего пользователя (только общий лимит)
+_lane_exempt: ContextVar[bool] = ContextVar("update_lane_exempt", default=False)
+
+
+class _UserLane:
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        # сколько апдейтов сейчас держат или ждут этот lock
+        self.users = 0
+
+
+class UpdateIsolation(BaseEventIsolation):
+    """
+    Порядок обработки апдейтов.
+
+    Polling и webhook запускают каждый апдейт отдельной задачей, так что
+    разные пользователи обрабатываются параллельно. Здесь:
+    - апдейты одного пользователя выполняются строго по очереди (lock на
+      ключ FSM) — двойной тап "✅ Принять" или быстрый ввод в визарде
+      не гоняются за одним FSM-состоянием и одними строками в БД;
+    - число одновременно обрабатываемых апдейтов ограничено (семафор).
+
+    Передаётся в Dispatcher(events_isolation=...): FSM-middleware aiogram
+    берёт lock и только потом читает состояние, так что следующий апдейт
+    пользователя маршрутизируется уже по состоянию, которое записал
+    предыдущий.
+
+    Сначала берём lock пользователя, потом слот семафора: очередь одного
+    пользователя не занимает общие слоты.
+    """
+
+    def __init__(self, max_concurrency: int) -> None:
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._lanes: dict[StorageKey, _UserLane] = {}
+
+        self.processed = 0
+        self.in_flight = 0
+        self.waiting = 0
+        # апдейтов, которым пришлось ждать предыдущий апдейт того же пользователя
+        self.serialized = 0
+        self._user_waits: deque[float] = deque(maxlen=1000)
+        self._slot_waits: deque[float] = deque(maxlen=1000)
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        lane: _UserLane | None = None
+        if not _lane_exempt.get():
+            lane = self._lanes.get(key)
+            if lane is None:
+                lane = self._lanes[key] = _UserLane()
+            lane.users += 1
+
+        self.waiting += 1
+        queued = True
+        started = time.monotonic()
+        try:
+            if lane is not None:
+                if lane.lock.locked():
+                    self.serialized += 1
+                    logger.debug("update_waits_for_previous user_id=%s", key.user_id)
+                await lane.lock.acquire()
+            try:
+                user_ready = time.monotonic()
+                self._user_waits.append(user_ready - started)
+
+                async with self._slots:
+                    self._slot_waits.append(time.monotonic() - user_ready)
+                    self.waiting -= 1
+                    queued = False
+                    self.in_flight += 1
+                    try:
+                        yield
+                    finally:
+                        self.in_flight -= 1
+                        self.processed += 1
+            finally:
+                if lane is not None:
+                    lane.lock.release()
+        finally:
+            # апдейт могли отменить, пока он ждал очереди
+            if queued:
+                self.waiting -= 1
+            if lane is not None:
+                lane.users -= 1
+                if lane.users == 0 and self._lanes.get(key) is lane:
+                    del self._lanes[key]
+
+    async def close(self) -> None:
+        self._lanes.clear()
+
+    def stats(self) -> dict[str, Any]:
+        user_waits = sorted(self._user_waits)
+        slot_waits = sorted(self._slot_waits)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "active_users": len(self._lanes),
+            "processed": self.processed,
+            "serialized": self.serialized,
+            "user_wait_p50_ms": percentile_ms(user_waits, 0.5),
+            "user_wait_p95_ms": percentile_ms(user_waits, 0.95),
+            "user_wait_max_ms": round(user_waits[-1] * 1000, 1) if user_waits else 0.0,
+            "slot_wait_p50_ms": percentile_ms(slot_waits, 0.5),
+            "slot_wait_p95_ms": percentile_ms(slot_waits, 0.95),
+            "slot_wait_max_ms": round(slot_waits[-1] * 1000, 1) if slot_waits else 0.0,
+        }
+
+
+class UpdateSchedulingMiddleware(BaseMiddleware):
+    """
+    Метрики очереди апдейтов ("update_scheduling") и разметка апдейтов,
+    которым не нужна очередь пользователя. Сама очередь — UpdateIsolation.
+
+    Вешается на dp.update до FSM-middleware aiogram (она берёт lock).
+    """
+
+    def __init__(self, isolation: UpdateIsolation) -> None:
+        self.isolation = isolation
+        self.updates = 0
+        self.lane_exempt = 0
+        register_metrics("update_scheduling", self.stats)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        self.updates += 1
+        if isinstance(event, Update) and event.inline_query is not None:
+            # inline-поиск не трогает FSM и БД, а дебаунсу нужно видеть
+            # следующие запросы того же пользователя, пока ждёт текущий
+            self.lane_exempt += 1
+            token = _lane_exempt.set(True)
+            try:
+                return await handler(event, data)
+            finally:
+                _lane_exempt.reset(token)
+        return await handler(event, data)
+
+    def stats(self) -> dict[str, Any]:
+        data = self.isolation.stats()
+        data["updates"] = self.updates
+        data["lane_exempt"] = self.lane_exempt
+        return data
@@ -0,0 +1,28 @@
+"""projects.link_opens
+
+Revision ID: 2e6f0a8b4c17
+Revises: 9b3e5a7c2d41
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e6f0a8b4c17'
+down_revision: Union[str, Sequence[str], None] = '9b3e5a7c2d41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('link_opens', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('projects', 'link_opens')
@@ -0,0 +1,30 @@
+"""broadcast_recipients.claimed_by, claimed_at
+
+Revision ID: 8d2f4b6a1c35
+Revises: 6c3b8e2f5d19
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f4b6a1c35'
+down_revision: Union[str, Sequence[str], None] = '6c3b8e2f5d19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('broadcast_recipients', sa.Column('claimed_by', sa.String(length=32), nullable=True))
+    op.add_column('broadcast_recipients', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('broadcast_recipients', 'claimed_at')
+    op.drop_column('broadcast_recipients', 'claimed_by')
@@ -0,0 +1,66 @@
+"""connection_requests.reminded_at
+
+Revision ID: 9b3e5a7c2d41
+Revises: 7c1d2e4f9a10
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e5a7c2d41'
+down_revision: Union[str, Sequence[str], None] = '7c1d2e4f9a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _backfill_after_days() -> int:
+    """
+    Окно, с которым работал старый воркер: он уже прошёлся по всем заявкам,
+    принятым раньше этого срока, — их помечаем как напомненные, чтобы новый
+    воркер не разослал напоминания по всей истории.
+
+    Берём REMINDERS_AFTER_DAYS из настроек; если старый воркер работал
+    с другим окном — его можно передать явно:
+    alembic -x reminders_after_days=N upgrade head
+    """
+    value = context.get_x_argument(as_dictionary=True).get("reminders_after_days")
+    if value is not None:
+        return int(value)
+    return settings.reminders_after_days
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    backfill_after_days = _backfill_after_days()
+    op.add_column('connection_requests', sa.Column('reminded_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_connection_requests_reminded_at'), 'connection_requests', ['reminded_at'], unique=False)
+
+    requests = sa.table(
+        'connection_requests',
+        sa.column('status', sa.String),
+        sa.column('responded_at', sa.DateTime),
+        sa.column('reminded_at', sa.DateTime),
+    )
+    op.execute(
+        requests.update()
+        .where(
+            requests.c.status == 'accepted',
+            requests.c.responded_at.is_not(None),
+            requests.c.responded_at <= datetime.utcnow() - timedelta(days=backfill_after_days),
+        )
+        .values(reminded_at=requests.c.responded_at)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_connection_requests_reminded_at'), table_name='connection_requests')
+    op.drop_column('connection_requests', 'reminded_at')
@@ -70,6 +70,12 @@ class Project(Base):
     image_file_id: Mapped[str | None] = mapped_column(String(256), nullable=True)
 
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+
+    # Переходы по ссылке t.me/<бот>?start=p_<id> (пишутся пачками, см. services.deep_links)
+    link_opens: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -96,9 +102,121 @@ class ConnectionRequest(Base):
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     responded_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # когда по принятой заявке отправили напоминание (None — ещё не отправляли)
+    reminded_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, index=True
+    )
 
     def __repr__(self) -> str:
         return (
             f"<ConnectionRequest id={self.id} from={self.from_telegram_id} "
             f"to={self.to_telegram_id} status={self.status} project_id={self.project_id}>"
         )
+
+
+class FsmState(Base):
+    """Состояние FSM (шаг мастера + его данные) — см. fsm_storage.SQLAlchemyStorage."""
+
+    __tablename__ = "fsm_state"
+
+    # bot:chat:user:thread:business:destiny
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # JSON
+    data: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, index=True
+    )
+
+    def __repr__(self) -> str:
+        return f"<FsmState key={self.key} state={self.state}>"
+
+
+class BroadcastJob(Base):
+    """Рассылка от админа — см. services.broadcast."""
+
+    __tablename__ = "broadcast_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    created_by: Mapped[int] = mapped_column(BigInteger)
+    text: Mapped[str] = mapped_column(Text)
+
+    # running / paused / done
+    status: Mapped[str] = mapped_column(String(16), default="running", index=True)
+
+    # счётчики по получателям (обновляются после каждой пачки)
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    sent: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    unreachable: Mapped[int] = mapped_column(Integer, default=0)
+
+    # сообщение в админ-чате, которое редактируем прогрессом
+    progress_chat_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    progress_message_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<BroadcastJob id={self.id} status={self.status} sent={self.sent}/{self.total}>"
+
+
+class BroadcastRecipient(Base):
+    """Снимок получателей рассылки на момент запуска, статус по каждому."""
+
+    __tablename__ = "broadcast_recipients"
+
+    job_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    telegram_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+
+    # pending / sending / sent / failed / unreachable
+    status: Mapped[str] = mapped_column(String(16), default="pending")
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    # кто и когда взял получателя в пачку (status=sending); чужие пачки
+    # считаются брошенными только после BROADCAST_CLAIM_LEASE_SECONDS
+    claimed_by: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"<BroadcastRecipient job={self.job_id} tg={self.telegram_id} "
+            f"status={self.status}>"
+        )
+
+
+class ProjectDigestEntry(Base):
+    """
+    Журнал новых проектов для дайджеста (см. services.digest): только то,
+    что нужно для подбора — коды ролей и стеков через запятую.
+    Прогон забирает записи, удаляя их.
+    """
+
+    __tablename__ = "project_digest_log"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    project_id: Mapped[int] = mapped_column(Integer)
+    owner_telegram_id: Mapped[int] = mapped_column(BigInteger)
+    # пусто — проект не уточнил роли / стек
+    role_codes: Mapped[str] = mapped_column(String(256), default="")
+    stack_codes: Mapped[str] = mapped_column(String(256), default="")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<ProjectDigestEntry id={self.id} project_id={self.project_id}>"
+
+
+class DigestRun(Base):
+    """Прогон дайджеста: когда был (от него считается следующий) и до какой записи журнала."""
+
+    __tablename__ = "digest_runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    last_entry_id: Mapped[int] = mapped_column(Integer)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    recipients: Mapped[int] = mapped_column(Integer, default=0)
+
+    def __repr__(self) -> str:
+        return f"<DigestRun id={self.id} last_entry_id={self.last_entry_id}>"
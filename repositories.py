@@ -82,12 +82,24 @@ async def update_profile(
 
 
 async def search_profiles(
-    session: AsyncSession, *, exclude_id: int | None = None
+    session: AsyncSession,
+    *,
+    goal: str | None = None,
+    role: str | None = None,
+    exclude_telegram_id: int | None = None,
+    limit: int | None = None,
 ) -> list[Profile]:
     query = select(Profile)
-    if exclude_id is not None:
-        query = query.where(Profile.telegram_id != exclude_id)
-    result = await session.scalars(query.order_by(Profile.id.desc()))
+    if goal:
+        query = query.where(Profile.goals == goal)
+    if role:
+        query = query.where(Profile.role == role)
+    if exclude_telegram_id is not None:
+        query = query.where(Profile.telegram_id != exclude_telegram_id)
+    query = query.order_by(Profile.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    result = await session.scalars(query)
     return list(result)
 
 
@@ -145,6 +157,64 @@ async def get_projects(
     return list(result)
 
 
+def _apply_project_feed_filters(
+    query,
+    *,
+    role: str | None,
+    stack: str | None,
+    level: str | None,
+):
+    """
+    Общие фильтры ленты проектов:
+    role / stack — подстрока (без учёта регистра), level — точное совпадение.
+    """
+    query = query.where(Project.is_active.is_(True))
+    if role:
+        query = query.where(Project.looking_for_role.ilike(f"%{role}%"))
+    if stack:
+        query = query.where(Project.stack.ilike(f"%{stack}%"))
+    if level:
+        query = query.where(Project.level == level)
+    return query
+
+
+async def list_projects(
+    session: AsyncSession,
+    *,
+    limit: int,
+    role: str | None = None,
+    stack: str | None = None,
+    level: str | None = None,
+) -> list[Project]:
+    query = _apply_project_feed_filters(
+        select(Project), role=role, stack=stack, level=level
+    )
+    result = await session.scalars(query.order_by(Project.id.desc()).limit(limit))
+    return list(result)
+
+
+async def list_project_feed_candidates(
+    session: AsyncSession,
+    *,
+    limit: int,
+    role: str | None = None,
+    stack: str | None = None,
+    level: str | None = None,
+) -> list[tuple[int, int]]:
+    """
+    Лёгкий вариант list_projects: только (id, owner_telegram_id),
+    без загрузки полных строк проектов.
+    """
+    query = _apply_project_feed_filters(
+        select(Project.id, Project.owner_telegram_id),
+        role=role,
+        stack=stack,
+        level=level,
+    )
+    result = await session.execute(query.order_by(Project.id.desc()).limit(limit))
+    return [(row[0], row[1]) for row in result.all()]
+
+
 # ---------- заявки на коннекты / проект ----------
 
 
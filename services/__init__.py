@@ -4,11 +4,16 @@ from .profiles import (
     get_profile,
     update_profile_data,
     search_profiles_for_user,
+    get_profile_cache_stats,
+    ProfileSnapshot,
 )
 from .projects import (
     create_user_project,
     get_projects_feed,
+    get_projects_feed_ids,
     get_project,
+    bump_projects_feed_version,
+    get_projects_feed_cache_stats,
 )
 
 from .connections import (
@@ -18,18 +23,25 @@ from .connections import (
     reject_connection_request,
     get_connection_request,
 )
+from .requested import get_user_request_sets_stats
 
 __all__ = [
     "ensure_profile",
     "get_profile",
     "update_profile_data",
     "search_profiles_for_user",
+    "get_profile_cache_stats",
+    "ProfileSnapshot",
     "create_user_project",
     "get_projects_feed",
+    "get_projects_feed_ids",
+    "bump_projects_feed_version",
+    "get_projects_feed_cache_stats",
     "get_project",
     "send_connect_request",
     "send_project_request",
     "send_connection_request",
     "reject_connection_request",
     "get_connection_request",
+    "get_user_request_sets_stats",
 ]
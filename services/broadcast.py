@@ -0,0 +1,548 @@
+# services/broadcast.py
+"""
+Рассылка от админа всем пользователям (/broadcast в админ-чате).
+
+- При запуске id получателей одним INSERT ... SELECT снимаются из profiles
+  в broadcast_recipients — дальше рассылка не зависит от новых профилей.
+- Получатели идут пачками по BROADCAST_BATCH_SIZE (keyset по telegram_id)
+  через планировщик отправки с фоновым приоритетом: лимиты Telegram
+  соблюдает он, ответы пользователям и уведомления идут раньше.
+- Пачку сначала помечаем sending с отметкой воркера и времени (как
+  напоминания: лучше не доставить при падении посреди пачки, чем
+  доставить дважды), после отправки пишем статус каждого получателя —
+  только по своим строкам в sending. Заблокировавшие бота — unreachable.
+- Пачка, которую воркер не закрыл за BROADCAST_CLAIM_LEASE_SECONDS,
+  считается брошенной (процесс упал): её получатели — failed. Пачки
+  живых воркеров не трогаем.
+- Статус рассылки живёт в БД: пауза/продолжение — сменой статуса,
+  после рестарта незавершённые рассылки продолжаются с того же места.
+- Прогресс и ETA — правкой одного сообщения в админ-чате.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from sqlalchemy import func, insert, literal, or_, select, update
+
+from config import settings
+from db import async_session_maker
+from metrics import register_metrics
+from models import BroadcastJob, BroadcastRecipient, Profile
+from services.sender import Priority, scheduler, send_message
+
+logger = logging.getLogger(__name__)
+
+# отметка этого процесса в broadcast_recipients.claimed_by
+_WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# job_id -> задача, которая ведёт рассылку в этом процессе
+_runners: dict[int, asyncio.Task] = {}
+# рассылку продолжили, пока её прежняя задача ещё завершалась
+_restart_requested: set[int] = set()
+# процесс останавливается: новые пачки не берём
+_stopping = False
+
+# сколько при остановке ждём, пока доотправятся текущие пачки
+_STOP_TIMEOUT = 10.0
+
+# как часто проверяем, закрыли ли другие воркеры свои последние пачки
+_DRAIN_POLL_SECONDS = 5.0
+
+
+class _BroadcastStats:
+    def __init__(self) -> None:
+        self.sent = 0
+        self.failed = 0
+        self.unreachable = 0
+        self.batches = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running_jobs": sorted(_runners),
+            "sent": self.sent,
+            "failed": self.failed,
+            "unreachable": self.unreachable,
+            "batches": self.batches,
+        }
+
+
+_stats = _BroadcastStats()
+register_metrics("broadcast", _stats.stats)
+
+
+# ===== прогресс =====
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours} ч {minutes:02d} мин"
+    return f"{minutes}:{seconds:02d}"
+
+
+def format_broadcast_progress(job: BroadcastJob, rate: float | None = None) -> str:
+    done = job.sent + job.failed + job.unreachable
+    percent = done * 100 // job.total if job.total else 100
+    status = {
+        "running": "идёт",
+        "paused": "на паузе",
+        "done": "завершена",
+    }.get(job.status, job.status)
+
+    lines = [
+        f"📣 Рассылка #{job.id} — {status}",
+        f"Обработано: {done} / {job.total} ({percent}%)",
+        f"Доставлено: {job.sent}",
+        f"Не доставлено: {job.failed}",
+        f"Заблокировали бота: {job.unreachable}",
+    ]
+    if job.status == "running" and rate:
+        lines.append(
+            f"Скорость: {rate:.1f} сообщ./с, осталось ~{_format_duration((job.total - done) / rate)}"
+        )
+    if job.status == "running":
+        lines.append(f"\nПауза: /broadcast_pause {job.id}")
+    elif job.status == "paused":
+        lines.append(f"\nПродолжить: /broadcast_resume {job.id}")
+    return "\n".join(lines)
+
+
+async def _report_progress(bot: Bot, job: BroadcastJob, rate: float | None) -> None:
+    if not job.progress_chat_id or not job.progress_message_id:
+        return
+    text = format_broadcast_progress(job, rate)
+    try:
+        await scheduler.send(
+            job.progress_chat_id,
+            lambda: bot.edit_message_text(
+                text=text,
+                chat_id=job.progress_chat_id,
+                message_id=job.progress_message_id,
+            ),
+            priority=Priority.NOTIFICATION,
+        )
+    except TelegramBadRequest as exc:
+        if "message is not modified" not in str(exc).lower():
+            logger.warning("broadcast_progress_edit_failed job_id=%s error=%r", job.id, exc)
+    except Exception:
+        logger.warning("broadcast_progress_edit_failed job_id=%s", job.id, exc_info=True)
+
+
+# ===== пачки получателей =====
+
+
+async def _recover_interrupted(job_id: int) -> None:
+    """
+    Брошенные пачки: получатели в sending, чья отметка старше
+    BROADCAST_CLAIM_LEASE_SECONDS (воркер упал посреди пачки). Доставлено
+    им или нет — неизвестно, повторно не шлём, считаем недоставленными.
+    Пачки, которые ещё отправляет живой воркер, не трогаем.
+    """
+    expired = datetime.utcnow() - timedelta(seconds=settings.broadcast_claim_lease_seconds)
+    async with async_session_maker() as session:
+        result = await session.execute(
+            update(BroadcastRecipient)
+            .where(
+                BroadcastRecipient.job_id == job_id,
+                BroadcastRecipient.status == "sending",
+                or_(
+                    BroadcastRecipient.claimed_at.is_(None),
+                    BroadcastRecipient.claimed_at < expired,
+                ),
+            )
+            .values(status="failed", claimed_by=None)
+        )
+        if result.rowcount:
+            await session.execute(
+                update(BroadcastJob)
+                .where(BroadcastJob.id == job_id)
+                .values(failed=BroadcastJob.failed + result.rowcount)
+            )
+            logger.warning(
+                "broadcast_interrupted_batch job_id=%s recipients=%s",
+                job_id,
+                result.rowcount,
+            )
+        await session.commit()
+
+
+async def _claim_batch(
+    job_id: int, after_id: int
+) -> tuple[BroadcastJob | None, list[int], int | None]:
+    """
+    Текущее состояние рассылки, следующая пачка получателей (уже в sending)
+    и курсор для следующей пачки (None — получателей больше нет или
+    рассылка не в статусе running).
+    """
+    async with async_session_maker() as session:
+        job = await session.get(BroadcastJob, job_id)
+        if job is None or job.status != "running":
+            return job, [], None
+
+        candidates = list(
+            await session.scalars(
+                select(BroadcastRecipient.telegram_id)
+                .where(
+                    BroadcastRecipient.job_id == job_id,
+                    BroadcastRecipient.telegram_id > after_id,
+                    BroadcastRecipient.status == "pending",
+                )
+                .order_by(BroadcastRecipient.telegram_id)
+                .limit(settings.broadcast_batch_size)
+            )
+        )
+        if not candidates:
+            return job, [], None
+
+        # RETURNING: если ту же рассылку ведёт другой воркер, берём только своё
+        claimed = await session.scalars(
+            update(BroadcastRecipient)
+            .where(
+                BroadcastRecipient.job_id == job_id,
+                BroadcastRecipient.telegram_id.in_(candidates),
+                BroadcastRecipient.status == "pending",
+            )
+            .values(status="sending", claimed_by=_WORKER_ID, claimed_at=datetime.utcnow())
+            .returning(BroadcastRecipient.telegram_id)
+        )
+        rows = sorted(claimed)
+        await session.commit()
+        return job, rows, candidates[-1]
+
+
+async def _store_results(job_id: int, batch: list[int], results: dict[int, str]) -> None:
+    """
+    Статусы пачки одной транзакцией: по UPDATE на статус + счётчики рассылки.
+    Кому не успели отправить (остановка процесса) — обратно в pending.
+
+    Обновляем только свои строки в sending: если пачку уже сочли брошенной
+    (failed), её статус и счётчики не переписываем.
+    """
+    by_status: dict[str, list[int]] = {}
+    for telegram_id in batch:
+        by_status.setdefault(results.get(telegram_id, "pending"), []).append(telegram_id)
+
+    now = datetime.utcnow()
+    stored: dict[str, int] = {}
+    async with async_session_maker() as session:
+        for status, ids in by_status.items():
+            result = await session.execute(
+                update(BroadcastRecipient)
+                .where(
+                    BroadcastRecipient.job_id == job_id,
+                    BroadcastRecipient.telegram_id.in_(ids),
+                    BroadcastRecipient.status == "sending",
+                    BroadcastRecipient.claimed_by == _WORKER_ID,
+                )
+                .values(
+                    status=status,
+                    sent_at=now if status == "sent" else None,
+                    claimed_by=None,
+                )
+            )
+            stored[status] = result.rowcount
+        await session.execute(
+            update(BroadcastJob)
+            .where(BroadcastJob.id == job_id)
+            .values(
+                sent=BroadcastJob.sent + stored.get("sent", 0),
+                failed=BroadcastJob.failed + stored.get("failed", 0),
+                unreachable=BroadcastJob.unreachable + stored.get("unreachable", 0),
+            )
+        )
+        await session.commit()
+
+    lost = len(batch) - sum(stored.values())
+    if lost:
+        logger.warning(
+            "broadcast_batch_already_recovered job_id=%s recipients=%s",
+            job_id,
+            lost,
+        )
+
+
+async def _count_unfinished(job_id: int) -> tuple[int, int]:
+    """Сколько получателей ещё в pending и в sending."""
+    async with async_session_maker() as session:
+        rows = await session.execute(
+            select(BroadcastRecipient.status, func.count())
+            .where(
+                BroadcastRecipient.job_id == job_id,
+                BroadcastRecipient.status.in_(("pending", "sending")),
+            )
+            .group_by(BroadcastRecipient.status)
+        )
+        counts = dict(rows.all())
+    return counts.get("pending", 0), counts.get("sending", 0)
+
+
+async def _send_one(bot: Bot, job: BroadcastJob, telegram_id: int, results: dict[int, str]) -> None:
+    try:
+        await send_message(bot, telegram_id, job.text, priority=Priority.BACKGROUND)
+    except TelegramForbiddenError:
+        # заблокировал бота / удалил аккаунт
+        results[telegram_id] = "unreachable"
+        _stats.unreachable += 1
+    except TelegramBadRequest as exc:
+        if "chat not found" in str(exc).lower():
+            results[telegram_id] = "unreachable"
+            _stats.unreachable += 1
+        else:
+            results[telegram_id] = "failed"
+            _stats.failed += 1
+            logger.debug("broadcast_send_failed telegram_id=%s error=%r", telegram_id, exc)
+    except Exception as exc:
+        results[telegram_id] = "failed"
+        _stats.failed += 1
+        logger.debug("broadcast_send_failed telegram_id=%s error=%r", telegram_id, exc)
+    else:
+        results[telegram_id] = "sent"
+        _stats.sent += 1
+
+
+# ===== ведение рассылки =====
+
+
+async def _run_job(bot: Bot, job_id: int) -> str | None:
+    """Ведёт рассылку до конца, паузы или остановки; возвращает статус, на котором вышла."""
+    started = time.monotonic()
+    processed = 0
+    last_report = 0.0
+    after_id = 0
+
+    logger.info("broadcast_runner_started job_id=%s", job_id)
+    while not _stopping:
+        job, batch, cursor = await _claim_batch(job_id, after_id)
+        rate = processed / (time.monotonic() - started) if processed else None
+
+        if job is None:
+            return None
+        if job.status != "running":
+            # пауза: сообщение прогресса показывает, как продолжить
+            logger.info("broadcast_runner_not_running job_id=%s status=%s", job_id, job.status)
+            await _report_progress(bot, job, None)
+            return job.status
+        if cursor is None:
+            # keyset дошёл до конца; остались ли получатели — в том числе
+            # возвращённые в pending за курсором или в чужих пачках
+            await _recover_interrupted(job_id)
+            pending, sending = await _count_unfinished(job_id)
+            if not pending and not sending:
+                break
+            after_id = 0
+            if not pending:
+                # ждём, пока другие воркеры закроют свои пачки (или истечёт их срок)
+                await asyncio.sleep(_DRAIN_POLL_SECONDS)
+            continue
+
+        after_id = cursor
+        if not batch:
+            # пачку целиком забрал другой воркер
+            continue
+
+        if time.monotonic() - last_report >= settings.broadcast_progress_seconds:
+            last_report = time.monotonic()
+            await _report_progress(bot, job, rate)
+
+        results: dict[int, str] = {}
+        try:
+            await asyncio.gather(*(_send_one(bot, job, tid, results) for tid in batch))
+        finally:
+            await _store_results(job_id, batch, results)
+        processed += len(results)
+        _stats.batches += 1
+    else:
+        logger.info("broadcast_runner_stopped job_id=%s", job_id)
+        return None
+
+    async with async_session_maker() as session:
+        await session.execute(
+            update(BroadcastJob)
+            .where(BroadcastJob.id == job_id, BroadcastJob.status == "running")
+            .values(status="done", finished_at=datetime.utcnow())
+        )
+        await session.commit()
+        job = await session.get(BroadcastJob, job_id)
+
+    logger.info(
+        "broadcast_runner_finished job_id=%s status=%s sent=%s failed=%s unreachable=%s duration_s=%.1f",
+        job_id,
+        job.status,
+        job.sent,
+        job.failed,
+        job.unreachable,
+        time.monotonic() - started,
+    )
+    await _report_progress(bot, job, None)
+    return job.status
+
+
+def _start_runner(bot: Bot, job_id: int) -> None:
+    runner = _runners.get(job_id)
+    if runner is not None and not runner.done():
+        # прежняя задача могла уже увидеть паузу и завершаться — тогда
+        # её done-callback запустит рассылку заново (статус перечитает новая)
+        _restart_requested.add(job_id)
+        return
+
+    # чистый контекст: не тащим в фон identity map и FSM-батч апдейта
+    task = asyncio.get_running_loop().create_task(
+        _run_job(bot, job_id),
+        name=f"broadcast:{job_id}",
+        context=contextvars.Context(),
+    )
+    _runners[job_id] = task
+
+    def _done(t: asyncio.Task) -> None:
+        if _runners.get(job_id) is t:
+            del _runners[job_id]
+        restart = job_id in _restart_requested
+        _restart_requested.discard(job_id)
+        if t.cancelled():
+            return
+        if t.exception() is not None:
+            logger.error(
+                "broadcast_runner_failed job_id=%s error=%r",
+                job_id,
+                t.exception(),
+            )
+            return
+        # задача вышла на паузе, а рассылку уже продолжили
+        if restart and t.result() == "paused" and not _stopping:
+            logger.info("broadcast_runner_restarted job_id=%s", job_id)
+            _start_runner(bot, job_id)
+
+    task.add_done_callback(_done)
+
+
+# ===== публичное API =====
+
+
+async def start_broadcast(
+    bot: Bot,
+    *,
+    created_by: int,
+    text: str,
+    progress_chat_id: int,
+    progress_message_id: int,
+) -> BroadcastJob:
+    """Создать рассылку по всем активным профилям и запустить её."""
+    async with async_session_maker() as session:
+        job = BroadcastJob(
+            created_by=created_by,
+            text=text,
+            status="running",
+            total=0,
+            sent=0,
+            failed=0,
+            unreachable=0,
+            progress_chat_id=progress_chat_id,
+            progress_message_id=progress_message_id,
+        )
+        session.add(job)
+        await session.flush()
+
+        # снимок получателей — одним запросом, без выгрузки профилей в Python
+        result = await session.execute(
+            insert(BroadcastRecipient).from_select(
+                ["job_id", "telegram_id", "status"],
+                select(
+                    literal(job.id),
+                    Profile.telegram_id,
+                    literal("pending"),
+                ).where(Profile.is_active.is_(True)),
+            )
+        )
+        job.total = result.rowcount
+        await session.commit()
+
+    logger.info(
+        "broadcast_created job_id=%s created_by=%s recipients=%s",
+        job.id,
+        created_by,
+        job.total,
+    )
+    _start_runner(bot, job.id)
+    return job
+
+
+async def get_broadcast(job_id: int) -> BroadcastJob | None:
+    async with async_session_maker() as session:
+        return await session.get(BroadcastJob, job_id)
+
+
+async def get_latest_broadcast() -> BroadcastJob | None:
+    async with async_session_maker() as session:
+        return await session.scalar(
+            select(BroadcastJob).order_by(BroadcastJob.id.desc()).limit(1)
+        )
+
+
+async def _set_status(job_id: int, old: str, new: str) -> bool:
+    async with async_session_maker() as session:
+        result = await session.execute(
+            update(BroadcastJob)
+            .where(BroadcastJob.id == job_id, BroadcastJob.status == old)
+            .values(status=new)
+        )
+        await session.commit()
+    changed = bool(result.rowcount)
+    if changed:
+        logger.info("broadcast_status_changed job_id=%s %s->%s", job_id, old, new)
+    return changed
+
+
+async def pause_broadcast(job_id: int) -> bool:
+    """Пауза: текущая пачка доотправится, следующая не начнётся."""
+    return await _set_status(job_id, "running", "paused")
+
+
+async def resume_broadcast(bot: Bot, job_id: int) -> bool:
+    if not await _set_status(job_id, "paused", "running"):
+        return False
+    _start_runner(bot, job_id)
+    return True
+
+
+async def resume_broadcasts(bot: Bot) -> None:
+    """После старта: продолжить рассылки, прерванные остановкой процесса."""
+    async with async_session_maker() as session:
+        job_ids = list(
+            await session.scalars(
+                select(BroadcastJob.id).where(BroadcastJob.status == "running")
+            )
+        )
+    for job_id in job_ids:
+        logger.info("broadcast_resumed_after_restart job_id=%s", job_id)
+        await _recover_interrupted(job_id)
+        _start_runner(bot, job_id)
+
+
+async def stop_broadcasts() -> None:
+    """
+    Остановка процесса: даём доотправиться текущим пачкам (не дольше
+    _STOP_TIMEOUT), рассылки остаются running и продолжатся после рестарта.
+    Если пачка не успела — недоотправленные вернутся в pending.
+    """
+    global _stopping
+    _stopping = True
+
+    tasks = list(_runners.values())
+    if not tasks:
+        return
+    _, pending = await asyncio.wait(tasks, timeout=_STOP_TIMEOUT)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -13,6 +13,12 @@ from repositories import (
     set_connection_request_status,
     count_connection_requests_from_user_today,
 )
+from services.memo import memo_set, memoized
+from services.requested import (
+    note_connect_request_sent,
+    note_project_request_sent,
+    note_project_request_closed,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +62,8 @@ async def send_connect_request(
         to_id=to_id,
         project_id=None,
     )
+    memo_set("connection_request", req.id, req)
+    note_connect_request_sent(from_id=from_id, to_id=to_id)
     return req, "ok"
 
 
@@ -100,6 +108,8 @@ async def send_project_request(
         to_id=to_id,
         project_id=project_id,
     )
+    memo_set("connection_request", req.id, req)
+    note_project_request_sent(from_id=from_id, to_id=to_id, project_id=project_id)
     return req, "ok"
 
 
@@ -130,6 +140,14 @@ async def reject_connection_request(
         )
         return None
 
+    memo_set("connection_request", req.id, req)
+
+    if req.project_id is not None:
+        note_project_request_closed(
+            from_id=req.from_telegram_id,
+            project_id=req.project_id,
+        )
+
     logger.info(
         "connection_request_rejected request_id=%s from_id=%s to_id=%s status=%s",
         req.id,
@@ -146,10 +164,13 @@ async def get_connection_request(
     *,
     request_id: int,
 ) -> ConnectionRequest | None:
-    req = await get_connection_request_by_id(session, request_id)
-    logger.info(
-        "connection_request_fetched request_id=%s found=%s",
-        request_id,
-        bool(req),
-    )
-    return req
+    async def _fetch() -> ConnectionRequest | None:
+        req = await get_connection_request_by_id(session, request_id)
+        logger.info(
+            "connection_request_fetched request_id=%s found=%s",
+            request_id,
+            bool(req),
+        )
+        return req
+
+    return await memoized("connection_request", request_id, _fetch)
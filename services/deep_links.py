@@ -0,0 +1,148 @@
+# services/deep_links.py
+"""
+Ссылки вида t.me/<бот>?start=p_<id> на карточку проекта.
+
+Переходы по ссылкам считаем в памяти и раз в LINK_OPENS_FLUSH_SECONDS
+пишем в projects.link_opens одним пакетным UPDATE — а не UPDATE на
+каждый клик. При падении процесса теряется не больше одного окна.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from collections import Counter
+from typing import Any
+
+from sqlalchemy import bindparam, update
+
+from config import settings
+from db import async_session_maker
+from metrics import register_metrics
+from models import Project
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_PAYLOAD_RE = re.compile(r"^p_(\d{1,18})$")
+
+# project_id -> переходов с последней записи в БД
+_pending: Counter[int] = Counter()
+
+
+class _LinkOpensStats:
+    def __init__(self) -> None:
+        self.opens = 0
+        self.flushes = 0
+        self.flushed_opens = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "opens": self.opens,
+            "pending_projects": len(_pending),
+            "pending_opens": sum(_pending.values()),
+            "flushes": self.flushes,
+            "flushed_opens": self.flushed_opens,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+_stats = _LinkOpensStats()
+register_metrics("link_opens", _stats.stats)
+
+
+def project_start_payload(project_id: int) -> str:
+    return f"p_{project_id}"
+
+
+def parse_project_payload(payload: str | None) -> int | None:
+    """"p_42" -> 42; всё остальное -> None."""
+    if not payload:
+        return None
+    match = _PROJECT_PAYLOAD_RE.match(payload.strip())
+    return int(match.group(1)) if match else None
+
+
+def project_deep_link(bot_username: str, project_id: int) -> str:
+    return f"https://t.me/{bot_username}?start={project_start_payload(project_id)}"
+
+
+def note_project_link_open(project_id: int) -> None:
+    _pending[project_id] += 1
+    _stats.opens += 1
+
+
+async def flush_link_opens() -> int:
+    """
+    Записать накопленные переходы. Возвращает, сколько переходов записали.
+    Если запись не удалась — счётчики возвращаются в очередь.
+    """
+    if not _pending:
+        return 0
+
+    batch = dict(_pending)
+    _pending.clear()
+
+    table = Project.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("project_id"))
+        .values(
+            link_opens=table.c.link_opens + bindparam("opens"),
+            # счётчик — не правка проекта: updated_at (и ключи кэша карточек) не трогаем
+            updated_at=table.c.updated_at,
+        )
+    )
+
+    started = time.perf_counter()
+    try:
+        async with async_session_maker() as session:
+            await session.execute(
+                stmt,
+                [
+                    {"project_id": project_id, "opens": opens}
+                    for project_id, opens in batch.items()
+                ],
+            )
+            await session.commit()
+    except Exception:
+        _pending.update(batch)
+        _stats.failed_flushes += 1
+        raise
+
+    total = sum(batch.values())
+    _stats.flushes += 1
+    _stats.flushed_opens += total
+    _stats.last_flush_ms = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(
+        "link_opens_flushed projects=%s opens=%s duration_ms=%s",
+        len(batch),
+        total,
+        _stats.last_flush_ms,
+    )
+    return total
+
+
+async def link_opens_worker() -> None:
+    """Фоновая запись счётчиков; при остановке дописывает остаток."""
+    logger.info(
+        "link_opens_worker_started interval_seconds=%s",
+        settings.link_opens_flush_seconds,
+    )
+    try:
+        while True:
+            await asyncio.sleep(settings.link_opens_flush_seconds)
+            try:
+                await flush_link_opens()
+            except Exception:
+                logger.exception("link_opens_flush_failed")
+    except asyncio.CancelledError:
+        logger.info("link_opens_worker_cancelled")
+        try:
+            await flush_link_opens()
+        except Exception:
+            logger.exception("link_opens_final_flush_failed")
+        raise
@@ -0,0 +1,402 @@
+# services/digest.py
+"""
+Дайджест новых проектов: раз в DIGEST_PERIOD (день / неделя) каждому
+подходящему разработчику — одно сообщение со списком новых проектов.
+
+- create_user_project дописывает проект в журнал project_digest_log
+  (только коды ролей и стеков — всё, что нужно для подбора).
+- Прогон: новые записи журнала раскладываются в битовые маски
+  "роль -> проекты" и "стек -> проекты"; профили читаются пачками
+  (keyset по id), а подбор для профиля — пара OR/AND над масками.
+  Профили с одинаковыми ролью и стеком считаются один раз.
+  Запросов на пользователя нет.
+- Записи журнала забираются одним DELETE ... RETURNING, а прогон
+  пишется в digest_runs той же транзакцией до отправки (как у
+  напоминаний: лучше не прислать дайджест при падении, чем прислать
+  дважды). Два воркера не заберут одну запись: кому ничего не досталось,
+  тот ничего и не шлёт.
+- Отправка — через планировщик с фоновым приоритетом.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from aiogram import Bot
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from constants import LABELS, stack_codes_from_value
+from db import async_session_maker
+from metrics import register_metrics
+from models import DigestRun, Profile, Project, ProjectDigestEntry
+from services.deep_links import project_deep_link
+from services.sender import Priority, send_message
+from views import html_safe
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+# дайджест — тем, кто ищет проект или команду (и тем, кто цель не указал)
+_DIGEST_GOALS = {None, "find_project", "find_teammate"}
+
+# как часто воркер проверяет, не пора ли
+_CHECK_INTERVAL_SECONDS = 3600
+
+
+class _DigestStats:
+    def __init__(self) -> None:
+        self.runs = 0
+        self.last_entries = 0
+        self.last_profiles = 0
+        self.last_recipients = 0
+        self.last_match_ms = 0.0
+        self.sent = 0
+        self.failed = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "period": settings.digest_period,
+            "runs": self.runs,
+            "last_entries": self.last_entries,
+            "last_profiles": self.last_profiles,
+            "last_recipients": self.last_recipients,
+            "last_match_ms": self.last_match_ms,
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+
+_stats = _DigestStats()
+register_metrics("digest", _stats.stats)
+
+
+# ===== журнал =====
+
+
+def _role_codes(value: str | None) -> frozenset[str]:
+    """"Backend, Frontend" (лейблы или коды) -> {"backend", "frontend"}."""
+    if not value:
+        return frozenset()
+    codes = (LABELS.code("roles", token) for token in value.split(","))
+    return frozenset(code for code in codes if code)
+
+
+async def append_project_to_digest(session: AsyncSession, project: Project) -> None:
+    session.add(
+        ProjectDigestEntry(
+            project_id=project.id,
+            owner_telegram_id=project.owner_telegram_id,
+            role_codes=",".join(sorted(_role_codes(project.looking_for_role))),
+            stack_codes=",".join(sorted(stack_codes_from_value(project.stack))),
+        )
+    )
+    await session.commit()
+
+
+# ===== подбор =====
+
+
+@dataclass(frozen=True, slots=True)
+class _DigestProject:
+    project_id: int
+    owner_telegram_id: int
+    title: str
+    looking_for_role: str | None
+
+
+class DigestMatcher:
+    """
+    Новые проекты в виде битовых масок: бит i — i-й проект списка
+    (список отсортирован от новых к старым).
+    """
+
+    def __init__(self, rows: list[tuple[_DigestProject, frozenset[str], frozenset[str]]]) -> None:
+        self.projects = [project for project, _, _ in rows]
+        self.all_mask = (1 << len(rows)) - 1
+        self.any_role_mask = 0
+        self.any_stack_mask = 0
+        self.role_masks: dict[str, int] = {}
+        self.stack_masks: dict[str, int] = {}
+        self.owner_masks: dict[int, int] = {}
+        self._cache: dict[tuple[str | None, frozenset[str]], int] = {}
+
+        for bit, (project, roles, stacks) in enumerate(rows):
+            flag = 1 << bit
+            if roles:
+                for role in roles:
+                    self.role_masks[role] = self.role_masks.get(role, 0) | flag
+            else:
+                self.any_role_mask |= flag
+            if stacks:
+                for stack in stacks:
+                    self.stack_masks[stack] = self.stack_masks.get(stack, 0) | flag
+            else:
+                self.any_stack_mask |= flag
+            owner = project.owner_telegram_id
+            self.owner_masks[owner] = self.owner_masks.get(owner, 0) | flag
+
+    def _match_mask(self, role: str | None, stacks: frozenset[str]) -> int:
+        key = (role, stacks)
+        mask = self._cache.get(key)
+        if mask is None:
+            # роль: проект ищет эту роль или не уточнял
+            role_mask = self.any_role_mask
+            if role:
+                role_mask |= self.role_masks.get(role, 0)
+            # стек: пересечение или кто-то из двоих стек не указал
+            if stacks:
+                stack_mask = self.any_stack_mask
+                for stack in stacks:
+                    stack_mask |= self.stack_masks.get(stack, 0)
+            else:
+                stack_mask = self.all_mask
+            mask = self._cache[key] = role_mask & stack_mask
+        return mask
+
+    def match(
+        self,
+        telegram_id: int,
+        role: str | None,
+        stacks: frozenset[str],
+        limit: int,
+    ) -> tuple[list[_DigestProject], int]:
+        """До limit самых новых подходящих проектов (кроме своих) и сколько подошло всего."""
+        mask = self._match_mask(role, stacks) & ~self.owner_masks.get(telegram_id, 0)
+        total = mask.bit_count()
+        result: list[_DigestProject] = []
+        while mask and len(result) < limit:
+            low = mask & -mask
+            result.append(self.projects[low.bit_length() - 1])
+            mask ^= low
+        return result, total
+
+
+def format_digest(projects: list[_DigestProject], bot_username: str | None, more: int) -> str:
+    period = "за день" if settings.digest_period == "day" else "за неделю"
+    lines = [f"🗞 Новые проекты {period}, которые могут тебе подойти:\n"]
+    for project in projects:
+        title = html_safe(project.title, default="Без названия")
+        if bot_username:
+            title = f'<a href="{project_deep_link(bot_username, project.project_id)}">{title}</a>'
+        line = f"• {title}"
+        if project.looking_for_role:
+            line += f" — ищут: {html_safe(project.looking_for_role)}"
+        lines.append(line)
+    if more:
+        lines.append(f"\n…и ещё {more} — загляни в «🚀 Лента проектов».")
+    return "\n".join(lines)
+
+
+# ===== прогон =====
+
+
+async def _claim_entries(
+    session: AsyncSession,
+) -> tuple[int, list[tuple[_DigestProject, frozenset[str], frozenset[str]]]]:
+    """
+    Забрать все записи журнала: удаление и чтение — один запрос
+    (DELETE ... RETURNING), так что параллельный прогон другого воркера
+    те же записи уже не получит. Коммит — вместе с записью о прогоне.
+
+    Возвращает id последней забранной записи (0 — журнал был пуст)
+    и проекты, которые ещё активны, от новых к старым.
+    """
+    claimed = (
+        await session.execute(
+            delete(ProjectDigestEntry).returning(
+                ProjectDigestEntry.id,
+                ProjectDigestEntry.project_id,
+                ProjectDigestEntry.owner_telegram_id,
+                ProjectDigestEntry.role_codes,
+                ProjectDigestEntry.stack_codes,
+            )
+        )
+    ).all()
+    if not claimed:
+        return 0, []
+
+    projects = {
+        project_id: (title, looking_for_role)
+        for project_id, title, looking_for_role in await session.execute(
+            select(Project.id, Project.title, Project.looking_for_role).where(
+                Project.id.in_({row.project_id for row in claimed}),
+                Project.is_active.is_(True),
+            )
+        )
+    }
+    rows = []
+    for _, project_id, owner_id, role_codes, stack_codes in sorted(claimed, reverse=True):
+        project = projects.get(project_id)
+        if project is None:
+            continue
+        title, looking_for_role = project
+        rows.append(
+            (
+                _DigestProject(project_id, owner_id, title, looking_for_role),
+                frozenset(filter(None, role_codes.split(","))),
+                frozenset(filter(None, stack_codes.split(","))),
+            )
+        )
+    return max(row.id for row in claimed), rows
+
+
+async def run_digest(bot: Bot) -> int:
+    """Один прогон. Возвращает, скольким пользователям отправили дайджест."""
+    started = time.perf_counter()
+
+    async with async_session_maker() as session:
+        last_id, rows = await _claim_entries(session)
+
+        # прогон фиксируем до отправки; пустой — тоже, чтобы следующий
+        # был через период, а не сразу
+        run = DigestRun(
+            last_entry_id=last_id,
+            recipients=0,
+            finished_at=None if rows else datetime.utcnow(),
+        )
+        session.add(run)
+        await session.commit()
+
+    if not rows:
+        # журнал забрал другой воркер (или все проекты уже скрыты) — не шлём
+        logger.info("digest_run_skipped last_entry_id=%s", last_id)
+        return 0
+
+    matcher = DigestMatcher(rows)
+    me = await bot.me()
+    limit = settings.digest_max_projects
+    semaphore = asyncio.Semaphore(settings.digest_concurrency)
+    profiles_total = 0
+    recipients = 0
+    match_time = 0.0
+
+    async def _send(telegram_id: int, text: str) -> None:
+        async with semaphore:
+            try:
+                await send_message(
+                    bot,
+                    telegram_id,
+                    text,
+                    priority=Priority.BACKGROUND,
+                    disable_web_page_preview=True,
+                )
+                _stats.sent += 1
+            except Exception:
+                _stats.failed += 1
+                logger.debug("digest_send_failed telegram_id=%s", telegram_id)
+
+    last_profile_id = 0
+    while True:
+        async with async_session_maker() as session:
+            batch = (
+                await session.execute(
+                    select(Profile.id, Profile.telegram_id, Profile.role, Profile.stack, Profile.goals)
+                    .where(
+                        Profile.id > last_profile_id,
+                        Profile.is_active.is_(True),
+                        Profile.role.is_not(None),
+                    )
+                    .order_by(Profile.id)
+                    .limit(settings.digest_batch_size)
+                )
+            ).all()
+        if not batch:
+            break
+        last_profile_id = batch[-1][0]
+        profiles_total += len(batch)
+
+        match_started = time.perf_counter()
+        messages: list[tuple[int, str]] = []
+        for _, telegram_id, role, stack, goals in batch:
+            if LABELS.code("goals", goals) not in _DIGEST_GOALS:
+                continue
+            matched, total = matcher.match(
+                telegram_id,
+                LABELS.code("roles", role),
+                stack_codes_from_value(stack),
+                limit,
+            )
+            if not matched:
+                continue
+            messages.append((telegram_id, format_digest(matched, me.username, total - len(matched))))
+        match_time += time.perf_counter() - match_started
+
+        recipients += len(messages)
+        await asyncio.gather(*(_send(telegram_id, text) for telegram_id, text in messages))
+
+    await _finish_run(run.id, recipients)
+
+    _stats.runs += 1
+    _stats.last_entries = len(rows)
+    _stats.last_profiles = profiles_total
+    _stats.last_recipients = recipients
+    _stats.last_match_ms = round(match_time * 1000, 1)
+    logger.info(
+        "digest_run_done projects=%s profiles=%s recipients=%s match_ms=%s duration_s=%.2f",
+        len(rows),
+        profiles_total,
+        recipients,
+        _stats.last_match_ms,
+        time.perf_counter() - started,
+    )
+    return recipients
+
+
+async def _finish_run(run_id: int, recipients: int) -> None:
+    async with async_session_maker() as session:
+        await session.execute(
+            update(DigestRun)
+            .where(DigestRun.id == run_id)
+            .values(finished_at=datetime.utcnow(), recipients=recipients)
+        )
+        await session.commit()
+
+
+async def _next_run_at() -> datetime | None:
+    """Когда следующий прогон: через период после прошлого (или после первой записи журнала)."""
+    async with async_session_maker() as session:
+        last_run = await session.scalar(
+            select(DigestRun.started_at).order_by(DigestRun.id.desc()).limit(1)
+        )
+        if last_run is None:
+            last_run = await session.scalar(select(func.min(ProjectDigestEntry.created_at)))
+    if last_run is None:
+        return None
+    return last_run + _PERIODS[settings.digest_period]
+
+
+async def digest_worker(bot: Bot) -> None:
+    """Фоновая задача: прогон раз в DIGEST_PERIOD, время прогона — в БД (переживает рестарт)."""
+    logger.info(
+        "digest_worker_started period=%s max_projects=%s",
+        settings.digest_period,
+        settings.digest_max_projects,
+    )
+
+    while True:
+        try:
+            next_run = await _next_run_at()
+            if next_run is not None and next_run <= datetime.utcnow():
+                await run_digest(bot)
+                continue
+            delay = _CHECK_INTERVAL_SECONDS
+            if next_run is not None:
+                delay = min(delay, (next_run - datetime.utcnow()).total_seconds())
+        except asyncio.CancelledError:
+            logger.info("digest_worker_cancelled")
+            break
+        except Exception:
+            logger.exception("Error in digest worker loop")
+            delay = _CHECK_INTERVAL_SECONDS
+
+        await asyncio.sleep(max(delay, 1))
@@ -0,0 +1,101 @@
+# services/fanout.py
+"""
+Рассылка уведомлений по одному событию (принятие/отклонение заявки и т.п.).
+
+Раньше хендлер делал edit сообщения, отправку владельцу и отправку
+кандидату по очереди, и только потом отвечал на callback — пользователь
+ждал три round trip-а к Bot API. fan_out():
+- сначала отвечает на callback (если он есть);
+- затем запускает независимые отправки параллельно в TaskGroup,
+  не больше settings.fanout_concurrency одновременно;
+- падение одной отправки не отменяет остальные — ошибки собираются
+  по получателям и пишутся в лог.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from aiogram.types import CallbackQuery
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+Send = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class FanoutResult:
+    sent: list[str] = field(default_factory=list)
+    failed: dict[str, BaseException] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+async def _answer_callback(
+    callback: CallbackQuery,
+    text: str | None,
+    show_alert: bool,
+) -> None:
+    try:
+        await callback.answer(text, show_alert=show_alert)
+    except Exception:
+        # callback мог протухнуть — уведомления всё равно отправляем
+        logger.debug(
+            "fanout_callback_answer_failed user_id=%s",
+            callback.from_user.id,
+            exc_info=True,
+        )
+
+
+async def fan_out(
+    event: str,
+    sends: dict[str, Send],
+    *,
+    callback: CallbackQuery | None = None,
+    answer_text: str | None = None,
+    show_alert: bool = False,
+    concurrency: int | None = None,
+) -> FanoutResult:
+    """
+    sends: получатель (метка для логов) -> корутина-фабрика отправки.
+    Возвращает, кому ушло и кому нет; исключения наружу не пробрасывает.
+    """
+    if callback is not None:
+        await _answer_callback(callback, answer_text, show_alert)
+
+    result = FanoutResult()
+    limit = asyncio.Semaphore(concurrency or settings.fanout_concurrency)
+
+    async def _run(recipient: str, send: Send) -> None:
+        async with limit:
+            try:
+                await send()
+            except Exception as exc:
+                result.failed[recipient] = exc
+            else:
+                result.sent.append(recipient)
+
+    async with asyncio.TaskGroup() as group:
+        for recipient, send in sends.items():
+            group.create_task(_run(recipient, send))
+
+    for recipient, exc in result.failed.items():
+        logger.warning(
+            "fanout_send_failed event=%s recipient=%s error=%r",
+            event,
+            recipient,
+            exc,
+        )
+    logger.info(
+        "fanout_done event=%s sent=%s failed=%s",
+        event,
+        len(result.sent),
+        len(result.failed),
+    )
+    return result
@@ -0,0 +1,107 @@
+# services/memo.py
+from __future__ import annotations
+
+import contextvars
+from collections import Counter
+from typing import Any, Awaitable, Callable, Hashable
+
+_MISSING = object()
+
+
+class RequestMemo:
+    """
+    Identity map на время обработки одного апдейта.
+
+    Геттеры сервисов (get_profile / get_project / get_connection_request)
+    сначала смотрят сюда: повторный запрос той же сущности в рамках апдейта
+    отдаёт тот же объект без похода в кэш/БД. "Не найдено" (None) тоже
+    запоминается — внутри одного апдейта это не поменяется, если только
+    сам апдейт не сделал запись (а записи через сервисы память сбрасывают).
+    """
+
+    __slots__ = ("_values", "_lookups", "closed")
+
+    def __init__(self) -> None:
+        # (kind, key) -> value | None
+        self._values: dict[tuple[str, Hashable], Any] = {}
+        self._lookups: Counter[tuple[str, Hashable]] = Counter()
+        self.closed = False
+
+    def get(self, kind: str, key: Hashable) -> Any:
+        self._lookups[(kind, key)] += 1
+        return self._values.get((kind, key), _MISSING)
+
+    def set(self, kind: str, key: Hashable, value: Any) -> None:
+        self._values[(kind, key)] = value
+
+    def invalidate(self, kind: str, key: Hashable) -> None:
+        self._values.pop((kind, key), None)
+
+    def duplicates(self) -> dict[str, int]:
+        """Сколько повторных обращений было по каждому виду сущностей."""
+        result: Counter[str] = Counter()
+        for (kind, _), count in self._lookups.items():
+            if count > 1:
+                result[kind] += count - 1
+        return dict(result)
+
+    @property
+    def lookups(self) -> int:
+        return sum(self._lookups.values())
+
+
+_current_memo: contextvars.ContextVar[RequestMemo | None] = contextvars.ContextVar(
+    "request_memo",
+    default=None,
+)
+
+
+def current_memo() -> RequestMemo | None:
+    """Память текущего апдейта (None — вне апдейта, например в воркерах)."""
+    memo = _current_memo.get()
+    if memo is None or memo.closed:
+        return None
+    return memo
+
+
+def activate_memo(memo: RequestMemo) -> contextvars.Token:
+    return _current_memo.set(memo)
+
+
+def deactivate_memo(token: contextvars.Token) -> None:
+    memo = _current_memo.get()
+    if memo is not None:
+        # фоновые задачи, запущенные из апдейта, унаследовали контекст —
+        # после завершения апдейта они не должны видеть его память
+        memo.closed = True
+    _current_memo.reset(token)
+
+
+async def memoized(
+    kind: str,
+    key: Hashable,
+    loader: Callable[[], Awaitable[Any]],
+) -> Any:
+    memo = current_memo()
+    if memo is None:
+        return await loader()
+
+    value = memo.get(kind, key)
+    if value is not _MISSING:
+        return value
+
+    value = await loader()
+    memo.set(kind, key, value)
+    return value
+
+
+def memo_set(kind: str, key: Hashable, value: Any) -> None:
+    memo = current_memo()
+    if memo is not None:
+        memo.set(kind, key, value)
+
+
+def memo_invalidate(kind: str, key: Hashable) -> None:
+    memo = current_memo()
+    if memo is not None:
+        memo.invalidate(kind, key)
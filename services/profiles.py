@@ -1,22 +1,135 @@
 # services/profiles.py
 import logging
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Sequence
 
 from aiogram.types import User
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
-from models import Profile, ConnectionRequest
+from cache import LRUCache
+from config import settings
+from models import Profile
 from repositories import (
-    get_or_create_profile,
+    ensure_profile_exists as get_or_create_profile,
     get_profile_by_telegram_id,
     update_profile as repo_update_profile,
     search_profiles,
 )
+from shared_cache import TwoTierCache, bus
+from services.memo import memo_invalidate, memo_set, memoized
+from services.requested import CompactIdSet, get_user_request_sets
+from services.search import mark_search_index_stale
 
 logger = logging.getLogger(__name__)
 
 
+# ===== кэш профилей =====
+
+
+@dataclass(frozen=True, slots=True)
+class ProfileSnapshot:
+    """
+    Неизменяемый снимок строки профиля.
+
+    Именно его отдаёт get_profile: объект не привязан к сессии,
+    поэтому его можно безопасно держать в кэше и делить между апдейтами.
+    Поля совпадают с models.Profile, так что вьюхи работают с ним так же.
+    """
+
+    id: int
+    telegram_id: int
+    username: str | None
+    first_name: str | None
+    avatar_file_id: str | None
+    role: str | None
+    stack: str | None
+    framework: str | None
+    skills: str | None
+    goals: str | None
+    about: str | None
+    is_active: bool
+    created_at: datetime | None
+    updated_at: datetime | None
+
+    @classmethod
+    def from_model(cls, profile: Profile) -> "ProfileSnapshot":
+        return cls(
+            id=profile.id,
+            telegram_id=profile.telegram_id,
+            username=profile.username,
+            first_name=profile.first_name,
+            avatar_file_id=profile.avatar_file_id,
+            role=profile.role,
+            stack=profile.stack,
+            framework=profile.framework,
+            skills=profile.skills,
+            goals=profile.goals,
+            about=profile.about,
+            is_active=profile.is_active,
+            created_at=profile.created_at,
+            updated_at=profile.updated_at,
+        )
+
+    def to_dict(self) -> dict:
+        """Для L2-кэша: JSON-совместимый dict (даты — ISO-строки)."""
+        data = {field: getattr(self, field) for field in self.__slots__}
+        for field in ("created_at", "updated_at"):
+            if data[field] is not None:
+                data[field] = data[field].isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ProfileSnapshot":
+        data = dict(data)
+        for field in ("created_at", "updated_at"):
+            if data.get(field) is not None:
+                data[field] = datetime.fromisoformat(data[field])
+        return cls(**data)
+
+
+# telegram_id -> ProfileSnapshot
+# L1 в процессе + L2 общий для воркеров; инвалидации расходятся по шине
+_profile_cache: TwoTierCache = TwoTierCache(
+    "profile",
+    settings.profile_cache_size,
+    encode=ProfileSnapshot.to_dict,
+    decode=ProfileSnapshot.from_dict,
+    ttl=settings.profile_cache_ttl_seconds,
+    name="profile_cache",
+)
+
+# telegram_id, по которым профиля нет: старые кнопки devfeed_request:<id>
+# и им подобные не должны каждый раз ходить в БД
+_missing_profiles: LRUCache[int, bool] = LRUCache(
+    settings.negative_cache_size,
+    ttl=settings.negative_cache_ttl_seconds,
+    name="profile_negative_cache",
+)
+# профиль создали/изменили в другом воркере — "не найдено" больше не верно
+bus.subscribe("profile", lambda key: _missing_profiles.invalidate(key))
+
+
+def _store_profile_snapshot(profile: Profile) -> None:
+    """После записи в БД кладём свежий снимок в оба уровня кэша."""
+    snapshot = ProfileSnapshot.from_model(profile)
+    _missing_profiles.invalidate(profile.telegram_id)
+    _profile_cache.store(profile.telegram_id, snapshot)
+    memo_set("profile", profile.telegram_id, snapshot)
+    mark_search_index_stale()
+
+
+def invalidate_profile_cache(telegram_id: int) -> None:
+    _profile_cache.invalidate(telegram_id)
+    memo_invalidate("profile", telegram_id)
+
+
+def get_profile_cache_stats() -> dict:
+    data = _profile_cache.stats()
+    data["negative"] = _missing_profiles.stats()
+    return data
+
+
 async def ensure_profile(
     session: AsyncSession,
     tg_user: User,
@@ -30,6 +143,7 @@ async def ensure_profile(
         telegram_id=tg_user.id,
         username=tg_user.username,
     )
+    _store_profile_snapshot(profile)
     logger.info(
         "profile_ensured telegram_id=%s username=%s profile_id=%s",
         tg_user.id,
@@ -42,20 +156,48 @@ async def ensure_profile(
 async def get_profile(
     session: AsyncSession,
     telegram_id: int,
-) -> Profile | None:
-    profile = await get_profile_by_telegram_id(session, telegram_id)
-    logger.info(
-        "profile_fetched telegram_id=%s found=%s",
-        telegram_id,
-        bool(profile),
-    )
-    return profile
+) -> ProfileSnapshot | None:
+    """
+    Профиль по telegram_id через read-through кэш.
+
+    Возвращаем неизменяемый ProfileSnapshot (а не ORM-объект):
+    менять профиль нужно через update_profile_data.
+    """
+    loaded_from_db = False
+
+    async def _load() -> ProfileSnapshot | None:
+        nonlocal loaded_from_db
+        loaded_from_db = True
+        profile = await get_profile_by_telegram_id(session, telegram_id)
+        return ProfileSnapshot.from_model(profile) if profile else None
+
+    async def _fetch() -> ProfileSnapshot | None:
+        if _missing_profiles.get(telegram_id):
+            logger.info(
+                "profile_fetched telegram_id=%s found=False negative_cached=True",
+                telegram_id,
+            )
+            return None
+
+        snapshot = await _profile_cache.get_or_load(telegram_id, _load)
+        if snapshot is None:
+            _missing_profiles.set(telegram_id, True)
+        logger.info(
+            "profile_fetched telegram_id=%s found=%s cached=%s",
+            telegram_id,
+            bool(snapshot),
+            not loaded_from_db,
+        )
+        return snapshot
+
+    # повторные запросы в рамках апдейта отдаём из памяти апдейта
+    return await memoized("profile", telegram_id, _fetch)
 
 
 async def update_profile_data(
     session: AsyncSession,
     *,
-    profile: Profile | None = None,
+    profile: Profile | ProfileSnapshot | None = None,
     telegram_id: int | None = None,
     first_name: str | None = None,
     avatar_file_id: str | None = None,
@@ -70,7 +212,7 @@ async def update_profile_data(
     Обновление профиля через сервисный слой.
 
     Можно передать:
-    - либо profile=Profile,
+    - либо profile=Profile / ProfileSnapshot,
     - либо telegram_id=... (если профиля на руках нет).
 
     В репозиторий уходит только telegram_id + поля для обновления.
@@ -108,6 +250,11 @@ async def update_profile_data(
         about=about,
     )
 
+    if updated_profile:
+        _store_profile_snapshot(updated_profile)
+    else:
+        invalidate_profile_cache(telegram_id)
+
     logger.info(
         "profile_updated telegram_id=%s updated_fields=%s success=%s",
         telegram_id,
@@ -141,25 +288,14 @@ def _is_profile_empty(profile: Profile) -> bool:
 async def _get_requested_ids_for_user(
     session: AsyncSession,
     requester_id: int,
-) -> set[int]:
+) -> CompactIdSet:
     """
-    Возвращаем множество telegram_id тех, кому юзер уже отправлял заявки
+    Множество telegram_id тех, кому юзер уже отправлял заявки
     (любого статуса: pending / accepted / rejected).
+    Живёт в памяти процесса, см. services.requested.
     """
-    stmt = select(ConnectionRequest.to_telegram_id).where(
-        ConnectionRequest.from_telegram_id == requester_id,
-    )
-    result = await session.execute(stmt)
-    rows = result.fetchall()
-    ids = {row[0] for row in rows}
-
-    logger.info(
-        "profiles_requested_ids_loaded requester_id=%s count=%s",
-        requester_id,
-        len(ids),
-    )
-
-    return ids
+    sets = await get_user_request_sets(session, requester_id)
+    return sets.requested_profiles
 
 
 # ===== поиск профилей для ленты =====
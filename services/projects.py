@@ -2,14 +2,136 @@
 import logging
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
-from models import Project, ConnectionRequest
-from repositories import create_project, list_projects, get_project_by_id
+from cache import AsyncLRUCache, LRUCache
+from config import settings
+from constants import LABELS
+from models import Project
+from repositories import (
+    create_project,
+    list_projects,
+    list_project_feed_candidates,
+    get_project_by_id,
+)
+from shared_cache import bus
+from services.digest import append_project_to_digest
+from services.memo import memo_set, memoized
+from services.requested import CompactIdSet, get_user_request_sets
+from services.search import mark_search_index_stale
 
 logger = logging.getLogger(__name__)
 
 
+# ===== общий кэш кандидатов ленты =====
+
+# Версия ленты: любое изменение набора проектов (новый проект) её повышает,
+# и все закэшированные списки кандидатов перестают использоваться.
+_feed_version = 0
+
+# (version, role, stack, level, base_size) -> ((project_id, owner_telegram_id), ...)
+_feed_candidates_cache: AsyncLRUCache[tuple, tuple[tuple[int, int], ...]] = (
+    AsyncLRUCache(
+        256,
+        ttl=settings.project_feed_cache_ttl_seconds,
+        name="project_feed_cache",
+    )
+)
+
+
+def _bump_local_feed_version() -> int:
+    global _feed_version
+    _feed_version += 1
+    logger.info("projects_feed_version_bumped version=%s", _feed_version)
+    return _feed_version
+
+
+def bump_projects_feed_version() -> int:
+    """
+    Публикуем новую версию ленты проектов (и рассылаем её другим воркерам).
+    Старые списки кандидатов не удаляем руками — они просто больше
+    не запрашиваются и уходят по TTL/LRU.
+    """
+    version = _bump_local_feed_version()
+    bus.publish("projects_feed")
+    return version
+
+
+bus.subscribe("projects_feed", lambda _key: _bump_local_feed_version())
+
+
+def _normalize_filter(kind: str, value: str | None) -> str | None:
+    # "Backend" / "backend" / " BACKEND " -> один и тот же ключ кэша
+    if not value:
+        return None
+    return LABELS.code(kind, value) or value.strip().casefold()
+
+
+def _feed_filter_term(kind: str, key: str | None) -> str | None:
+    """
+    Нормализованный ключ фильтра -> подстрока для ILIKE.
+    В projects хранятся лейблы ("Node.js", "Python + React"), а не коды,
+    поэтому известный код переводим обратно в лейбл; свой вариант
+    пользователя ищем как есть.
+    """
+    if not key:
+        return None
+    return LABELS.label(kind, key)
+
+
+async def _get_feed_candidates(
+    session: AsyncSession,
+    *,
+    role: str | None,
+    stack: str | None,
+    level: str | None,
+    base_size: int,
+) -> tuple[tuple[int, int], ...]:
+    """
+    Базовый (общий для всех пользователей) список кандидатов по фильтрам.
+    Одновременные промахи по одной комбинации фильтров делают один запрос.
+    """
+    role_key = _normalize_filter("roles", role)
+    stack_key = _normalize_filter("stacks", stack)
+    key = (_feed_version, role_key, stack_key, level, base_size)
+
+    async def _load() -> tuple[tuple[int, int], ...]:
+        # запрос строим только из ключа: иначе "Node.js" и "nodejs" делили бы
+        # результат того, кто пришёл первым
+        rows = await list_project_feed_candidates(
+            session,
+            limit=base_size,
+            role=_feed_filter_term("roles", role_key),
+            stack=_feed_filter_term("stacks", stack_key),
+            level=level,
+        )
+        logger.info(
+            "projects_feed_candidates_loaded role=%s stack=%s level=%s count=%s version=%s",
+            role_key,
+            stack_key,
+            level,
+            len(rows),
+            key[0],
+        )
+        return tuple(rows)
+
+    return await _feed_candidates_cache.get_or_load(key, _load)
+
+
+# id проектов, которых нет в БД (удалённые / выдуманные в project_apply:<id>)
+_missing_projects: LRUCache[int, bool] = LRUCache(
+    settings.negative_cache_size,
+    ttl=settings.negative_cache_ttl_seconds,
+    name="project_negative_cache",
+)
+bus.subscribe("project", lambda key: _missing_projects.invalidate(key))
+
+
+def get_projects_feed_cache_stats() -> dict:
+    data = _feed_candidates_cache.stats()
+    data["version"] = _feed_version
+    return data
+
+
 async def create_user_project(
     session: AsyncSession,
     *,
@@ -48,6 +170,15 @@ async def create_user_project(
         chat_link=chat_link,
     )
 
+    # новый проект должен сразу появиться в ленте у всех
+    bump_projects_feed_version()
+    _missing_projects.invalidate(project.id)
+    bus.publish("project", project.id)
+    memo_set("project", project.id, project)
+    mark_search_index_stale()
+    # попадёт в ближайший дайджест подходящим разработчикам
+    await append_project_to_digest(session, project)
+
     logger.info(
         "project_created owner_telegram_id=%s project_id=%s title=%r status=%r stack=%r level=%r",
         owner_telegram_id,
@@ -64,30 +195,17 @@ async def create_user_project(
 async def _get_blocked_project_ids_for_user(
     session: AsyncSession,
     requester_id: int,
-) -> set[int]:
+) -> CompactIdSet:
     """
     Множество id проектов, по которым пользователь уже:
     - отправил заявку (pending),
     - или уже принят (accepted).
 
     Такие проекты в ленте ему не показываем, чтобы не спамить.
+    Множество живёт в памяти процесса, см. services.requested.
     """
-    stmt = select(ConnectionRequest.project_id).where(
-        ConnectionRequest.from_telegram_id == requester_id,
-        ConnectionRequest.project_id.is_not(None),
-        ConnectionRequest.status.in_(["pending", "accepted"]),
-    )
-    result = await session.execute(stmt)
-    rows = result.scalars().all()
-    blocked_ids = {pid for pid in rows if pid is not None}
-
-    logger.info(
-        "projects_blocked_ids_loaded requester_id=%s count=%s",
-        requester_id,
-        len(blocked_ids),
-    )
-
-    return blocked_ids
+    sets = await get_user_request_sets(session, requester_id)
+    return sets.blocked_projects
 
 
 async def get_projects_feed(
@@ -180,14 +298,86 @@ async def get_projects_feed(
     return projects
 
 
+async def get_projects_feed_ids(
+    session: AsyncSession,
+    *,
+    requester_id: int,
+    limit: int = 20,
+    role: str | None = None,
+    stack: str | None = None,
+    level: str | None = None,
+) -> list[int]:
+    """
+    id проектов для ленты пользователя.
+
+    Базовый список по фильтрам берём из общего кэша (короткий TTL),
+    а персонально для пользователя только вычитаем:
+      - его собственные проекты,
+      - проекты, на которые он уже откликался / в которых уже принят.
+    """
+    base_size = max(settings.project_feed_base_size, limit * 3)
+    candidates = await _get_feed_candidates(
+        session,
+        role=role,
+        stack=stack,
+        level=level,
+        base_size=base_size,
+    )
+    blocked_project_ids = await _get_blocked_project_ids_for_user(session, requester_id)
+
+    ids: list[int] = []
+    skipped_own = 0
+    skipped_blocked = 0
+
+    for project_id, owner_id in candidates:
+        if owner_id == requester_id:
+            skipped_own += 1
+            continue
+        if project_id in blocked_project_ids:
+            skipped_blocked += 1
+            continue
+
+        ids.append(project_id)
+        if len(ids) >= limit:
+            break
+
+    logger.info(
+        "projects_feed_ids requester_id=%s role=%s stack=%s level=%s limit=%s "
+        "base_count=%s result_count=%s skipped_own=%s skipped_blocked=%s",
+        requester_id,
+        role,
+        stack,
+        level,
+        limit,
+        len(candidates),
+        len(ids),
+        skipped_own,
+        skipped_blocked,
+    )
+
+    return ids
+
+
 async def get_project(
     session: AsyncSession,
     project_id: int,
 ) -> Project | None:
-    project = await get_project_by_id(session, project_id)
-    logger.info(
-        "project_fetched project_id=%s found=%s",
-        project_id,
-        bool(project),
-    )
-    return project
+    async def _fetch() -> Project | None:
+        if _missing_projects.get(project_id):
+            logger.info(
+                "project_fetched project_id=%s found=False negative_cached=True",
+                project_id,
+            )
+            return None
+
+        project = await get_project_by_id(session, project_id)
+        if project is None:
+            _missing_projects.set(project_id, True)
+        logger.info(
+            "project_fetched project_id=%s found=%s",
+            project_id,
+            bool(project),
+        )
+        return project
+
+    return await memoized("project", project_id, _fetch)
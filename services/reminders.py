@@ -2,9 +2,10 @@
 
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
 
-from sqlalchemy import select, and_
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from aiogram import Bot
@@ -12,6 +13,7 @@ from aiogram import Bot
 from config import settings
 from db import async_session_maker
 from models import ConnectionRequest
+from services.sender import Priority, send_message
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +22,19 @@ logger = logging.getLogger(__name__)
 # Через сколько дней после принятия заявки напоминать
 REMINDERS_AFTER_DAYS = settings.reminders_after_days
 
-# Как часто запускать проверку и окно для попадания в напоминание (в часах)
+# Как часто запускать проверку (в часах)
 REMINDERS_INTERVAL_HOURS = settings.reminders_interval_hours
 
+# Сколько заявок читаем за раз и сколько отправок держим одновременно
+REMINDERS_BATCH_SIZE = settings.reminders_batch_size
+REMINDERS_CONCURRENCY = settings.reminders_concurrency
+
+REMINDER_TEXT = (
+    "Напоминание о контакте в Link IT.\n\n"
+    "У тебя есть принятая заявка на общение, но, кажется, давно не было активности.\n"
+    "Если тема ещё актуальна — можешь написать собеседнику 🙂"
+)
+
 
 # ===== рабочий цикл напоминаний =====
 
@@ -30,19 +42,21 @@ REMINDERS_INTERVAL_HOURS = settings.reminders_interval_hours
 async def reminders_worker(bot: Bot) -> None:
     """
     Фоновая задача:
-    раз в REMINDERS_INTERVAL_HOURS часов проверяет принятые заявки
-    и рассылает мягкие напоминания.
+    раз в REMINDERS_INTERVAL_HOURS часов рассылает напоминания по принятым
+    заявкам, по которым их ещё не было (reminded_at IS NULL).
+    Прогон идемпотентен: после рестарта продолжит с того же места.
     """
     logger.info(
-        "reminders_worker_started interval_hours=%s days_after=%s",
+        "reminders_worker_started interval_hours=%s days_after=%s batch=%s concurrency=%s",
         REMINDERS_INTERVAL_HOURS,
         REMINDERS_AFTER_DAYS,
+        REMINDERS_BATCH_SIZE,
+        REMINDERS_CONCURRENCY,
     )
 
     while True:
         try:
-            async with async_session_maker() as session:
-                await _process_reminders(bot, session)
+            await _process_reminders(bot)
         except asyncio.CancelledError:
             logger.info("reminders_worker_cancelled")
             break
@@ -52,56 +66,73 @@ async def reminders_worker(bot: Bot) -> None:
         await asyncio.sleep(REMINDERS_INTERVAL_HOURS * 3600)
 
 
-async def _process_reminders(bot: Bot, session: AsyncSession) -> None:
+async def _claim_batch(
+    session: AsyncSession,
+    *,
+    after_id: int,
+    cutoff: datetime,
+    now: datetime,
+) -> list[tuple[int, int, int]]:
     """
-    Ищем заявки со статусом accepted, у которых responded_at в окне:
-    [now - REMINDERS_AFTER_DAYS - REMINDERS_INTERVAL_HOURS, now - REMINDERS_AFTER_DAYS]
-
-    Так каждая принятая заявка попадёт в окно максимум один раз.
+    Следующая пачка (keyset по id) принятых заявок без напоминания.
+    Сразу ставим им reminded_at: лучше не напомнить при падении посреди
+    пачки, чем напомнить дважды.
     """
-    now = datetime.utcnow()
-
-    cutoff = now - timedelta(days=REMINDERS_AFTER_DAYS)
-    window_start = cutoff - timedelta(hours=REMINDERS_INTERVAL_HOURS)
-
-    logger.debug(
-        "reminders_window now=%s window_start=%s cutoff=%s",
-        now.isoformat(),
-        window_start.isoformat(),
-        cutoff.isoformat(),
-    )
-
-    stmt = select(ConnectionRequest).where(
-        and_(
+    stmt = (
+        select(
+            ConnectionRequest.id,
+            ConnectionRequest.from_telegram_id,
+            ConnectionRequest.to_telegram_id,
+        )
+        .where(
+            ConnectionRequest.id > after_id,
             ConnectionRequest.status == "accepted",
             ConnectionRequest.responded_at.is_not(None),
-            ConnectionRequest.responded_at >= window_start,
             ConnectionRequest.responded_at <= cutoff,
+            ConnectionRequest.reminded_at.is_(None),
         )
+        .order_by(ConnectionRequest.id)
+        .limit(REMINDERS_BATCH_SIZE)
     )
+    rows = [(row[0], row[1], row[2]) for row in (await session.execute(stmt)).all()]
+    if not rows:
+        return rows
+
+    await session.execute(
+        update(ConnectionRequest)
+        .where(
+            ConnectionRequest.id.in_([row[0] for row in rows]),
+            ConnectionRequest.reminded_at.is_(None),
+        )
+        .values(reminded_at=now)
+    )
+    await session.commit()
+    return rows
 
-    result = await session.execute(stmt)
-    requests = list(result.scalars().all())
-
-    if not requests:
-        logger.debug("No connection requests for reminders")
-        return
-
-    logger.info("Found %d accepted requests for reminders", len(requests))
 
-    text = (
-        "Напоминание о контакте в Link IT.\n\n"
-        "У тебя есть принятая заявка на общение, но, кажется, давно не было активности.\n"
-        "Если тема ещё актуальна — можешь написать собеседнику 🙂"
-    )
+async def _process_reminders(bot: Bot) -> None:
+    """
+    Один прогон: идём по кандидатам пачками, отправляем через планировщик
+    (лимиты Telegram соблюдает он), одновременно не больше
+    REMINDERS_CONCURRENCY отправок.
+    """
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=REMINDERS_AFTER_DAYS)
 
+    semaphore = asyncio.Semaphore(REMINDERS_CONCURRENCY)
     success = 0
     failed = 0
+    requests_total = 0
+    batches = 0
 
-    for req in requests:
-        for chat_id in {req.from_telegram_id, req.to_telegram_id}:
+    async def _send(chat_id: int, request_id: int) -> None:
+        nonlocal success, failed
+        async with semaphore:
             try:
-                await bot.send_message(chat_id=chat_id, text=text)
+                await send_message(
+                    bot, chat_id, REMINDER_TEXT, priority=Priority.BACKGROUND
+                )
                 success += 1
             except Exception:
                 failed += 1
@@ -109,12 +140,39 @@ async def _process_reminders(bot: Bot, session: AsyncSession) -> None:
                 logger.debug(
                     "Failed to send reminder to %s for request %s",
                     chat_id,
-                    req.id,
+                    request_id,
                 )
 
+    last_id = 0
+    while True:
+        async with async_session_maker() as session:
+            rows = await _claim_batch(session, after_id=last_id, cutoff=cutoff, now=now)
+        if not rows:
+            break
+
+        batches += 1
+        requests_total += len(rows)
+        last_id = rows[-1][0]
+
+        await asyncio.gather(
+            *(
+                _send(chat_id, request_id)
+                for request_id, from_id, to_id in rows
+                for chat_id in {from_id, to_id}
+            )
+        )
+
+    duration = time.perf_counter() - started
+    if not requests_total:
+        logger.debug("No connection requests for reminders duration_ms=%.1f", duration * 1000)
+        return
+
     logger.info(
-        "reminders_sent success=%s failed=%s requests=%s",
+        "reminders_sent success=%s failed=%s requests=%s batches=%s duration_s=%.2f rate_per_s=%.1f",
         success,
         failed,
-        len(requests),
+        requests_total,
+        batches,
+        duration,
+        (success + failed) / duration if duration else 0.0,
     )
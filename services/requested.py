@@ -0,0 +1,156 @@
+# services/requested.py
+import logging
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import AsyncLRUCache
+from config import settings
+from models import ConnectionRequest
+from shared_cache import bus
+
+logger = logging.getLogger(__name__)
+
+# статусы проектной заявки, при которых проект в ленте больше не показываем
+_BLOCKING_PROJECT_STATUSES = ("pending", "accepted")
+
+
+class CompactIdSet:
+    """
+    Компактное множество id: отсортированный array('q').
+
+    8 байт на id вместо ~60+ у set[int] — заметно для "старых" пользователей
+    с сотнями заявок. Поиск — бинарный, вставка — O(n), но вставки редкие
+    (одна на отправленную заявку).
+    """
+
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids: Iterable[int] = ()) -> None:
+        self._ids = array("q", sorted(set(ids)))
+
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, int):
+            return False
+        i = bisect_left(self._ids, value)
+        return i < len(self._ids) and self._ids[i] == value
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def add(self, value: int) -> None:
+        i = bisect_left(self._ids, value)
+        if i < len(self._ids) and self._ids[i] == value:
+            return
+        self._ids.insert(i, value)
+
+    def discard(self, value: int) -> None:
+        i = bisect_left(self._ids, value)
+        if i < len(self._ids) and self._ids[i] == value:
+            del self._ids[i]
+
+    @property
+    def nbytes(self) -> int:
+        return self._ids.itemsize * len(self._ids)
+
+
+@dataclass(slots=True)
+class UserRequestSets:
+    # telegram_id всех, кому пользователь отправлял заявки (любого статуса)
+    requested_profiles: CompactIdSet
+    # id проектов с его pending / accepted заявкой
+    blocked_projects: CompactIdSet
+
+
+# requester telegram_id -> UserRequestSets
+_user_sets: AsyncLRUCache[int, UserRequestSets] = AsyncLRUCache(
+    settings.user_request_sets_cache_size,
+    name="user_request_sets",
+)
+# заявку отправили через другой воркер — перечитаем множества из БД
+bus.subscribe("user_request_sets", lambda key: _user_sets.invalidate(key))
+
+
+async def get_user_request_sets(
+    session: AsyncSession,
+    requester_id: int,
+) -> UserRequestSets:
+    """
+    Множества "уже откликался" для пользователя.
+    Из БД читаем один раз (одним запросом на оба множества),
+    дальше поддерживаем их инкрементально через note_* функции.
+    """
+
+    async def _load() -> UserRequestSets:
+        stmt = select(
+            ConnectionRequest.to_telegram_id,
+            ConnectionRequest.project_id,
+            ConnectionRequest.status,
+        ).where(ConnectionRequest.from_telegram_id == requester_id)
+        rows = (await session.execute(stmt)).all()
+
+        sets = UserRequestSets(
+            requested_profiles=CompactIdSet(row[0] for row in rows),
+            blocked_projects=CompactIdSet(
+                row[1]
+                for row in rows
+                if row[1] is not None and row[2] in _BLOCKING_PROJECT_STATUSES
+            ),
+        )
+        logger.info(
+            "user_request_sets_loaded requester_id=%s rows=%s requested=%s blocked_projects=%s",
+            requester_id,
+            len(rows),
+            len(sets.requested_profiles),
+            len(sets.blocked_projects),
+        )
+        return sets
+
+    return await _user_sets.get_or_load(requester_id, _load)
+
+
+def _loaded_sets(requester_id: int) -> UserRequestSets | None:
+    # у других воркеров множества этого пользователя устарели
+    bus.publish("user_request_sets", requester_id)
+    sets = _user_sets.peek(requester_id)
+    if sets is None:
+        # Множества ещё не загружены (или загружаются прямо сейчас) —
+        # сбрасываем идущую загрузку, чтобы она не сохранила данные до этой записи.
+        _user_sets.invalidate(requester_id)
+    return sets
+
+
+def note_connect_request_sent(*, from_id: int, to_id: int) -> None:
+    sets = _loaded_sets(from_id)
+    if sets is not None:
+        sets.requested_profiles.add(to_id)
+
+
+def note_project_request_sent(*, from_id: int, to_id: int, project_id: int) -> None:
+    sets = _loaded_sets(from_id)
+    if sets is not None:
+        sets.requested_profiles.add(to_id)
+        sets.blocked_projects.add(project_id)
+
+
+def note_project_request_closed(*, from_id: int, project_id: int) -> None:
+    """Проектную заявку отклонили — проект снова можно показывать в ленте."""
+    sets = _loaded_sets(from_id)
+    if sets is not None:
+        sets.blocked_projects.discard(project_id)
+
+
+def get_user_request_sets_stats() -> dict:
+    data = _user_sets.stats()
+    data["approx_bytes"] = sum(
+        sets.requested_profiles.nbytes + sets.blocked_projects.nbytes
+        for sets in _user_sets.values()
+    )
+    return data
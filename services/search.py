@@ -0,0 +1,333 @@
+# services/search.py
+"""
+Поиск проектов и разработчиков для inline-режима (@бот python backend).
+
+- Инвертированный индекс в памяти: токен -> {документ: вес}. Документ —
+  активный проект или непустой профиль, карточка отрендерена заранее.
+- Запрос: все токены должны совпасть (по префиксу — пользователь ещё
+  печатает), ранжирование по сумме весов полей, при равенстве — новее выше.
+- Индекс перестраивается целиком раз в SEARCH_INDEX_TTL_SECONDS или
+  сразу после изменений (mark_search_index_stale). Пока идёт перестройка,
+  отвечаем по старому индексу.
+- Результаты кэшируются по нормализованному запросу на короткий TTL.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from sqlalchemy import select
+
+from cache import LRUCache
+from config import settings
+from constants import LABELS, stack_codes_from_value
+from db import async_session_maker
+from metrics import register_metrics
+from models import Profile, Project
+from shared_cache import bus
+from views import format_profile_public, format_project_card
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[\w+#]+")
+
+# вес совпадения по полю
+_WEIGHT_TITLE = 3
+_WEIGHT_TAG = 2
+_WEIGHT_TEXT = 1
+
+# чаще перестраивать индекс нет смысла, даже если правки идут потоком
+_MIN_REBUILD_INTERVAL = 5.0
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.casefold())
+
+
+def normalize_query(query: str) -> str:
+    """"  Python   BACKEND " -> "python backend" — ключ кэша выдачи."""
+    return " ".join(tokenize(query))
+
+
+@dataclass(frozen=True, slots=True)
+class SearchDoc:
+    kind: str  # "project" | "profile"
+    entity_id: int
+    title: str
+    description: str
+    text: str
+    photo: str | None
+
+
+def _tag_tokens(kind: str, value: str | None) -> list[str]:
+    """Код и лейбл (роль / стек): ищется и "nodejs", и "node.js"."""
+    if not value:
+        return []
+    tokens = tokenize(value)
+    code = LABELS.code(kind, value)
+    if code:
+        tokens += tokenize(code)
+        tokens += tokenize(LABELS.label(kind, code))
+    return tokens
+
+
+def _stack_tokens(stack: str | None) -> list[str]:
+    tokens = tokenize(stack)
+    for code in stack_codes_from_value(stack):
+        tokens += tokenize(code)
+        tokens += tokenize(LABELS.label("stacks", code))
+    return tokens
+
+
+def _short(text: str | None, limit: int = 120) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+class SearchIndex:
+    def __init__(self) -> None:
+        self.docs: dict[tuple[str, int], SearchDoc] = {}
+        self._postings: dict[str, dict[tuple[str, int], int]] = {}
+        # отсортированный словарь — для поиска по префиксу
+        self._vocabulary: list[str] = []
+        self.built_at = 0.0
+
+    def add(self, doc: SearchDoc, weighted: Iterable[tuple[int, Iterable[str]]]) -> None:
+        key = (doc.kind, doc.entity_id)
+        self.docs[key] = doc
+        for weight, tokens in weighted:
+            for token in tokens:
+                postings = self._postings.setdefault(token, {})
+                if postings.get(key, 0) < weight:
+                    postings[key] = weight
+
+    def freeze(self) -> None:
+        self._vocabulary = sorted(self._postings)
+        self.built_at = time.monotonic()
+
+    def _prefix_matches(self, prefix: str) -> dict[tuple[str, int], int]:
+        matches: dict[tuple[str, int], int] = {}
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            for key, weight in self._postings[token].items():
+                # точное совпадение токена ценнее префиксного
+                score = weight * 2 if token == prefix else weight
+                if matches.get(key, 0) < score:
+                    matches[key] = score
+        return matches
+
+    def search(self, query: str, limit: int) -> list[tuple[str, int]]:
+        tokens = tokenize(query)
+        if not tokens:
+            # пустой запрос — просто свежие проекты
+            projects = [key for key in self.docs if key[0] == "project"]
+            projects.sort(key=lambda key: key[1], reverse=True)
+            return projects[:limit]
+
+        scores: dict[tuple[str, int], int] | None = None
+        for token in tokens:
+            matches = self._prefix_matches(token)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {
+                    key: score + matches[key]
+                    for key, score in scores.items()
+                    if key in matches
+                }
+            if not scores:
+                return []
+
+        ranked = sorted(
+            scores.items(),
+            # проекты выше профилей при равном счёте, затем новее
+            key=lambda item: (-item[1], item[0][0] != "project", -item[0][1]),
+        )
+        return [key for key, _ in ranked[:limit]]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "docs": len(self.docs),
+            "tokens": len(self._postings),
+            "age_seconds": round(time.monotonic() - self.built_at, 1)
+            if self.built_at
+            else None,
+        }
+
+
+def _is_profile_searchable(profile: Profile) -> bool:
+    return bool(profile.is_active) and any(
+        value and str(value).strip()
+        for value in (profile.role, profile.stack, profile.skills, profile.about)
+    )
+
+
+def _add_project(index: SearchIndex, project: Project) -> None:
+    # текст — напрямую через format_*: переиндексация всей базы не должна
+    # вытеснять из кэша карточек то, что сейчас листают в лентах
+    role_label = LABELS.label("roles", project.looking_for_role, "")
+    index.add(
+        SearchDoc(
+            kind="project",
+            entity_id=project.id,
+            title=f"📁 {_short(project.title, 60)}",
+            description=_short(
+                " · ".join(v for v in (role_label, project.level, project.idea) if v)
+            ),
+            text=format_project_card(project),
+            photo=project.image_file_id or None,
+        ),
+        [
+            (_WEIGHT_TITLE, tokenize(project.title)),
+            (_WEIGHT_TAG, _tag_tokens("roles", project.looking_for_role)),
+            (_WEIGHT_TAG, _stack_tokens(project.stack)),
+            (_WEIGHT_TAG, tokenize(project.level)),
+            (_WEIGHT_TEXT, tokenize(project.idea)),
+            (_WEIGHT_TEXT, tokenize(project.needs_now)),
+        ],
+    )
+
+
+def _add_profile(index: SearchIndex, profile: Profile) -> None:
+    role_label = LABELS.label("roles", profile.role, "Разработчик")
+    index.add(
+        SearchDoc(
+            kind="profile",
+            entity_id=profile.telegram_id,
+            title=f"👤 {_short(profile.first_name, 40) or 'Разработчик'} — {role_label}",
+            description=_short(
+                " · ".join(v for v in (profile.stack, profile.framework, profile.skills) if v)
+            ),
+            text=format_profile_public(profile),
+            photo=profile.avatar_file_id or None,
+        ),
+        [
+            (_WEIGHT_TAG, _tag_tokens("roles", profile.role)),
+            (_WEIGHT_TAG, _stack_tokens(profile.stack)),
+            (_WEIGHT_TAG, tokenize(profile.framework)),
+            (_WEIGHT_TEXT, tokenize(profile.skills)),
+            (_WEIGHT_TEXT, tokenize(profile.about)),
+        ],
+    )
+
+
+class _SearchService:
+    def __init__(self) -> None:
+        self.index = SearchIndex()
+        self._stale = True
+        self._rebuild: asyncio.Task | None = None
+        self._results: LRUCache[str, tuple[tuple[str, int], ...]] = LRUCache(
+            settings.inline_search_cache_size,
+            ttl=settings.inline_search_cache_ttl_seconds,
+            name="inline_search_cache",
+        )
+        self.rebuilds = 0
+        self.last_build_ms = 0.0
+
+        register_metrics("search_index", self.stats)
+
+    def mark_stale(self) -> None:
+        self._stale = True
+
+    async def _build(self) -> None:
+        started = time.perf_counter()
+        index = SearchIndex()
+        async with async_session_maker() as session:
+            projects = await session.scalars(
+                select(Project).where(Project.is_active.is_(True))
+            )
+            for project in projects:
+                _add_project(index, project)
+            profiles = await session.scalars(select(Profile))
+            for profile in profiles:
+                if _is_profile_searchable(profile):
+                    _add_profile(index, profile)
+        index.freeze()
+
+        self.index = index
+        # старая выдача могла не содержать новых документов
+        self._results.clear()
+        self.rebuilds += 1
+        self.last_build_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            "search_index_built docs=%s tokens=%s duration_ms=%s",
+            len(index.docs),
+            index.stats()["tokens"],
+            self.last_build_ms,
+        )
+
+    def _ensure_rebuild(self) -> asyncio.Task | None:
+        age = time.monotonic() - self.index.built_at
+        if self.index.built_at and age < _MIN_REBUILD_INTERVAL:
+            return None
+        if not (self._stale or age > settings.search_index_ttl_seconds):
+            return None
+        if self._rebuild is None or self._rebuild.done():
+            self._stale = False
+            self._rebuild = asyncio.get_running_loop().create_task(
+                self._build(), name="search_index_rebuild"
+            )
+            self._rebuild.add_done_callback(self._on_rebuild_done)
+        return self._rebuild
+
+    def _on_rebuild_done(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            # попробуем ещё раз на следующем запросе
+            self._stale = True
+            logger.warning("search_index_build_failed error=%r", task.exception())
+
+    def cached(self, query: str) -> tuple[tuple[str, int], ...] | None:
+        """Готовая выдача из кэша (None — промах)."""
+        # индекс устарел — перестраиваем в фоне, после сборки кэш сбросится
+        self._ensure_rebuild()
+        return self._results.get(normalize_query(query))
+
+    async def search(self, query: str) -> tuple[tuple[str, int], ...]:
+        """
+        Ключи документов по запросу (до INLINE_SEARCH_MAX_RESULTS).
+        Кэш не проверяет — для этого есть cached(); результат кладёт в кэш.
+        """
+        rebuild = self._ensure_rebuild()
+        if rebuild is not None and not self.index.built_at:
+            # первый запрос после старта — индекса ещё нет, ждём
+            await asyncio.shield(rebuild)
+
+        normalized = normalize_query(query)
+        result = tuple(self.index.search(normalized, settings.inline_search_max_results))
+        self._results.set(normalized, result)
+        return result
+
+    def get_doc(self, key: tuple[str, int]) -> SearchDoc | None:
+        return self.index.docs.get(key)
+
+    def stats(self) -> dict[str, Any]:
+        data = self.index.stats()
+        data["rebuilds"] = self.rebuilds
+        data["last_build_ms"] = self.last_build_ms
+        data["stale"] = self._stale
+        return data
+
+
+search_service = _SearchService()
+
+
+def mark_search_index_stale(_key: Any = None) -> None:
+    """Профиль или проект изменился — при следующем запросе перестроим индекс."""
+    search_service.mark_stale()
+
+
+# изменения в других воркерах
+bus.subscribe("profile", mark_search_index_stale)
+bus.subscribe("project", mark_search_index_stale)
+bus.subscribe("projects_feed", mark_search_index_stale)
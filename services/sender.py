@@ -0,0 +1,410 @@
+# services/sender.py
+"""
+Единый планировщик исходящих сообщений.
+
+Лимиты Telegram: ~30 сообщений в секунду на бота и ~1 в секунду в один чат.
+Все неинтерактивные отправки (уведомления о заявках, напоминания и т.п.)
+идут через SendScheduler:
+
+- token bucket глобальный и на каждый чат;
+- ответы хендлеров (message.answer, edit_text и т.п.) идут мимо очереди,
+  сразу — но middleware сессии бота списывает за них токены из тех же
+  бакетов, так что рассылки и дайджесты уступают им место, а не
+  добавляются сверху к лимиту;
+- приоритеты в очереди: отложенные интерактивные (алерты кнопок) раньше
+  уведомлений, уведомления раньше фона;
+- TelegramRetryAfter: чат (или весь бот при глобальном флуде) ставится
+  на паузу на retry_after, задача возвращается в очередь;
+- метрики: глубина очереди, время ожидания, отправлено/упало/ретраи.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+
+from config import settings
+from metrics import percentile_ms, register_metrics
+
+logger = logging.getLogger(__name__)
+
+
+# запрос к Bot API отправляет сам планировщик (токены уже списаны)
+_from_scheduler: ContextVar[bool] = ContextVar("sender_from_scheduler", default=False)
+
+# методы, которые Telegram считает исходящими сообщениями
+_MESSAGE_METHOD_PREFIXES = ("send", "copyMessage", "forwardMessage", "editMessage")
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    NOTIFICATION = 1
+    BACKGROUND = 2
+
+
+class TokenBucket:
+    """rate токенов в секунду, не больше capacity в запасе."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """Сколько ждать до следующего токена (0 — можно прямо сейчас)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    chat_id: int = field(compare=False)
+    call: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+
+class SendScheduler:
+    def __init__(
+        self,
+        *,
+        global_rate: float,
+        per_chat_rate: float,
+        max_concurrency: int = 30,
+        max_retries: int = 3,
+    ) -> None:
+        self.global_rate = global_rate
+        self.per_chat_rate = per_chat_rate
+        self.max_retries = max_retries
+
+        self._global = TokenBucket(global_rate, capacity=global_rate)
+        self._chats: dict[int, TokenBucket] = {}
+        # чат -> monotonic-время, до которого Telegram попросил не писать
+        self._paused_until: dict[int, float] = {}
+        self._global_paused_until = 0.0
+
+        # отсортировано по (priority, seq)
+        self._queue: list[_Job] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._task: asyncio.Task | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        # отправок мимо очереди (ответы хендлеров), учтённых в бакетах
+        self.direct = 0
+        self._waits: deque[float] = deque(maxlen=1000)
+
+        register_metrics("sender", self.stats)
+
+    # ===== публичное API =====
+
+    def submit(
+        self,
+        chat_id: int,
+        call: Callable[[], Awaitable[Any]],
+        *,
+        priority: Priority = Priority.NOTIFICATION,
+    ) -> asyncio.Future:
+        """Поставить отправку в очередь. Future завершится результатом вызова."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(
+            priority=int(priority),
+            seq=next(self._seq),
+            chat_id=chat_id,
+            call=call,
+            future=future,
+            enqueued_at=time.monotonic(),
+        )
+        bisect.insort(self._queue, job)
+        self._wakeup.set()
+        return future
+
+    async def send(
+        self,
+        chat_id: int,
+        call: Callable[[], Awaitable[Any]],
+        *,
+        priority: Priority = Priority.NOTIFICATION,
+    ) -> Any:
+        return await self.submit(chat_id, call, priority=priority)
+
+    def charge_direct(self, chat_id: int | None) -> None:
+        """
+        Учесть отправку мимо очереди: она уже уходит, ждать не будем, но
+        токены списываем (бакет уходит в минус) — очередь подождёт.
+        """
+        now = time.monotonic()
+        self._global.consume(now)
+        if chat_id is not None:
+            self._chat_bucket(chat_id).consume(now)
+        self.direct += 1
+
+    def request_middleware(self) -> BaseRequestMiddleware:
+        return _DirectSendMiddleware(self)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for job in self._queue:
+            if not job.future.done():
+                job.future.cancel()
+        self._queue.clear()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    # ===== диспетчер =====
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(
+                self._run(), name="send_scheduler"
+            )
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.per_chat_rate, capacity=1)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _chat_wait(self, chat_id: int, now: float) -> float:
+        paused = self._paused_until.get(chat_id, 0.0) - now
+        return max(paused, self._chat_bucket(chat_id).wait_time(now))
+
+    def _pick(self, now: float) -> tuple[int | None, float]:
+        """
+        Индекс первой (по приоритету) задачи, чат которой готов,
+        или время, через которое стоит посмотреть снова.
+        """
+        min_wait = float("inf")
+        busy_chats: set[int] = set()
+        for index, job in enumerate(self._queue):
+            if job.chat_id in busy_chats:
+                continue
+            wait = self._chat_wait(job.chat_id, now)
+            if wait <= 0:
+                return index, 0.0
+            busy_chats.add(job.chat_id)
+            min_wait = min(min_wait, wait)
+        return None, min_wait
+
+    async def _run(self) -> None:
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            global_wait = max(
+                self._global_paused_until - now,
+                self._global.wait_time(now),
+            )
+            if global_wait > 0:
+                await asyncio.sleep(global_wait)
+                continue
+
+            index, wait = self._pick(now)
+            if index is None:
+                # все чаты в очереди заняты — ждём ближайший или новую задачу
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job = self._queue.pop(index)
+            if job.future.cancelled():
+                continue
+
+            self._global.consume(now)
+            self._chat_bucket(job.chat_id).consume(now)
+            if job.attempts == 0:
+                self._waits.append(now - job.enqueued_at)
+
+            await self._slots.acquire()
+            task = asyncio.create_task(self._execute(job))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+            self._forget_idle_chats(now)
+
+    async def _execute(self, job: _Job) -> None:
+        _from_scheduler.set(True)
+        try:
+            result = await job.call()
+        except TelegramRetryAfter as exc:
+            self._on_retry_after(job, exc)
+        except Exception as exc:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(exc)
+        else:
+            self.sent += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def _on_retry_after(self, job: _Job, exc: TelegramRetryAfter) -> None:
+        self.retried += 1
+        until = time.monotonic() + exc.retry_after
+        self._paused_until[job.chat_id] = until
+        if exc.retry_after > 1:
+            # долгий flood wait обычно означает лимит на весь бот
+            self._global_paused_until = max(self._global_paused_until, until)
+
+        logger.warning(
+            "sender_retry_after chat_id=%s retry_after=%s attempt=%s",
+            job.chat_id,
+            exc.retry_after,
+            job.attempts + 1,
+        )
+
+        job.attempts += 1
+        if job.attempts > self.max_retries:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(exc)
+            return
+
+        bisect.insort(self._queue, job)
+        self._wakeup.set()
+
+    def _forget_idle_chats(self, now: float) -> None:
+        # не копим бакеты всех чатов, в которые когда-то писали
+        if len(self._chats) < 10_000:
+            return
+        queued = {job.chat_id for job in self._queue}
+        for chat_id in [
+            chat_id
+            for chat_id, bucket in self._chats.items()
+            if chat_id not in queued and bucket.is_idle(now)
+        ]:
+            del self._chats[chat_id]
+            self._paused_until.pop(chat_id, None)
+
+    # ===== метрики =====
+
+    def stats(self) -> dict[str, Any]:
+        by_priority: dict[str, int] = {p.name.lower(): 0 for p in Priority}
+        for job in self._queue:
+            by_priority[Priority(job.priority).name.lower()] += 1
+
+        waits = sorted(self._waits)
+        return {
+            "queue_depth": len(self._queue),
+            "queue_by_priority": by_priority,
+            "inflight": len(self._inflight),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retry_after": self.retried,
+            "direct": self.direct,
+            "wait_avg_ms": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "wait_p95_ms": percentile_ms(waits, 0.95),
+            "wait_max_ms": round(waits[-1] * 1000, 1) if waits else 0.0,
+        }
+
+
+class _DirectSendMiddleware(BaseRequestMiddleware):
+    """Списывает токены за сообщения, отправленные не через планировщик."""
+
+    def __init__(self, owner: SendScheduler) -> None:
+        self.owner = owner
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ) -> Response:
+        if not _from_scheduler.get() and method.__api_method__.startswith(
+            _MESSAGE_METHOD_PREFIXES
+        ):
+            chat_id = getattr(method, "chat_id", None)
+            self.owner.charge_direct(chat_id if isinstance(chat_id, int) else None)
+        return await make_request(bot, method)
+
+
+scheduler = SendScheduler(
+    global_rate=settings.sender_global_rate,
+    per_chat_rate=settings.sender_per_chat_rate,
+)
+
+
+async def send_message(
+    bot: Bot,
+    chat_id: int,
+    text: str,
+    *,
+    priority: Priority = Priority.NOTIFICATION,
+    **kwargs: Any,
+):
+    return await scheduler.send(
+        chat_id,
+        lambda: bot.send_message(chat_id=chat_id, text=text, **kwargs),
+        priority=priority,
+    )
+
+
+async def send_photo(
+    bot: Bot,
+    chat_id: int,
+    photo: str,
+    *,
+    priority: Priority = Priority.NOTIFICATION,
+    **kwargs: Any,
+):
+    return await scheduler.send(
+        chat_id,
+        lambda: bot.send_photo(chat_id=chat_id, photo=photo, **kwargs),
+        priority=priority,
+    )
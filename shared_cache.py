@@ -0,0 +1,534 @@
+# shared_cache.py
+"""
+Общий (между процессами бота) уровень кэша и шина инвалидаций.
+
+Схема двухуровневая:
+- L1 — in-process LRU (cache.LRUCache / AsyncLRUCache), как и раньше;
+- L2 — общий бэкенд, который видят все воркеры.
+
+Бэкенды (settings.cache_backend):
+- "memory" — один процесс: L2 нет, шина ничего не рассылает;
+- "sqlite" — файл SQLite рядом с ботом (таблица kv + журнал инвалидаций,
+  который воркеры опрашивают) — для нескольких процессов на одной машине;
+- "redis"  — Redis (нужен пакет redis): kv + pub/sub.
+
+Инвалидации адресуются по сущности: publish("profile", telegram_id).
+Кэши сервисов подписываются через bus.subscribe(entity, callback) и
+сбрасывают у себя ключ, когда запись сделал другой воркер.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Hashable, Protocol
+
+from cache import AsyncLRUCache
+from config import settings
+from metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+InvalidationHandler = Callable[[Any], None]
+
+
+class CacheBackend(Protocol):
+    async def start(self) -> None: ...
+
+    async def close(self) -> None: ...
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: float | None) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    async def publish(self, message: str) -> None: ...
+
+    async def listen(self, on_message: Callable[[str], None]) -> None:
+        """Крутится до отмены, вызывая on_message на каждое чужое сообщение."""
+        ...
+
+
+class MemoryBackend:
+    """Один процесс — общего уровня нет."""
+
+    shared = False
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def get(self, key: str) -> bytes | None:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl: float | None) -> None:
+        pass
+
+    async def delete(self, key: str) -> None:
+        pass
+
+    async def publish(self, message: str) -> None:
+        pass
+
+    async def listen(self, on_message: Callable[[str], None]) -> None:
+        await asyncio.Event().wait()
+
+
+class SQLiteBackend:
+    """
+    Общий кэш в SQLite-файле.
+
+    Инвалидации пишутся в таблицу-журнал; каждый воркер опрашивает её
+    раз в poll_interval секунд по возрастанию id. Старые записи журнала
+    чистим, чтобы файл не рос.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, *, poll_interval: float = 0.5) -> None:
+        self.path = path
+        self.poll_interval = poll_interval
+        self._conn = None
+        self._lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        import aiosqlite
+
+        self._conn = await aiosqlite.connect(self.path)
+        await self._conn.execute("PRAGMA journal_mode=WAL")
+        await self._conn.execute("PRAGMA synchronous=NORMAL")
+        await self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        await self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS invalidations ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " message TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        await self._conn.commit()
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def get(self, key: str) -> bytes | None:
+        async with self._lock:
+            cursor = await self._conn.execute(
+                "SELECT value, expires_at FROM kv WHERE key = ?", (key,)
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            await self.delete(key)
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float | None) -> None:
+        expires_at = time.time() + ttl if ttl is not None else None
+        async with self._lock:
+            await self._conn.execute(
+                "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+                "expires_at = excluded.expires_at",
+                (key, value, expires_at),
+            )
+            await self._conn.commit()
+
+    async def delete(self, key: str) -> None:
+        async with self._lock:
+            await self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            await self._conn.commit()
+
+    async def publish(self, message: str) -> None:
+        async with self._lock:
+            await self._conn.execute(
+                "INSERT INTO invalidations (message, created_at) VALUES (?, ?)",
+                (message, time.time()),
+            )
+            await self._conn.commit()
+
+    async def listen(self, on_message: Callable[[str], None]) -> None:
+        async with self._lock:
+            cursor = await self._conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM invalidations"
+            )
+            (last_id,) = await cursor.fetchone()
+
+        last_prune = time.monotonic()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            async with self._lock:
+                cursor = await self._conn.execute(
+                    "SELECT id, message FROM invalidations WHERE id > ? ORDER BY id",
+                    (last_id,),
+                )
+                rows = await cursor.fetchall()
+            for row_id, message in rows:
+                last_id = row_id
+                on_message(message)
+
+            if time.monotonic() - last_prune > 60:
+                last_prune = time.monotonic()
+                async with self._lock:
+                    # журнал нужен только отстающим воркерам — час с запасом
+                    await self._conn.execute(
+                        "DELETE FROM invalidations WHERE created_at < ?",
+                        (time.time() - 3600,),
+                    )
+                    await self._conn.execute(
+                        "DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                        (time.time(),),
+                    )
+                    await self._conn.commit()
+
+
+class RedisBackend:
+    """Redis: kv + pub/sub в канале settings.cache_channel."""
+
+    shared = True
+
+    def __init__(self, url: str, *, channel: str) -> None:
+        self.url = url
+        self.channel = channel
+        self._redis = None
+
+    async def start(self) -> None:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:  # pragma: no cover - опциональная зависимость
+            raise RuntimeError(
+                "CACHE_BACKEND=redis требует пакет redis (pip install redis)"
+            ) from exc
+        self._redis = redis_asyncio.from_url(self.url)
+        await self._redis.ping()
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float | None) -> None:
+        await self._redis.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(key)
+
+    async def publish(self, message: str) -> None:
+        await self._redis.publish(self.channel, message)
+
+    async def listen(self, on_message: Callable[[str], None]) -> None:
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for item in pubsub.listen():
+                if item.get("type") != "message":
+                    continue
+                data = item["data"]
+                on_message(data.decode() if isinstance(data, bytes) else data)
+        finally:
+            await pubsub.aclose()
+
+
+def _create_backend() -> CacheBackend:
+    kind = settings.cache_backend.lower()
+    if kind == "sqlite":
+        return SQLiteBackend(
+            settings.cache_sqlite_path,
+            poll_interval=settings.cache_bus_poll_interval,
+        )
+    if kind == "redis":
+        if not settings.redis_url:
+            raise RuntimeError("CACHE_BACKEND=redis, но REDIS_URL не задан")
+        return RedisBackend(settings.redis_url, channel=settings.cache_channel)
+    if kind != "memory":
+        raise RuntimeError(f"Неизвестный CACHE_BACKEND={settings.cache_backend!r}")
+    return MemoryBackend()
+
+
+class InvalidationBus:
+    """
+    Шина инвалидаций по сущностям.
+
+    publish() синхронный (его зовут из сервисов сразу после записи) —
+    сообщение кладётся в очередь и уходит в бэкенд фоновой задачей.
+    Свои сообщения воркер распознаёт по origin и не обрабатывает повторно:
+    локальный кэш он уже сбросил сам.
+    """
+
+    def __init__(self) -> None:
+        self.backend: CacheBackend = MemoryBackend()
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handlers: dict[str, list[InvalidationHandler]] = {}
+        self._outbox: asyncio.Queue[str] | None = None
+        self._tasks: list[asyncio.Task] = []
+
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+
+        register_metrics("cache_bus", self.stats)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def subscribe(self, entity: str, handler: InvalidationHandler) -> None:
+        self._handlers.setdefault(entity, []).append(handler)
+
+    def publish(self, entity: str, key: Hashable = None) -> None:
+        if self._outbox is None:
+            return
+        message = json.dumps({"o": self.origin, "e": entity, "k": key})
+        try:
+            self._outbox.put_nowait(message)
+            self.published += 1
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("cache_bus_outbox_full entity=%s key=%s", entity, key)
+
+    def _on_message(self, raw: str) -> None:
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            logger.warning("cache_bus_bad_message raw=%r", raw)
+            return
+        if message.get("o") == self.origin:
+            return
+
+        self.received += 1
+        entity = message.get("e")
+        key = message.get("k")
+        for handler in self._handlers.get(entity, ()):
+            try:
+                handler(key)
+            except Exception:
+                logger.exception("cache_bus_handler_failed entity=%s key=%s", entity, key)
+
+    async def _sender(self) -> None:
+        assert self._outbox is not None
+        while True:
+            message = await self._outbox.get()
+            try:
+                await self.backend.publish(message)
+            except Exception:
+                self.dropped += 1
+                logger.exception("cache_bus_publish_failed")
+
+    async def start(self, backend: CacheBackend) -> None:
+        self.backend = backend
+        await backend.start()
+        if not getattr(backend, "shared", False):
+            return
+
+        self._outbox = asyncio.Queue(maxsize=10_000)
+        self._tasks = [
+            asyncio.create_task(self._sender(), name="cache_bus_sender"),
+            asyncio.create_task(
+                backend.listen(self._on_message), name="cache_bus_listener"
+            ),
+        ]
+        logger.info(
+            "cache_bus_started backend=%s origin=%s",
+            type(backend).__name__,
+            self.origin,
+        )
+
+    async def stop(self) -> None:
+        # досылаем то, что уже стоит в очереди
+        if self._outbox is not None:
+            while not self._outbox.empty():
+                try:
+                    await self.backend.publish(self._outbox.get_nowait())
+                except Exception:
+                    logger.exception("cache_bus_publish_failed")
+                    break
+
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._tasks = []
+        self._outbox = None
+
+        await self.backend.close()
+        self.backend = MemoryBackend()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+            "outbox": self._outbox.qsize() if self._outbox is not None else 0,
+        }
+
+
+bus = InvalidationBus()
+
+
+class TwoTierCache(AsyncLRUCache):
+    """
+    AsyncLRUCache (L1) + общий бэкенд шины (L2) для одной сущности.
+
+    - промах L1 → смотрим L2 → только потом loader (и кладём в оба уровня);
+    - invalidate(key) сбрасывает L1, удаляет ключ из L2 и рассылает
+      инвалидацию остальным воркерам;
+    - store(key, value) — то же после записи в БД, но в L2 сразу кладётся
+      новое значение;
+    - чужая инвалидация по entity сбрасывает только L1.
+
+    В L2 значения лежат в JSON: encode переводит значение в dict,
+    decode — обратно. Запись L2, которую не удалось разобрать, считается
+    промахом.
+    """
+
+    def __init__(
+        self,
+        entity: str,
+        maxsize: int,
+        *,
+        encode: Callable[[Any], dict[str, Any]],
+        decode: Callable[[dict[str, Any]], Any],
+        ttl: float | None = None,
+        name: str | None = None,
+    ) -> None:
+        super().__init__(maxsize, ttl=ttl, name=name)
+        self.entity = entity
+        self.encode = encode
+        self.decode = decode
+        self.l2_hits = 0
+        self.l2_errors = 0
+        # фоновые записи в L2: держим ссылки, пока задачи не завершатся
+        self._tasks: set[asyncio.Task] = set()
+        bus.subscribe(entity, self._drop_local)
+
+    def _l2_key(self, key: Hashable) -> str:
+        return f"{settings.cache_channel}:{self.entity}:{key}"
+
+    def _dump(self, value: Any) -> bytes:
+        return json.dumps(self.encode(value), separators=(",", ":")).encode()
+
+    def _parse(self, raw: bytes) -> Any:
+        try:
+            return self.decode(json.loads(raw))
+        except (ValueError, TypeError, KeyError):
+            self.l2_errors += 1
+            logger.warning("two_tier_l2_bad_value entity=%s", self.entity, exc_info=True)
+            return None
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                "two_tier_l2_task_failed entity=%s",
+                self.entity,
+                exc_info=task.exception(),
+            )
+
+    def _drop_local(self, key: Any) -> None:
+        if key is None:
+            super().clear()
+        else:
+            super().invalidate(key)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        if not bus.running:
+            return await super().get_or_load(key, loader)
+
+        async def _load_through_l2() -> Any:
+            try:
+                raw = await bus.backend.get(self._l2_key(key))
+            except Exception:
+                self.l2_errors += 1
+                logger.warning("two_tier_l2_get_failed entity=%s", self.entity, exc_info=True)
+                raw = None
+            if raw is not None:
+                value = self._parse(raw)
+                if value is not None:
+                    self.l2_hits += 1
+                    return value
+
+            value = await loader()
+            if value is not None:
+                try:
+                    await bus.backend.set(self._l2_key(key), self._dump(value), self.ttl)
+                except Exception:
+                    self.l2_errors += 1
+                    logger.warning("two_tier_l2_set_failed entity=%s", self.entity, exc_info=True)
+            return value
+
+        return await super().get_or_load(key, _load_through_l2)
+
+    def invalidate(self, key: Hashable) -> None:
+        super().invalidate(key)
+        if bus.running:
+            self._spawn(self._delete_l2_and_publish(key))
+
+    def store(self, key: Hashable, value: Any) -> None:
+        """Свежее значение после записи в БД: в L1 сразу, в L2 — фоном, затем рассылка."""
+        super().invalidate(key)
+        self.set(key, value)
+        if bus.running:
+            self._spawn(self._replace_l2_and_publish(key, value))
+
+    async def _replace_l2_and_publish(self, key: Hashable, value: Any) -> None:
+        # set перезаписывает ключ целиком — старое значение из L2 уходит
+        # вместе с записью нового, и другой воркер после рассылки прочитает
+        # уже свежий снимок
+        try:
+            await bus.backend.set(self._l2_key(key), self._dump(value), self.ttl)
+        except Exception:
+            self.l2_errors += 1
+            logger.warning("two_tier_l2_set_failed entity=%s", self.entity, exc_info=True)
+            await self._delete_l2_and_publish(key)
+            return
+        bus.publish(self.entity, key)
+
+    async def _delete_l2_and_publish(self, key: Hashable) -> None:
+        # сначала убираем из L2, потом рассылаем: иначе другой воркер
+        # успеет перечитать из L2 старое значение
+        try:
+            await bus.backend.delete(self._l2_key(key))
+        except Exception:
+            self.l2_errors += 1
+            logger.warning("two_tier_l2_delete_failed entity=%s", self.entity, exc_info=True)
+        bus.publish(self.entity, key)
+
+    def stats(self) -> dict[str, Any]:
+        data = super().stats()
+        data["l2_hits"] = self.l2_hits
+        data["l2_errors"] = self.l2_errors
+        return data
+
+
+async def setup_shared_cache() -> None:
+    await bus.start(_create_backend())
+
+
+async def shutdown_shared_cache() -> None:
+    await bus.stop()
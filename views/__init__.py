@@ -9,6 +9,13 @@ from .projects import (
     format_projects_feed,
 )
 from .safe import html_safe
+from .cards import (
+    RenderedCard,
+    render_profile_card,
+    render_project_card,
+    get_cached_card,
+    get_card_cache_stats,
+)
 
 
 __all__ = [
@@ -18,4 +25,9 @@ __all__ = [
     "format_project_card",
     "format_projects_feed",
     "html_safe",
+    "RenderedCard",
+    "render_profile_card",
+    "render_project_card",
+    "get_cached_card",
+    "get_card_cache_stats",
 ]
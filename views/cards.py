@@ -0,0 +1,152 @@
+# views/cards.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from cache import LRUCache
+from config import settings
+from views.profiles import format_profile_public
+from views.projects import format_project_card
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedCard:
+    """
+    Готовая карточка: HTML-текст, клавиатура и (опционально) фото.
+    Объект неизменяемый — его можно отдавать из кэша кому угодно.
+    """
+
+    text: str
+    reply_markup: InlineKeyboardMarkup | None
+    photo: str | None
+
+
+# (kind, entity_id, updated_at) -> RenderedCard
+_card_cache: LRUCache[tuple, RenderedCard] = LRUCache(
+    settings.card_cache_size,
+    name="card_cache",
+)
+# (kind, entity_id) -> ключ последней отрендеренной версии в _card_cache
+_latest_keys: LRUCache[tuple, tuple] = LRUCache(settings.card_cache_size)
+
+
+def _card_key(kind: str, entity_id: Any, updated_at: Any) -> Hashable | None:
+    """
+    Ключ кэша — id сущности + updated_at.
+    Любая запись в БД двигает updated_at, поэтому старые версии карточки
+    просто перестают запрашиваться и со временем вытесняются LRU.
+
+    Для "псевдо-сущностей" без id/updated_at (предпросмотр проекта) — не кэшируем.
+    """
+    if entity_id is None or updated_at is None:
+        return None
+    return (kind, entity_id, updated_at)
+
+
+def _get_or_render(
+    key: Hashable | None,
+    render: Callable[[], RenderedCard],
+) -> RenderedCard:
+    if key is None:
+        return render()
+
+    card = _card_cache.get(key)
+    if card is None:
+        card = render()
+        _card_cache.set(key, card)
+    _latest_keys.set(key[:2], key)
+    return card
+
+
+def get_cached_card(kind: str, entity_id: Any) -> RenderedCard | None:
+    """
+    Последняя отрендеренная в этом процессе карточка сущности — без
+    похода в БД за updated_at (например, для перехода по ссылке на проект).
+    None — карточку ещё не рендерили или её вытеснил LRU.
+    """
+    key = _latest_keys.get((kind, entity_id))
+    if key is None:
+        return None
+    return _card_cache.get(key)
+
+
+# ===== профили =====
+
+
+def _build_profile_card_keyboard(telegram_id: int) -> InlineKeyboardMarkup:
+    kb = InlineKeyboardBuilder()
+    kb.button(
+        text="🏆 Награды пользователя",
+        callback_data=f"devfeed_rewards:{telegram_id}",
+    )
+    kb.button(
+        text="🤝 Откликнуться",
+        callback_data=f"devfeed_request:{telegram_id}",
+    )
+    kb.button(text="⬅️ Предыдущий", callback_data="devfeed_prev")
+    kb.button(text="➡️ Следующий", callback_data="devfeed_next")
+    kb.adjust(1, 1, 2)
+    return kb.as_markup()
+
+
+def render_profile_card(profile) -> RenderedCard:
+    """
+    Карточка профиля для ленты разработчиков.
+    Текст (без username) переиспользуется и в уведомлениях о заявках.
+    """
+    telegram_id = getattr(profile, "telegram_id", None)
+
+    def _render() -> RenderedCard:
+        return RenderedCard(
+            text=format_profile_public(profile),
+            reply_markup=_build_profile_card_keyboard(telegram_id),
+            photo=getattr(profile, "avatar_file_id", None) or None,
+        )
+
+    key = _card_key("profile", telegram_id, getattr(profile, "updated_at", None))
+    return _get_or_render(key, _render)
+
+
+# ===== проекты =====
+
+
+def _build_project_card_keyboard(project_id: int) -> InlineKeyboardMarkup:
+    kb = InlineKeyboardBuilder()
+    kb.button(
+        text="🤝 Откликнуться на проект",
+        callback_data=f"project_apply:{project_id}",
+    )
+    kb.button(text="⬅️ Предыдущий", callback_data="proj_prev")
+    kb.button(text="➡️ Следующий", callback_data="proj_next")
+    kb.adjust(1, 2)
+    return kb.as_markup()
+
+
+def render_project_card(project) -> RenderedCard:
+    """
+    Карточка проекта для ленты проектов.
+    Текст переиспользуется в уведомлении владельцу о заявке.
+    """
+    project_id = getattr(project, "id", None)
+
+    def _render() -> RenderedCard:
+        return RenderedCard(
+            text=format_project_card(project),
+            reply_markup=(
+                _build_project_card_keyboard(project_id)
+                if project_id is not None
+                else None
+            ),
+            photo=getattr(project, "image_file_id", None) or None,
+        )
+
+    key = _card_key("project", project_id, getattr(project, "updated_at", None))
+    return _get_or_render(key, _render)
+
+
+def get_card_cache_stats() -> dict:
+    return _card_cache.stats()
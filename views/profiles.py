@@ -2,14 +2,10 @@
 from typing import Sequence
 
 from models import Profile
-from constants import STACK_LABELS, ROLE_OPTIONS, GOAL_OPTIONS, format_stack_value
+from constants import ROLE_LABELS, GOAL_LABELS, format_stack_value
 from views.safe import html_safe
 
 
-ROLE_LABELS = {code: label for (label, code) in ROLE_OPTIONS}
-GOAL_LABELS = {code: label for (label, code) in GOAL_OPTIONS}
-
-
 def format_profile_text(
     profile: Profile,
     *,
@@ -22,7 +18,7 @@ def format_profile_text(
     username = html_safe(profile.username or fallback_username, default="без username")
 
     stack_raw = profile.stack
-    ц
+    stack_label = html_safe(format_stack_value(stack_raw))
     role_label = html_safe(ROLE_LABELS.get(profile.role, profile.role or "—"))
     goals_label = html_safe(GOAL_LABELS.get(profile.goals, profile.goals or "—"))
 
@@ -2,12 +2,10 @@
 from typing import Sequence
 
 from models import Project
-from constants import STACK_LABELS, ROLE_OPTIONS, format_stack_value
+from constants import ROLE_LABELS, format_stack_value
 
 from views.safe import html_safe
 
-ROLE_LABELS = {code: label for (label, code) in ROLE_OPTIONS}
-
 
 def format_project_card(project: Project) -> str:
     """
@@ -0,0 +1,229 @@
+# warmup.py
+"""
+Прогрев перед стартом поллинга.
+
+init_db() только проверяет, что к базе можно подключиться, поэтому первые
+апдейты после деплоя платили за установку соединений, компиляцию запросов
+и холодные кэши. Здесь делаем всё это заранее:
+
+1. открываем N соединений пула;
+2. сверяем ревизию БД с head миграций Alembic;
+3. один раз гоняем каждый читающий запрос из repositories;
+4. прогреваем кэши: лейблы/стек и первые страницы ленты проектов.
+
+Каждый шаг логируется с длительностью.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+
+from config import settings
+from constants import LABELS, format_stack_value, stack_codes_from_value
+from db import async_session_maker, engine
+import repositories as repo
+from services.projects import (
+    _feed_filter_term,
+    _get_feed_candidates,
+    _normalize_filter,
+    get_project,
+)
+from views.cards import render_project_card
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# id, которого точно нет в БД: запросы выполняются, но ничего не находят
+_PROBE_ID = 0
+
+
+class SchemaMismatchError(RuntimeError):
+    """Ревизия БД не совпадает с head миграций."""
+
+
+async def _step(name: str, func: Callable[[], Awaitable[object]]) -> object:
+    started = time.perf_counter()
+    result = await func()
+    logger.info(
+        "warmup_step name=%s duration_ms=%.1f result=%s",
+        name,
+        (time.perf_counter() - started) * 1000,
+        result,
+    )
+    return result
+
+
+async def _prime_pool(size: int) -> int:
+    """
+    Открываем size соединений ОДНОВРЕМЕННО — только так пул их и удержит
+    (последовательные connect() переиспользовали бы одно и то же).
+    """
+    ready = asyncio.Event()
+    opened = 0
+
+    async def _open() -> None:
+        nonlocal opened
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            opened += 1
+            if opened >= size:
+                ready.set()
+            # держим соединение, пока не откроются остальные
+            await asyncio.wait_for(ready.wait(), timeout=10)
+
+    results = await asyncio.gather(
+        *(_open() for _ in range(size)),
+        return_exceptions=True,
+    )
+    for exc in results:
+        if isinstance(exc, BaseException):
+            logger.warning("warmup_pool_connection_failed error=%r", exc)
+    return opened
+
+
+async def _check_schema() -> str:
+    script = ScriptDirectory.from_config(Config(str(BASE_DIR / "alembic.ini")))
+    expected = set(script.get_heads())
+
+    async with engine.connect() as conn:
+        current = set(
+            await conn.run_sync(
+                lambda sync_conn: MigrationContext.configure(
+                    sync_conn
+                ).get_current_heads()
+            )
+        )
+
+    if current != expected:
+        message = (
+            f"db revision {sorted(current) or 'none'} "
+            f"!= code head {sorted(expected)}"
+        )
+        if settings.warmup_strict_schema:
+            raise SchemaMismatchError(message)
+        logger.warning("warmup_schema_mismatch %s", message)
+        return "mismatch"
+    return ",".join(sorted(current))
+
+
+async def _compile_repository_queries() -> int:
+    """
+    Каждый читающий запрос из repositories — по разу, на несуществующих id.
+    Пишущие функции не трогаем.
+    """
+    calls = [
+        lambda s: repo.get_profile_by_telegram_id(s, _PROBE_ID),
+        lambda s: repo.search_profiles(s, exclude_telegram_id=_PROBE_ID, limit=1),
+        lambda s: repo.get_project_by_id(s, _PROBE_ID),
+        lambda s: repo.list_projects(s, limit=1),
+        lambda s: repo.list_project_feed_candidates(
+            s, role="x", stack="x", level="x", limit=1
+        ),
+        lambda s: repo.get_pending_request_between(s, from_id=_PROBE_ID, to_id=_PROBE_ID),
+        lambda s: repo.get_pending_connect_request_between(
+            s, from_id=_PROBE_ID, to_id=_PROBE_ID
+        ),
+        lambda s: repo.get_pending_project_request_between(
+            s, from_id=_PROBE_ID, to_id=_PROBE_ID, project_id=_PROBE_ID
+        ),
+        lambda s: repo.count_connection_requests_from_user_today(s, from_id=_PROBE_ID),
+        lambda s: repo.get_connection_request_by_id(s, _PROBE_ID),
+    ]
+    async with async_session_maker() as session:
+        for call in calls:
+            await call(session)
+        await session.rollback()
+    return len(calls)
+
+
+async def _preload_labels() -> int:
+    # LABELS собирается при импорте; тут — мемо разборов стека по всем кодам
+    for code, label in LABELS.stacks.items():
+        format_stack_value(code)
+        stack_codes_from_value(label)
+    _check_feed_filter_terms()
+    return len(LABELS.stacks)
+
+
+def _check_feed_filter_terms() -> None:
+    """
+    Фильтр ленты ищет подстроку (ILIKE) в сохранённых лейблах: для каждой
+    роли и стека — в том числе тех, где лейбл не совпадает с кодом
+    ("Node.js" / nodejs) — выбранное значение должно находить свой лейбл.
+    """
+    for kind in ("roles", "stacks"):
+        for code, label in getattr(LABELS, kind).items():
+            for value in (code, label):
+                term = _feed_filter_term(kind, _normalize_filter(kind, value))
+                if term is None or term.casefold() not in label.casefold():
+                    logger.warning(
+                        "warmup_feed_filter_mismatch kind=%s value=%r term=%r label=%r",
+                        kind,
+                        value,
+                        term,
+                        label,
+                    )
+
+
+async def _preload_feed(cards: int) -> int:
+    """
+    Кандидаты ленты без фильтров и по каждой роли + карточки первой страницы.
+    """
+    filters = [None, *LABELS.roles.keys()]
+    first_page: tuple[tuple[int, int], ...] = ()
+
+    async with async_session_maker() as session:
+        for role in filters:
+            candidates = await _get_feed_candidates(
+                session,
+                role=role,
+                stack=None,
+                level=None,
+                base_size=settings.project_feed_base_size,
+            )
+            if role is None:
+                first_page = candidates[:cards]
+
+        for project_id, _ in first_page:
+            project = await get_project(session, project_id)
+            if project is not None:
+                render_project_card(project)
+
+    return len(first_page)
+
+
+async def warmup() -> None:
+    """
+    Полный прогрев. Ошибка схемы в strict-режиме пробрасывается наружу,
+    остальные шаги — best effort: упавший шаг логируем и идём дальше.
+    """
+    started = time.perf_counter()
+
+    steps: list[tuple[str, Callable[[], Awaitable[object]]]] = [
+        ("pool", lambda: _prime_pool(settings.warmup_pool_connections)),
+        ("schema", _check_schema),
+        ("repository_queries", _compile_repository_queries),
+        ("labels", _preload_labels),
+        ("feed", lambda: _preload_feed(settings.warmup_feed_cards)),
+    ]
+    for name, func in steps:
+        try:
+            await _step(name, func)
+        except SchemaMismatchError:
+            raise
+        except Exception:
+            logger.exception("warmup_step_failed name=%s", name)
+
+    logger.info(
+        "warmup_done duration_ms=%.1f",
+        (time.perf_counter() - started) * 1000,
+    )
@@ -0,0 +1,95 @@
+# webhook.py
+"""
+Режим webhook: встроенный aiohttp-сервер вместо long polling.
+
+- Telegram шлёт апдейты POST-ом на settings.webhook_path;
+- секрет проверяется по заголовку X-Telegram-Bot-Api-Secret-Token;
+- отвечаем 200 сразу, апдейт обрабатывается фоновой задачей;
+- при остановке ждём уже принятые апдейты (не дольше
+  settings.webhook_shutdown_timeout) и только потом закрываем сессию бота.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def build_webhook_app(dp: Dispatcher, bot: Bot) -> web.Application:
+    app = web.Application()
+
+    handler = SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=settings.webhook_secret,
+        handle_in_background=True,
+    )
+
+    async def _drain_updates(_app: web.Application) -> None:
+        # on_shutdown вызывается по порядку — этот колбэк стоит раньше
+        # handler.close(), который закрывает сессию бота
+        pending = list(handler._background_feed_update_tasks)
+        if not pending:
+            return
+        logger.info("webhook_draining_updates pending=%s", len(pending))
+        _, still_running = await asyncio.wait(
+            pending,
+            timeout=settings.webhook_shutdown_timeout,
+        )
+        for task in still_running:
+            task.cancel()
+        if still_running:
+            logger.warning("webhook_updates_cancelled count=%s", len(still_running))
+
+    app.on_shutdown.append(_drain_updates)
+    handler.register(app, path=settings.webhook_path)
+    setup_application(app, dp, bot=bot)
+
+    async def _health(_request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    app.router.add_get("/healthz", _health)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """Поднимаем сервер, регистрируем webhook и ждём отмены."""
+    if not settings.webhook_base_url:
+        raise RuntimeError("BOT_MODE=webhook требует WEBHOOK_BASE_URL")
+    if not settings.webhook_secret:
+        raise RuntimeError("BOT_MODE=webhook требует WEBHOOK_SECRET")
+
+    app = build_webhook_app(dp, bot)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.webapp_host, port=settings.webapp_port)
+    await site.start()
+
+    url = settings.webhook_base_url.rstrip("/") + settings.webhook_path
+    await bot.set_webhook(
+        url=url,
+        secret_token=settings.webhook_secret,
+        allowed_updates=dp.resolve_used_update_types(),
+        max_connections=settings.webhook_max_connections,
+    )
+    logger.info(
+        "webhook_started url=%s host=%s port=%s",
+        url,
+        settings.webapp_host,
+        settings.webapp_port,
+    )
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        # webhook в Telegram не снимаем: пока нас нет, апдейты копятся
+        # на стороне Telegram и придут после рестарта
+        await runner.cleanup()
+        logger.info("webhook_stopped")